@@ -2,10 +2,18 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-import os
+import numpy as np
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from lib.data_loader import CrimeDataLoader
+from lib.aggregates import interval_hour_distribution
+from lib.charts import (
+    day_night_split, format_duration, overview_numbers, quarterly_trend_chart, severity_chart, time_of_day_chart
+)
+from lib.data_loader import day_range, hour_of_week_by_severity, load_severity_dict
+from lib.export import EXPORT_FORMATS, available_formats
+from lib.long_term import read_long_term_counts
+from lib.reload import DatasetWatcher
+from lib.summaries import read_location_summary
 from lib import config
 
 st.set_page_config(
@@ -16,14 +24,321 @@ st.set_page_config(
 
 @st.cache_resource
 def load_crime_data():
-    loader = CrimeDataLoader()
-    loader.load_latest_data()
-    return loader
+    # Watcher loads the data in the background and rebuilds it when new data lands
+    return DatasetWatcher().start(preload=True)
+
+@st.cache_resource(ttl=600)
+def load_long_term_counts():
+    # Small precomputed arrays; rebuilt offline by scripts/data_processing/build_long_term_counts.py
+    return read_long_term_counts()
+
+def format_delta(current, previous):
+    change = current - previous
+    if previous > 0:
+        return f"{change:+,} ({change / previous:+.0%})"
+    return f"{change:+,}"
+
+def render_overview(duration_str, total_crimes, total_high, avg_high_per_quarter, avg_crimes_per_quarter,
+                    deltas=None, delta_label=None):
+    deltas = deltas if deltas else {}
+    st.markdown("### Overview Statistics")
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 1.2, 1, 1])
+    with col1:
+        st.metric("Duration", duration_str)
+    with col2:
+        # More crime is worse, so increases show in red
+        st.metric("Total", f"{total_crimes:,}", delta=deltas.get('total'), delta_color="inverse",
+                  help=f"Change vs {delta_label}" if delta_label else None)
+    with col3:
+        st.metric("High Severity", f"{total_high:,}", delta=deltas.get('high'), delta_color="inverse",
+                  help=f"Change vs {delta_label}" if delta_label else None)
+    with col4:
+        st.metric("High/Qtr", f"{avg_high_per_quarter:.1f}")
+    with col5:
+        st.metric("Total/Qtr", f"{avg_crimes_per_quarter:.1f}")
+
+def render_comparison(loader):
+    selected = st.multiselect(
+        "Locations to compare:",
+        options=list(config.LOCATIONS.keys()),
+        default=list(config.LOCATIONS.keys()),
+        format_func=lambda address: config.LOCATIONS[address],
+        key='compare_locations'
+    )
+    if not selected:
+        st.info("Select at least one location to compare")
+        return
+
+    # Per-location quarterly counts come from precomputed aggregates, not the raw rows
+    counts = loader.get_location_quarterly_counts(selected)
+    if len(counts) == 0:
+        st.warning("No data available for selected locations")
+        return
+    quarters = counts[['quarter', 'quarter_label']].drop_duplicates('quarter').sort_values('quarter')
+    start_label, end_label = st.select_slider(
+        "Quarters:",
+        options=quarters['quarter_label'].tolist(),
+        value=(quarters['quarter_label'].iloc[0], quarters['quarter_label'].iloc[-1]),
+        key='compare_quarters'
+    )
+    label_to_quarter = dict(zip(quarters['quarter_label'], quarters['quarter']))
+    counts = counts[(counts['quarter'] >= label_to_quarter[start_label]) &
+                    (counts['quarter'] <= label_to_quarter[end_label])].copy()
+    counts['location_name'] = counts['location'].map(config.LOCATIONS)
+    n_quarters = counts['quarter'].nunique()
+
+    st.markdown("### Quarterly Trends")
+    trend_metric = st.radio("Count:", ["All Crimes", "High Severity"], horizontal=True, key='compare_metric')
+    trend_counts = counts if trend_metric == "All Crimes" else counts[counts['severity'] == 'High']
+    trend_df = (
+        trend_counts
+        .groupby(['location_name', 'quarter_date', 'quarter_label'], observed=True)['count']
+        .sum()
+        .reset_index()
+    )
+    trend_fig = px.line(
+        trend_df,
+        x='quarter_date',
+        y='count',
+        color='location_name',
+        markers=True,
+        custom_data=['quarter_label', 'location_name'],
+        labels={'quarter_date': 'Quarter', 'count': 'Number of Crimes', 'location_name': 'Location'}
+    )
+    trend_fig.update_traces(
+        hovertemplate='<b>%{customdata[1]}</b><br>%{customdata[0]}: %{y}<extra></extra>'
+    )
+    trend_fig.update_layout(height=400, yaxis=dict(rangemode='tozero'), hovermode='x unified')
+    st.plotly_chart(trend_fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### Severity Mix")
+        mix_df = (
+            counts[counts['severity'] != 'Exclude']
+            .groupby(['location_name', 'severity'], observed=True)['count']
+            .sum()
+            .reset_index()
+        )
+        mix_fig = px.bar(
+            mix_df,
+            x='count',
+            y='location_name',
+            color='severity',
+            orientation='h',
+            labels={'count': 'Share of Crimes (%)', 'location_name': 'Location', 'severity': 'Severity'},
+            color_discrete_map={'High': '#dc3545', 'Medium': '#fd7e14', 'Low': '#ffc107'},
+            category_orders={'severity': ['High', 'Medium', 'Low']}
+        )
+        mix_fig.update_layout(height=400, barnorm='percent')
+        st.plotly_chart(mix_fig, use_container_width=True)
+
+    with col2:
+        st.markdown("### Per-Quarter Rates")
+        totals = (
+            counts
+            .pivot_table(index='location_name', columns='severity', values='count', aggfunc='sum', observed=False)
+            .reindex(columns=['High', 'Medium', 'Low', 'Exclude'], fill_value=0)
+        )
+        rates_df = pd.DataFrame({
+            'Total/Qtr': totals.sum(axis=1) / n_quarters,
+            'High/Qtr': totals['High'] / n_quarters,
+            'Medium/Qtr': totals['Medium'] / n_quarters,
+            'Low/Qtr': totals['Low'] / n_quarters,
+            '% High': 100 * totals['High'] / totals.sum(axis=1).where(lambda x: x > 0),
+        }).round(1)
+        rates_df.index.name = 'Location'
+        st.dataframe(rates_df, use_container_width=True)
+        st.caption(f"{n_quarters} quarters: {start_label} - {end_label}")
+
+def render_leaderboard(loader):
+    col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
+    with col1:
+        metric_options = {'All Crimes': 'total', 'High Severity': 'high', 'Firearm Involved': 'firearm'}
+        rank_by = metric_options[st.selectbox("Rank by:", list(metric_options.keys()), key='hot_rank_by')]
+    with col2:
+        top_n = st.slider("Addresses:", min_value=5, max_value=50, value=20, step=5, key='hot_top_n')
+    default_end = datetime.now().date()
+    with col3:
+        start_date = st.date_input("Start Date", value=default_end - relativedelta(years=1),
+                                   format="MM/DD/YYYY", key='hot_start_date')
+    with col4:
+        end_date = st.date_input("End Date", value=default_end, format="MM/DD/YYYY", key='hot_end_date')
 
-loader = load_crime_data()
+    # Ranked citywide from precomputed per-address monthly counts
+    ranking = loader.get_top_addresses(top_n, start_date, end_date, by=rank_by)
+    if len(ranking) == 0:
+        st.warning("No data available for selected filters")
+        return
+    st.caption("Counts cover whole months. Quarter change compares the last quarter in the range with the one before it.")
+
+    table_df = ranking[['rank', 'address', 'total', 'high', 'firearm', 'quarter_count', 'qoq_change', 'qoq_pct']].copy()
+    table_df.columns = ['Rank', 'Address', 'Total', 'High Severity', 'Firearm', 'Last Quarter',
+                        'Change vs Prior Qtr', 'Change %']
+    st.dataframe(
+        table_df,
+        use_container_width=True,
+        height=min(35 * (len(table_df) + 1) + 3, 740),
+        hide_index=True,
+        column_config={'Change %': st.column_config.NumberColumn(format="%.1f%%")}
+    )
+
+def render_anomalies(loader):
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        level_names = {'address': 'Address', 'beat': 'Beat', 'neighborhood': 'Neighborhood'}
+        level = st.selectbox("Location level:", loader.location_levels(), format_func=level_names.get,
+                             key='anomaly_level')
+    with col2:
+        threshold = st.slider("Flag at z-score:", min_value=2.0, max_value=6.0, value=3.0, step=0.5,
+                              key='anomaly_threshold')
+    with col3:
+        min_count = st.number_input("Minimum incidents in quarter:", min_value=1, value=5, step=1,
+                                    key='anomaly_min_count')
+
+    # Every location is scored at once against its own previous four quarters
+    anomalies = loader.get_anomalies(level, threshold=threshold, min_count=int(min_count))
+    if len(anomalies) == 0:
+        st.success("No locations are well above their recent baseline in the latest complete quarter")
+        return
+    st.caption(f"{len(anomalies)} locations flagged for {anomalies['quarter_label'].iloc[0]}. "
+               "Baseline is the previous four quarters; the Poisson z-score treats the baseline mean as "
+               "the expected count.")
+
+    table_df = anomalies[['location', 'count', 'baseline_mean', 'baseline_std', 'rolling_z', 'poisson_z']].copy()
+    table_df.columns = [level_names[level], 'Incidents', 'Baseline Mean', 'Baseline Std', 'Rolling z',
+                        'Poisson z']
+    st.dataframe(
+        table_df.round(2),
+        use_container_width=True,
+        height=min(35 * (len(table_df) + 1) + 3, 740),
+        hide_index=True
+    )
+
+def render_hotspots(loader):
+    col1, col2, col3, col4 = st.columns([1.4, 1, 1, 1.2])
+    with col1:
+        severities = st.multiselect("Severity:", ['High', 'Medium', 'Low'], default=['High'], key='hotspot_severity')
+    default_end = datetime.now().date()
+    with col2:
+        start_date = st.date_input("Start Date", value=default_end - relativedelta(years=1),
+                                   format="MM/DD/YYYY", key='hotspot_start_date')
+    with col3:
+        end_date = st.date_input("End Date", value=default_end, format="MM/DD/YYYY", key='hotspot_end_date')
+    with col4:
+        bandwidth = st.slider("Bandwidth (m):", min_value=50, max_value=1500, value=250, step=50,
+                              key='hotspot_bandwidth')
+    if not severities:
+        st.info("Select at least one severity level")
+        return
+
+    # Cached monthly grids summed over the range, then one FFT convolution
+    surface = loader.get_hotspot_surface(severities, start_date, end_date, bandwidth_m=bandwidth)
+    density = surface['density']
+    if density.max() <= 0:
+        st.warning("No data available for selected filters")
+        return
+    rows, cols = np.nonzero(density >= density.max() * 0.05)
+    values = density[rows, cols]
+
+    hotspot_fig = go.Figure(go.Scattermapbox(
+        lon=surface['lon'][cols],
+        lat=surface['lat'][rows],
+        mode='markers',
+        marker=dict(size=6, color=values, colorscale='YlOrRd', opacity=0.6,
+                    colorbar=dict(title='Incidents/km²')),
+        hovertemplate='%{marker.color:.1f} incidents/km²<extra></extra>',
+        name='Density'
+    ))
+    hotspot_fig.update_layout(
+        height=650,
+        margin=dict(l=0, r=0, t=0, b=0),
+        mapbox=dict(
+            style='open-street-map',
+            center=dict(lon=float(surface['lon'].mean()), lat=float(surface['lat'].mean())),
+            zoom=11
+        )
+    )
+    st.plotly_chart(hotspot_fig, use_container_width=True)
+    st.caption("Kernel density estimate over whole months in the selected range. Cells below 5% of the "
+               "peak density are hidden.")
+
+def render_near_repeat(loader):
+    offense_options = sorted(set(load_severity_dict()) | set(config.NEAR_REPEAT_OFFENSES))
+    col1, col2, col3, col4 = st.columns([1.6, 1, 1, 1])
+    with col1:
+        offenses = st.multiselect("Offenses:", offense_options, default=config.NEAR_REPEAT_OFFENSES,
+                                  key='near_repeat_offenses')
+    default_end = datetime.now().date()
+    with col2:
+        start_date = st.date_input("Start Date", value=default_end - relativedelta(years=1),
+                                   format="MM/DD/YYYY", key='near_repeat_start_date')
+    with col3:
+        end_date = st.date_input("End Date", value=default_end, format="MM/DD/YYYY", key='near_repeat_end_date')
+    with col4:
+        n_permutations = st.select_slider("Permutations:", options=[19, 49, 99, 199, 499, 999],
+                                          value=config.NEAR_REPEAT_PERMUTATIONS, key='near_repeat_permutations')
+    if not offenses:
+        st.info("Select at least one offense")
+        return
+    if not st.button("Run analysis", type="primary"):
+        st.caption("Compares how often incidents follow each other closely in space and time with a baseline "
+                   "where incident times are shuffled (Knox test).")
+        return
+
+    with st.spinner("Running permutations..."):
+        knox_df = loader.get_near_repeat(offenses, start_date, pd.Timestamp(end_date) + pd.Timedelta(days=1),
+                                         n_permutations=n_permutations)
+    ratios = knox_df.pivot(index='distance_band', columns='time_band', values='knox_ratio')
+    ratios = ratios.loc[knox_df['distance_band'].unique(), knox_df['time_band'].unique()]
+    p_values = knox_df.pivot(index='distance_band', columns='time_band', values='p_value').loc[ratios.index, ratios.columns]
+    knox_fig = go.Figure(go.Heatmap(
+        z=ratios.to_numpy(),
+        x=list(ratios.columns),
+        y=list(ratios.index),
+        colorscale='RdBu_r',
+        zmid=1,
+        text=[[f"{r:.2f}<br>p={p:.3f}" for r, p in zip(rr, pr)] for rr, pr in zip(ratios.to_numpy(), p_values.to_numpy())],
+        texttemplate='%{text}',
+        hovertemplate='%{y}, %{x}<br>Knox ratio: %{z:.2f}<extra></extra>',
+        colorbar=dict(title='Knox ratio')
+    ))
+    knox_fig.update_layout(
+        height=400,
+        xaxis_title="Time Between Incidents",
+        yaxis_title="Distance Between Incidents",
+        yaxis=dict(autorange='reversed')
+    )
+    st.plotly_chart(knox_fig, use_container_width=True)
+    st.caption("Knox ratio = observed pairs / pairs expected by chance. Ratios above 1 with small p-values mean "
+               "a prior incident raises the risk of another nearby soon after.")
+
+watcher = load_crime_data()
+# Take one snapshot per rerun so a reload mid-rerun can't mix data versions
+dataset = watcher.snapshot(block=watcher.preload_error is not None)
 
 st.title("Atlanta Crime Statistics")
 
+view_mode = st.radio("View:", ["Single Location", "Compare Locations", "Hot Addresses", "Anomalies", "Hotspots",
+                              "Near Repeat"],
+                     horizontal=True, key='view_mode')
+if view_mode != "Single Location":
+    if dataset is None:
+        with st.spinner("Loading incident data..."):
+            watcher.wait_until_ready(timeout=2)
+        st.rerun()
+    if view_mode == "Compare Locations":
+        render_comparison(dataset.loader)
+    elif view_mode == "Hot Addresses":
+        render_leaderboard(dataset.loader)
+    elif view_mode == "Anomalies":
+        render_anomalies(dataset.loader)
+    elif view_mode == "Hotspots":
+        render_hotspots(dataset.loader)
+    else:
+        render_near_repeat(dataset.loader)
+    st.stop()
+
 # Initialize session state for selected location
 if 'selected_address' not in st.session_state:
     st.session_state.selected_address = config.DEFAULT_LOCATION
@@ -54,8 +369,34 @@ if selected_address != st.session_state.selected_address:
 st.subheader(f"Location: {location_name}")
 st.caption(f"Address: {selected_address}")
 
+if dataset is None:
+    # Cold start: show the precomputed overview until the full data is loaded
+    summary = read_location_summary(selected_address)
+    if summary:
+        min_date = pd.Timestamp(summary['min_date'])
+        max_date = pd.Timestamp(summary['max_date'])
+        st.caption(f"Available: {min_date.strftime(config.DISPLAY_DATE_FORMAT)} - {max_date.strftime(config.DISPLAY_DATE_FORMAT)}")
+        render_overview(
+            format_duration(*day_range(min_date, max_date)),
+            summary['total_crimes'],
+            summary['total_high'],
+            summary['avg_high_per_quarter'],
+            summary['avg_crimes_per_quarter']
+        )
+    with st.spinner("Loading incident details..."):
+        watcher.wait_until_ready(timeout=2)
+    st.rerun()
+
+loader = dataset.loader
+
+count_options = {'Offenses': 'offenses', 'Incidents': 'incidents'}
+count_mode = count_options[st.radio(
+    "Count:", list(count_options.keys()), horizontal=True, key='count_mode',
+    help="An incident can carry several offenses. Incidents counts each once, under its most severe offense."
+)]
+
 # Get the full data to determine min/max dates
-full_df = loader.filter_by_address(selected_address)
+full_df = loader.filter_by_address(selected_address, count_mode)
 min_date = full_df['OccurredFromDate'].min() if len(full_df) > 0 else datetime(2021, 1, 1)
 max_date = full_df['OccurredFromDate'].max() if len(full_df) > 0 else datetime.now()
 
@@ -95,12 +436,14 @@ with col3:
     if pd.notna(min_date) and pd.notna(max_date):
         st.caption(f"Available: {min_date.strftime(config.DISPLAY_DATE_FORMAT)} - {max_date.strftime(config.DISPLAY_DATE_FORMAT)}")
 
+# Whole days start_date..end_date, shared by the overview, its deltas, the table and the export
+start_dt, end_dt = day_range(start_date, end_date) if start_date and end_date else (None, None)
+
 # Filter data
 filtered_df = full_df.copy()
 
 if start_date and end_date:
-    mask = (filtered_df['OccurredFromDate'] >= pd.to_datetime(start_date)) & \
-           (filtered_df['OccurredFromDate'] <= pd.to_datetime(end_date))
+    mask = (filtered_df['OccurredFromDate'] >= start_dt) & (filtered_df['OccurredFromDate'] <= end_dt)
     filtered_df = filtered_df.loc[mask]
 
 total_crimes = len(filtered_df)
@@ -109,110 +452,26 @@ if total_crimes == 0:
     st.warning("No data available for selected filters")
     st.stop()
 
-# Map offenses to severity
-crosswalk_path = str(config.SEVERITY_CROSSWALK_PATH)
-if os.path.exists(crosswalk_path):
-    severity_crosswalk = pd.read_csv(crosswalk_path)
-    severity_dict = dict(zip(
-        severity_crosswalk['offense_description'],
-        severity_crosswalk['severity']
-    ))
-else:
-    severity_dict = {}
-
-filtered_df = filtered_df.copy()
-filtered_df['severity'] = filtered_df['NIBRS_Offense'].map(severity_dict)
-filtered_df['severity'] = filtered_df['severity'].fillna('Low')
-filtered_df_for_severity = filtered_df[filtered_df['severity'] != 'Exclude']
-
-# Overview metrics
-start_dt = pd.to_datetime(start_date)
-end_dt = pd.to_datetime(end_date)
-rd = relativedelta(end_dt, start_dt)
-# Compact duration format
-if rd.years > 0 and rd.months > 0:
-    duration_str = f"{rd.years}y {rd.months}m"
-elif rd.years > 0:
-    duration_str = f"{rd.years}y"
-elif rd.months > 0:
-    duration_str = f"{rd.months}m"
-else:
-    days = (end_dt - start_dt).days
-    duration_str = f"{days}d"
-
-# Build quarter range
-q_start = start_dt.to_period('Q')
-q_end = end_dt.to_period('Q')
-quarter_index = pd.period_range(start=q_start, end=q_end, freq='Q')
-
-# Average crimes per quarter
-all_quarter_df = filtered_df.copy()
-all_quarter_df['quarter'] = all_quarter_df['OccurredFromDate'].dt.to_period('Q')
-all_counts = all_quarter_df.groupby('quarter').size().reindex(quarter_index, fill_value=0)
-avg_crimes_per_quarter = float(all_counts.mean()) if len(all_counts) > 0 else 0.0
-
-# High severity metrics
-high_df = filtered_df_for_severity[filtered_df_for_severity['severity'] == 'High'].copy()
-total_high = int(high_df.shape[0])
-if not high_df.empty:
-    high_df['quarter'] = high_df['OccurredFromDate'].dt.to_period('Q')
-    high_counts = high_df.groupby('quarter').size().reindex(quarter_index, fill_value=0)
-else:
-    high_counts = pd.Series(0, index=quarter_index)
-avg_high_per_quarter = float(high_counts.mean()) if len(high_counts) > 0 else 0.0
+# Overview metrics (severity is mapped by the loader when the dataset is (re)loaded)
+overview = overview_numbers(filtered_df, start_dt, end_dt)
+
+# Period-over-period deltas are prefix-sum lookups, not extra passes over the rows
+compare_options = {'Previous period': 'previous_period', 'Same period last year': 'previous_year'}
+compare_to = st.radio("Compare with:", list(compare_options.keys()), horizontal=True, key='compare_to')
+period_counts = loader.get_period_comparison(selected_address, start_dt, end_dt, count=count_mode)
+baseline = period_counts[compare_options[compare_to]]
+deltas = {
+    channel: format_delta(period_counts['current'][channel], baseline[channel])
+    for channel in ['total', 'high']
+}
 
 # Display overview stats
-st.markdown("### Overview Statistics")
-col1, col2, col3, col4, col5 = st.columns([1, 1, 1.2, 1, 1])
-with col1:
-    st.metric("Duration", duration_str)
-with col2:
-    st.metric("Total", f"{total_crimes:,}")
-with col3:
-    st.metric("High Severity", f"{total_high:,}")
-with col4:
-    st.metric("High/Qtr", f"{avg_high_per_quarter:.1f}")
-with col5:
-    st.metric("Total/Qtr", f"{avg_crimes_per_quarter:.1f}")
+render_overview(overview['duration'], overview['total'], overview['high'], overview['avg_high_per_quarter'],
+                overview['avg_per_quarter'], deltas=deltas, delta_label=compare_to.lower())
 
 # Crime severity grouped chart
 st.markdown("### Crimes by Severity Group")
-severity_order = ['High', 'Medium', 'Low']
-offense_counts_df = (
-    filtered_df_for_severity
-    .groupby(['severity', 'NIBRS_Offense'])
-    .size()
-    .reset_index(name='count')
-)
-offense_counts_df['severity'] = pd.Categorical(
-    offense_counts_df['severity'], categories=severity_order, ordered=True
-)
-
-# Build y-axis order
-y_order = []
-for s in severity_order:
-    subset = offense_counts_df[offense_counts_df['severity'] == s]
-    subset = subset.sort_values('count', ascending=False)
-    y_order.extend(subset['NIBRS_Offense'].tolist())
-
-severity_grouped_fig = px.bar(
-    offense_counts_df,
-    x='count',
-    y='NIBRS_Offense',
-    color='severity',
-    orientation='h',
-    title='Crimes by Severity Group',
-    labels={'count': 'Count', 'NIBRS_Offense': 'Crime Type', 'severity': 'Severity'},
-    color_discrete_map={'High': '#dc3545', 'Medium': '#fd7e14', 'Low': '#ffc107'},
-    category_orders={'severity': severity_order}
-)
-severity_grouped_fig.update_layout(
-    height=600,
-    showlegend=True,
-    legend=dict(title='Severity', orientation='v', x=1.02, y=1),
-    yaxis=dict(categoryorder='array', categoryarray=y_order, autorange='reversed')
-)
-st.plotly_chart(severity_grouped_fig, use_container_width=True)
+st.plotly_chart(severity_chart(filtered_df), use_container_width=True)
 
 # Severity definitions
 with st.expander("View Severity Level Definitions"):
@@ -244,118 +503,116 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("### Crime Trends Over Time (Quarterly)")
-    time_data = loader.get_quarterly_time_series_data(selected_address, start_date, end_date)
-    if len(time_data) > 0:
-        time_series_fig = go.Figure()
-        time_series_fig.add_trace(go.Scatter(
-            x=time_data['quarter_date'],
-            y=time_data['count'],
-            mode='lines+markers',
-            name='Crimes',
-            line=dict(color='#e74c3c', width=2),
-            marker=dict(size=8),
-            text=time_data['quarter_label'],
-            customdata=time_data[['quarter_label', 'count']],
-            hovertemplate='<b>%{customdata[0]}</b><br>' +
-                         'Crimes: %{customdata[1]}<br>' +
-                         '<extra></extra>'
-        ))
-        time_series_fig.update_layout(
-            xaxis_title="Quarter",
-            yaxis_title="Number of Crimes",
-            height=400,
-            xaxis=dict(
-                tickmode='array',
-                tickvals=time_data['quarter_date'],
-                ticktext=time_data['quarter_label'],
-                tickangle=-45,
-                showline=True,
-                linewidth=1,
-                linecolor='gray',
-                showgrid=True,
-                gridcolor='lightgray',
-                zeroline=True
-            ),
-            yaxis=dict(
-                showline=True,
-                linewidth=1,
-                linecolor='gray',
-                showgrid=True,
-                gridcolor='lightgray',
-                zeroline=True,
-                zerolinewidth=2,
-                zerolinecolor='gray',
-                rangemode='tozero'  # Always include zero in the y-axis range
-            ),
-            hovermode='x unified'
+    time_data = loader.get_quarterly_time_series_data(selected_address, start_dt, end_dt, count=count_mode)
+    show_forecast = st.checkbox("Show forecast", key='show_forecast',
+                                help="Seasonal trend model fit when the data was loaded, with a ~95% interval")
+    show_full_history = st.checkbox("Full history (1997-)", key='show_full_history',
+                                    help="Every era on one severity scale, ignoring the date range above")
+    long_term = load_long_term_counts() if show_full_history else None
+    if show_full_history and long_term is None:
+        st.info("Long-term counts have not been built yet (scripts/data_processing/build_long_term_counts.py)")
+    elif show_full_history:
+        long_term_df = long_term.quarterly_frame(selected_address, severities=['High', 'Medium', 'Low'])
+        long_term_fig = px.area(
+            long_term_df,
+            x='quarter_date',
+            y='count',
+            color='severity',
+            custom_data=['quarter_label', 'severity'],
+            labels={'quarter_date': 'Quarter', 'count': 'Number of Crimes', 'severity': 'Severity'},
+            color_discrete_map={'High': '#dc3545', 'Medium': '#fd7e14', 'Low': '#ffc107'},
+            category_orders={'severity': ['High', 'Medium', 'Low']}
+        )
+        long_term_fig.update_traces(
+            hovertemplate='<b>%{customdata[0]}</b><br>%{customdata[1]}: %{y}<extra></extra>'
         )
-        st.plotly_chart(time_series_fig, use_container_width=True)
+        long_term_fig.update_layout(height=400, yaxis=dict(rangemode='tozero'), hovermode='x unified')
+        st.plotly_chart(long_term_fig, use_container_width=True)
+        st.caption("Offense rows from every era, de-duplicated across eras; UCR and NIBRS codes share one "
+                   "severity scale via the crosswalk.")
+    elif len(time_data) > 0:
+        forecast_df = None
+        if show_forecast:
+            forecast_df = loader.get_quarterly_forecast(selected_address)
+            forecast_df = forecast_df[forecast_df['channel'] == 'total'] if len(forecast_df) > 0 else forecast_df
+        st.plotly_chart(quarterly_trend_chart(time_data, forecast_df), use_container_width=True)
     else:
         st.info("Insufficient data for time series")
 
 with col2:
     st.markdown("### Crime by Time of Day")
-    filtered_df['hour'] = filtered_df['OccurredFromDate'].dt.hour
-    hour_counts = filtered_df['hour'].value_counts().sort_index()
-    
-    all_hours = pd.Series(0, index=range(24))
-    all_hours.update(hour_counts)
-    
-    # Calculate day vs night percentages
-    day_crimes = filtered_df[(filtered_df['hour'] >= 5) & (filtered_df['hour'] < 17)].shape[0]
-    night_crimes = filtered_df[(filtered_df['hour'] >= 17) | (filtered_df['hour'] < 5)].shape[0]
-    total_with_time = day_crimes + night_crimes
-    
-    if total_with_time > 0:
-        day_percent = round((day_crimes / total_with_time) * 100, 1)
-        night_percent = round((night_crimes / total_with_time) * 100, 1)
+    # One bincount over the stored hour-of-week codes feeds this chart and the heat map below
+    hour_of_week = hour_of_week_by_severity(filtered_df)
+    week_counts = sum(hour_of_week.values())
+    spread_over_window = st.checkbox(
+        "Spread each incident over its reported time window",
+        key='spread_over_window',
+        help="Incidents with an Occurred From/To window count fractionally in every hour of the window "
+             "instead of only at the start hour."
+    )
+    if spread_over_window:
+        all_hours = interval_hour_distribution(filtered_df['OccurredFromDate'], filtered_df['OccurredToDate'])
     else:
-        day_percent = 0
-        night_percent = 0
-    
-    time_df = pd.DataFrame({
-        'hour': all_hours.index,
-        'count': all_hours.values
-    })
+        all_hours = week_counts.reshape(7, 24).sum(axis=0)
     
-    time_of_day_fig = px.bar(
-        time_df,
-        x='hour',
-        y='count',
-        color='count',
-        color_continuous_scale='Reds',
-        labels={'hour': 'Hour of Day', 'count': 'Number of Crimes'}
-    )
-    time_of_day_fig.update_traces(
-        hovertemplate='Hour: %{x}:00<br>Crimes: %{y}<extra></extra>'
-    )
-    time_of_day_fig.update_layout(
-        height=400,
-        showlegend=False,
-        xaxis=dict(
-            tickmode='linear',
-            tick0=0,
-            dtick=2,
-            tickformat='%d:00'
-        )
-    )
-    st.plotly_chart(time_of_day_fig, use_container_width=True)
+    day_percent, night_percent = day_night_split(all_hours)
+    st.plotly_chart(time_of_day_chart(all_hours, fractional=spread_over_window), use_container_width=True)
     
     # Day/Night statistics
     st.info(f"**Day (5am-5pm):** {day_percent}% | **Night (5pm-5am):** {night_percent}%")
 
-# Crime details table
+# Day of week x hour heat map
+st.markdown("### Crime by Day of Week and Hour")
+heatmap_severity = st.radio("Severity:", ['All', 'High', 'Medium', 'Low'], horizontal=True, key='heatmap_severity')
+week_grid = week_counts if heatmap_severity == 'All' else hour_of_week[heatmap_severity]
+heatmap_fig = go.Figure(go.Heatmap(
+    z=week_grid.reshape(7, 24),
+    x=list(range(24)),
+    y=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    colorscale='Reds',
+    hovertemplate='%{y} %{x}:00<br>Crimes: %{z}<extra></extra>'
+))
+heatmap_fig.update_layout(
+    height=350,
+    xaxis=dict(title='Hour of Day', tickmode='linear', tick0=0, dtick=2),
+    yaxis=dict(autorange='reversed')
+)
+st.plotly_chart(heatmap_fig, use_container_width=True)
+
+# Crime details table, one row per incident with its offenses listed together
 st.markdown("### Crime Details")
-table_df = filtered_df[['IncidentNumber', 'OccurredFromDate', 'NIBRS_Offense', 
-                        'LocationType', 'FireArmInvolved']].copy()
+details_df = filtered_df
+if count_mode != 'incidents':
+    details_df = loader.filter_by_address(selected_address, 'incidents')
+    details_df = details_df.loc[(details_df['OccurredFromDate'] >= start_dt) &
+                                (details_df['OccurredFromDate'] <= end_dt)]
+table_df = details_df[['IncidentNumber', 'OccurredFromDate', 'offenses',
+                       'LocationType', 'FireArmInvolved']].copy()
 # Sort by date BEFORE converting to string to ensure proper chronological order
 table_df = table_df.sort_values('OccurredFromDate', ascending=False)
 table_df['OccurredFromDate'] = table_df['OccurredFromDate'].dt.strftime(config.DISPLAY_DATETIME_FORMAT)
-table_df.columns = ['Incident #', 'Date/Time', 'Crime Type', 'Location Type', 'Firearm']
+table_df.columns = ['Incident #', 'Date/Time', 'Crime Type(s)', 'Location Type', 'Firearm']
 
 st.dataframe(
     table_df,
     use_container_width=True,
     height=500,
     hide_index=True
-)
\ No newline at end of file
+)
+
+# Download the rows behind this page. This download cannot stream:
+# Streamlit's download_button takes the whole file and keeps it in memory,
+# so the loader's chunks are joined here. The JSON API's /export endpoint
+# (scripts/data_processing/serve_api.py) streams the same rows.
+with st.expander("Download incidents"):
+    export_format = st.radio("Format:", available_formats(), horizontal=True, format_func=str.upper,
+                             key='export_format')
+    if st.button("Prepare download", key='prepare_export'):
+        with st.spinner("Exporting..."):
+            export_data = b''.join(loader.export_rows(selected_address, start_dt, end_dt, fmt=export_format))
+        st.download_button(
+            f"Download {export_format.upper()}",
+            data=export_data,
+            file_name=f"{location_name} {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}.{export_format}",
+            mime=EXPORT_FORMATS[export_format]
+        )
@@ -41,6 +41,9 @@ DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
 DASH_HOST = "127.0.0.1"
 DASH_PORT = 8050
 DASH_DEBUG = True
+# Ship per-day aggregates for PRIMARY_ADDRESS to the browser once and redraw
+# on date changes with clientside callbacks (no server round-trips)
+DASH_CLIENTSIDE = True
 
 # Crime severity levels (for future implementation)
 SEVERITY_LEVELS = {
@@ -0,0 +1,251 @@
+"""
+Precomputed count cubes built once at load time.
+
+The address-month cube holds incident counts per distinct address, month,
+severity and firearm flag as a sparse table sorted by address code, with
+CSR offsets so a location's entries are a contiguous slice. Aggregating a
+location over any month range is then a gather plus a bincount over a
+handful of entries instead of a filter and groupby over the raw frame, and
+citywide rankings are one bincount over the whole cube. The arrays live in
+PreparedData.arrays and are saved in the startup snapshot.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CUBE_PREFIX = 'address_month_'
+RANKING_CHANNELS = ['total', 'high', 'firearm']
+HOURS_PER_WEEK = 7 * 24
+
+
+def month_index(dates):
+    """Months since year 0 (year * 12 + month - 1) for a datetime Series."""
+    return (dates.dt.year * 12 + dates.dt.month - 1).astype('int32')
+
+
+def day_index(dates):
+    """Days since 1970-01-01 for datetime64 values."""
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def hour_of_week_codes(dates):
+    """dayofweek * 24 + hour (Monday 00:00 = 0) for a datetime Series."""
+    return (dates.dt.dayofweek * 24 + dates.dt.hour).astype('int16')
+
+
+def hour_of_week_counts(codes, severity_codes, n_severity):
+    """(severity, 168) incident counts from per-row codes, in one bincount."""
+    valid = (codes >= 0) & (severity_codes >= 0)
+    flat = severity_codes[valid].astype(np.int64) * HOURS_PER_WEEK + codes[valid]
+    counts = np.bincount(flat, minlength=n_severity * HOURS_PER_WEEK)
+    return counts.reshape(n_severity, HOURS_PER_WEEK)
+
+
+def interval_hour_distribution(starts, ends):
+    """
+    Expected incidents per hour of day (24 floats) when each incident's mass
+    is spread uniformly over its OccurredFrom-To window. Incidents without a
+    later end time count whole at their start hour.
+    """
+    start_s = np.asarray(starts, dtype='datetime64[s]').astype(np.int64)
+    ends = np.asarray(ends, dtype='datetime64[s]')
+    end_s = np.where(np.isnat(ends), start_s, ends.astype(np.int64))
+    duration = (end_s - start_s) / 3600.0
+    start_hour = (start_s % 86400) / 3600.0
+
+    point = ~(duration > 0)
+    hours = np.bincount(start_hour[point].astype(np.int64), minlength=24).astype(float)
+
+    s = start_hour[~point]
+    d = duration[~point]
+    w = 1.0 / d
+    # Whole days add the same density to every hour
+    full_days = np.floor(d / 24)
+    hours += (full_days * w).sum()
+
+    # The remainder covers [s, e) on a 48-hour axis (e < 48), folded back onto 24 bins below
+    e = s + (d - 24 * full_days)
+    first = np.floor(s).astype(np.int64)
+    last = np.floor(e).astype(np.int64)
+    bins = np.zeros(49)
+    same = first == last
+    bins += np.bincount(first[same], weights=(e - s)[same] * w[same], minlength=49)
+    split = ~same
+    first, last, s, e, w = first[split], last[split], s[split], e[split], w[split]
+    bins += np.bincount(first, weights=(first + 1 - s) * w, minlength=49)
+    bins += np.bincount(last, weights=(e - last) * w, minlength=49)
+    # Difference array: bins first + 1 .. last - 1 are fully covered
+    diff = np.bincount(first + 1, weights=w, minlength=49) - np.bincount(last, weights=w, minlength=49)
+    bins += np.cumsum(diff)
+    return hours + bins[:24] + bins[24:48]
+
+
+def quarter_count_matrix(group_codes, n_groups, quarters, first_quarter, n_quarters, weights=None):
+    """Dense (group, quarter) counts; quarters are year * 4 + quarter - 1."""
+    valid = (group_codes >= 0) & (quarters >= first_quarter) & (quarters < first_quarter + n_quarters)
+    flat = group_codes[valid].astype(np.int64) * n_quarters + (quarters[valid] - first_quarter)
+    counts = np.bincount(flat, weights=None if weights is None else weights[valid],
+                         minlength=n_groups * n_quarters)
+    return counts.reshape(n_groups, n_quarters)
+
+
+def cube_quarter_matrix(arrays, n_addresses, first_quarter, n_quarters, severity_code=None):
+    """
+    (address, quarter) counts from the address-month cube, without touching
+    the rows. Pass ``severity_code`` to count only that severity.
+    """
+    weights = arrays[CUBE_PREFIX + 'count']
+    if severity_code is not None:
+        weights = weights * (arrays[CUBE_PREFIX + 'severity'] == severity_code)
+    return quarter_count_matrix(arrays[CUBE_PREFIX + 'address'], n_addresses,
+                                arrays[CUBE_PREFIX + 'month'].astype(np.int64) // 3,
+                                first_quarter, n_quarters, weights=weights)
+
+
+def rolling_anomaly_scores(matrix, window=4):
+    """
+    Score every (group, quarter) cell against the group's previous ``window``
+    quarters, all at once. Returns (baseline mean, baseline std, rolling z,
+    Poisson z) matrices; cells without a full baseline are NaN. The Poisson
+    z uses the baseline mean as the variance, floored at 1 so a near-silent
+    location does not flag on a single incident.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n_groups, n_quarters = matrix.shape
+    zeros = np.zeros((n_groups, 1))
+    sums = np.concatenate([zeros, np.cumsum(matrix, axis=1)], axis=1)
+    squares = np.concatenate([zeros, np.cumsum(matrix ** 2, axis=1)], axis=1)
+
+    mean = np.full(matrix.shape, np.nan)
+    std = np.full(matrix.shape, np.nan)
+    if n_quarters > window:
+        window_sum = sums[:, window:-1] - sums[:, :-window - 1]
+        window_squares = squares[:, window:-1] - squares[:, :-window - 1]
+        mean[:, window:] = window_sum / window
+        variance = (window_squares - window * mean[:, window:] ** 2) / (window - 1)
+        std[:, window:] = np.sqrt(np.clip(variance, 0, None))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rolling_z = np.where(std > 0, (matrix - mean) / std, np.nan)
+    poisson_z = (matrix - mean) / np.sqrt(np.fmax(mean, 1.0))
+    return mean, std, rolling_z, poisson_z
+
+
+def month_to_period(month):
+    return pd.Period(year=int(month) // 12, month=int(month) % 12 + 1, freq='M')
+
+
+def firearm_flags(series):
+    """Boolean array: FireArmInvolved is "yes" (any case)."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    flags = series.cat.categories.astype(str).str.strip().str.lower() == 'yes'
+    # Trailing slot so missing values (code -1) are False
+    return np.append(flags, False)[series.cat.codes.to_numpy()]
+
+
+def build_address_month_cube(address_codes, n_addresses, months, severity_codes, n_severity, firearm):
+    """Sparse (address, month, severity, firearm) counts from per-row codes, in one grouped pass."""
+    valid = (address_codes >= 0) & (severity_codes >= 0)
+    address_codes = address_codes[valid].astype(np.int64)
+    months = months[valid].astype(np.int64)
+    severity_codes = severity_codes[valid].astype(np.int64)
+    firearm = firearm[valid].astype(np.int64)
+
+    month_base = int(months.min()) if len(months) else 0
+    n_months = int(months.max()) - month_base + 1 if len(months) else 1
+    keys = ((address_codes * n_months + (months - month_base)) * n_severity + severity_codes) * 2 + firearm
+    keys, counts = np.unique(keys, return_counts=True)
+
+    cube_firearm = keys % 2
+    keys = keys // 2
+    severity = keys % n_severity
+    rest = keys // n_severity
+    cube_months = rest % n_months + month_base
+    cube_addresses = rest // n_months
+    return {
+        CUBE_PREFIX + 'address': cube_addresses.astype(np.int32),
+        CUBE_PREFIX + 'month': cube_months.astype(np.int32),
+        CUBE_PREFIX + 'severity': severity.astype(np.int8),
+        CUBE_PREFIX + 'firearm': cube_firearm.astype(np.bool_),
+        CUBE_PREFIX + 'count': counts.astype(np.int32),
+        CUBE_PREFIX + 'offsets': np.searchsorted(cube_addresses, np.arange(n_addresses + 1)).astype(np.int64),
+    }
+
+
+def cube_entries(arrays, address_codes):
+    """Indices of the cube entries for the given distinct-address codes."""
+    offsets = arrays[CUBE_PREFIX + 'offsets']
+    address_codes = np.asarray(address_codes, dtype=np.int64)
+    starts = offsets[address_codes]
+    lengths = offsets[address_codes + 1] - starts
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + within
+
+
+def location_month_counts(arrays, address_codes, first_month, last_month, n_severity):
+    """Dense (month, severity) counts for one location over [first_month, last_month]."""
+    entries = cube_entries(arrays, address_codes)
+    months = arrays[CUBE_PREFIX + 'month'][entries]
+    keep = (months >= first_month) & (months <= last_month)
+    entries = entries[keep]
+    n_months = last_month - first_month + 1
+    flat = (months[keep] - first_month) * n_severity + arrays[CUBE_PREFIX + 'severity'][entries]
+    counts = np.bincount(flat, weights=arrays[CUBE_PREFIX + 'count'][entries], minlength=n_months * n_severity)
+    return counts.reshape(n_months, n_severity).astype(np.int64)
+
+
+def address_channel_counts(arrays, n_addresses, first_month, last_month, high_code):
+    """Per-address total, high-severity and firearm counts over a month range, citywide."""
+    months = arrays[CUBE_PREFIX + 'month']
+    keep = (months >= first_month) & (months <= last_month)
+    addresses = arrays[CUBE_PREFIX + 'address'][keep]
+    counts = arrays[CUBE_PREFIX + 'count'][keep]
+    weights = {
+        'total': counts,
+        'high': counts * (arrays[CUBE_PREFIX + 'severity'][keep] == high_code),
+        'firearm': counts * arrays[CUBE_PREFIX + 'firearm'][keep],
+    }
+    return {
+        channel: np.bincount(addresses, weights=weights[channel], minlength=n_addresses).astype(np.int64)
+        for channel in RANKING_CHANNELS
+    }
+
+
+def top_k(values, k):
+    """Positions of the ``k`` largest values, largest first, via a partial sort."""
+    k = min(k, len(values))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    # Only the k winners are fully sorted; ties among them are ordered by position
+    return top[np.lexsort((top, -values[top]))]
+
+
+@dataclass(frozen=True)
+class DailyCounts:
+    """Per-day prefix sums for one location, so any day range is two lookups."""
+    first_day: int
+    total: np.ndarray
+    high: np.ndarray
+
+    @classmethod
+    def from_rows(cls, days, high):
+        if len(days) == 0:
+            return cls(0, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+        first_day = int(days.min())
+        offsets = days - first_day
+        n_days = int(offsets.max()) + 1
+        total = np.bincount(offsets, minlength=n_days)
+        high = np.bincount(offsets, weights=high, minlength=n_days).astype(np.int64)
+        return cls(first_day, np.concatenate([[0], np.cumsum(total)]), np.concatenate([[0], np.cumsum(high)]))
+
+    def count(self, start_date, end_date, channel='total'):
+        """Incidents on days start_date..end_date inclusive."""
+        prefix = getattr(self, channel)
+        start = int(day_index([pd.Timestamp(start_date).to_datetime64()])[0]) - self.first_day
+        end = int(day_index([pd.Timestamp(end_date).to_datetime64()])[0]) - self.first_day + 1
+        start = min(max(start, 0), len(prefix) - 1)
+        end = min(max(end, 0), len(prefix) - 1)
+        return int(prefix[end] - prefix[start]) if end > start else 0
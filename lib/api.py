@@ -0,0 +1,382 @@
+"""
+Local JSON query API over the shared dataset, as a plain ASGI app.
+
+Every request reads one DatasetWatcher snapshot, so all routes see the
+same loaded data and a hot reload swaps it for everyone at once. Queries
+run on worker threads behind an asyncio semaphore
+(config.API_MAX_CONCURRENCY), and identical concurrent requests share one
+computation. Exports stream for as long as the client reads, so they have
+their own limit (config.API_MAX_EXPORTS) instead of holding query slots.
+
+Responses are cached per data version. The ETag is derived from the data
+version and the normalized request alone, so a matching If-None-Match is
+answered with 304 before any query runs; a reload changes every ETag and
+drops the cache.
+
+Routes (GET; dates as YYYY-MM-DD; ``count`` is 'offenses' or 'incidents'):
+
+- /health
+- /rows?address=&start=&end=&count=&offset=&limit=
+- /radius?lon=&lat=&radius_m=&start=&end=&count=&offset=&limit=
+- /summary?address=&count=
+- /quarterly?address=&start=&end=&count=
+- /comparison?address=&start=&end=&count=
+- /locations/quarterly?address=...&address=...&start=&end=
+- /top?n=&start=&end=&by=
+- /export?address=&start=&end=&fmt=  (streamed, not cached)
+
+Serve it with uvicorn (optional dependency) via serve() or
+scripts/data_processing/serve_api.py.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+import numpy as np
+import pandas as pd
+
+try:
+    import uvicorn
+except ImportError:  # The app itself runs under any ASGI server
+    uvicorn = None
+
+from . import config
+from .data_loader import day_range
+from .export import EXPORT_FORMATS
+from .reload import DatasetWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(query, name, default=None, cast=str):
+    value = query.get(name)
+    if value is None or value == '':
+        if default is None:
+            raise ApiError(400, f"missing parameter: {name}")
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise ApiError(400, f"invalid {name}: {value!r}")
+
+
+def _date_range(query):
+    start, end = query.get('start'), query.get('end')
+    if not start and not end:
+        return None, None
+    if not (start and end):
+        raise ApiError(400, "start and end must be given together")
+    try:
+        # Whole days, like the dashboard: the end date is included
+        return day_range(start, end)
+    except ValueError as e:
+        raise ApiError(400, f"invalid date: {e}")
+
+
+def _records(df):
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.PeriodDtype):
+            df[col] = df[col].astype(str)
+    return json.loads(df.to_json(orient='records', date_format='iso', date_unit='s'))
+
+
+def _json_default(value):
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value) if isinstance(value, pd.Period) else value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _page(df, query):
+    """One page of rows, most recent first."""
+    offset = _param(query, 'offset', 0, int)
+    limit = _param(query, 'limit', config.API_PAGE_SIZE, int)
+    if offset < 0 or not 1 <= limit <= config.API_MAX_PAGE_SIZE:
+        raise ApiError(400, f"offset must be >= 0 and limit between 1 and {config.API_MAX_PAGE_SIZE}")
+    df = df.sort_values('OccurredFromDate', ascending=False, kind='stable')
+    return {
+        'total': len(df),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': offset + limit if offset + limit < len(df) else None,
+        'rows': _records(df.iloc[offset:offset + limit]),
+    }
+
+
+def _in_range(df, start, end):
+    if start is None:
+        return df
+    return df[(df['OccurredFromDate'] >= start) & (df['OccurredFromDate'] <= end)]
+
+
+def _rows(loader, query):
+    start, end = _date_range(query)
+    df = loader.filter_by_address(_param(query, 'address'), _param(query, 'count', 'offenses'))
+    return _page(_in_range(df, start, end), query)
+
+
+def _radius(loader, query):
+    radius_m = _param(query, 'radius_m', 250.0, float)
+    if not 0 < radius_m <= config.API_MAX_RADIUS_M:
+        raise ApiError(400, f"radius_m must be between 0 and {config.API_MAX_RADIUS_M}")
+    start, end = _date_range(query)
+    df = loader.filter_by_radius(_param(query, 'lon', cast=float), _param(query, 'lat', cast=float), radius_m,
+                                 start, end, _param(query, 'count', 'offenses'))
+    return _page(df, query)
+
+
+def _summary(loader, query):
+    return loader.get_crime_summary(_param(query, 'address'), _param(query, 'count', 'offenses'))
+
+
+def _quarterly(loader, query):
+    start, end = _date_range(query)
+    return _records(loader.get_quarterly_time_series_data(_param(query, 'address'), start, end,
+                                                          _param(query, 'count', 'offenses')))
+
+
+def _comparison(loader, query):
+    start, end = _date_range(query)
+    if start is None:
+        raise ApiError(400, "missing parameter: start")
+    return loader.get_period_comparison(_param(query, 'address'), start, end, _param(query, 'count', 'offenses'))
+
+
+def _location_quarterly(loader, query):
+    addresses = query.get_all('address')
+    if not addresses:
+        raise ApiError(400, "missing parameter: address")
+    start, end = _date_range(query)
+    return _records(loader.get_location_quarterly_counts(addresses, start, end))
+
+
+def _top(loader, query):
+    n = _param(query, 'n', 10, int)
+    if not 1 <= n <= config.API_MAX_PAGE_SIZE:
+        raise ApiError(400, f"n must be between 1 and {config.API_MAX_PAGE_SIZE}")
+    start, end = _date_range(query)
+    return _records(loader.get_top_addresses(n, start, end, _param(query, 'by', 'total')))
+
+
+ROUTES = {
+    '/rows': _rows,
+    '/radius': _radius,
+    '/summary': _summary,
+    '/quarterly': _quarterly,
+    '/comparison': _comparison,
+    '/locations/quarterly': _location_quarterly,
+    '/top': _top,
+}
+
+
+class Query(dict):
+    """Query string as {name: last value}, keeping repeated values for get_all."""
+    def __init__(self, query_string):
+        self.pairs = parse_qsl(query_string, keep_blank_values=True)
+        super().__init__(self.pairs)
+
+    def get_all(self, name):
+        return [value for key, value in self.pairs if key == name and value]
+
+    def canonical(self):
+        # Sorted by name only: repeated values (several addresses) keep their order
+        return repr(sorted(self.pairs, key=lambda pair: pair[0]))
+
+
+class ResponseCache:
+    """LRU of encoded response bodies for one data version."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.tag = None
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def retag(self, tag):
+        if tag != self.tag:
+            self._entries.clear()
+            self.tag = tag
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class QueryAPI:
+    """ASGI app; one instance serves every connection in the process."""
+    def __init__(self, watcher=None, max_concurrency=None, cache_entries=None):
+        self.watcher = watcher if watcher else DatasetWatcher()
+        self._semaphore = asyncio.Semaphore(max_concurrency if max_concurrency else config.API_MAX_CONCURRENCY)
+        self._export_semaphore = asyncio.Semaphore(config.API_MAX_EXPORTS)
+        self._cache = ResponseCache(cache_entries if cache_entries else config.API_CACHE_ENTRIES)
+        self._pending = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.watcher.start(preload=True)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.watcher.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _snapshot(self):
+        snapshot = self.watcher.snapshot(block=False)
+        if snapshot is None:
+            # First request before the preload finished: wait for it off the event loop
+            snapshot = await asyncio.to_thread(self.watcher.snapshot)
+        return snapshot
+
+    async def _http(self, scope, send):
+        method = scope['method']
+        path = scope['path'].rstrip('/') or '/'
+        head_only = method == 'HEAD'
+        try:
+            if method not in ('GET', 'HEAD'):
+                raise ApiError(405, f"method not allowed: {method}")
+            query = Query(scope.get('query_string', b'').decode('latin-1'))
+            if path == '/export':
+                await self._export(query, send, head_only)
+                return
+            snapshot = await self._snapshot()
+            if path == '/health':
+                await _send_json(send, 200, self._dumps({
+                    'version': snapshot.version, 'loaded_at': snapshot.loaded_at, 'cached': len(self._cache),
+                }), head_only=head_only)
+                return
+            handler = ROUTES.get(path)
+            if handler is None:
+                raise ApiError(404, f"unknown route: {path}")
+
+            tag = f"{snapshot.version}.{int(snapshot.loaded_at)}"
+            key = (tag, path, query.canonical())
+            etag = '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"'
+            if etag in _if_none_match(scope):
+                await _send_json(send, 304, b'', etag=etag)
+                return
+            self._cache.retag(tag)
+            body = await self._cached(key, handler, snapshot.loader, query)
+            await _send_json(send, 200, body, etag=etag, head_only=head_only)
+        except ApiError as e:
+            await _send_json(send, e.status, self._dumps({'error': str(e)}), head_only=head_only)
+        except ValueError as e:
+            # Loaders reject bad arguments (count, by, level) with ValueError
+            await _send_json(send, 400, self._dumps({'error': str(e)}), head_only=head_only)
+        except Exception:
+            logger.exception("Error serving %s", path)
+            await _send_json(send, 500, self._dumps({'error': 'internal error'}), head_only=head_only)
+
+    @staticmethod
+    def _dumps(payload):
+        return json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+    async def _cached(self, key, handler, loader, query):
+        body = self._cache.get(key)
+        if body is not None:
+            return body
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, handler, loader, query))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # A client disconnecting must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, handler, loader, query):
+        async with self._semaphore:
+            body = await asyncio.to_thread(lambda: self._dumps(handler(loader, query)))
+        if self._cache.tag == key[0]:
+            self._cache.put(key, body)
+        return body
+
+    async def _export(self, query, send, head_only):
+        fmt = _param(query, 'fmt', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise ApiError(400, f"fmt must be one of {list(EXPORT_FORMATS)}")
+        start, end = _date_range(query)
+        address = query.get('address') or None
+        loader = (await self._snapshot()).loader
+        name = re.sub(r'[^A-Za-z0-9]+', '_', address or 'citywide').strip('_').lower()
+        headers = [
+            (b'content-type', EXPORT_FORMATS[fmt].encode('latin-1')),
+            (b'content-disposition', f'attachment; filename="{name}.{fmt}"'.encode('latin-1')),
+        ]
+        if head_only:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        async with self._export_semaphore:
+            chunks = await asyncio.to_thread(loader.export_rows, address, start, end, fmt)
+            # Errors up to the first chunk still get a normal error response from _http
+            chunk = await asyncio.to_thread(next, chunks, None)
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            try:
+                while chunk is not None:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                    chunk = await asyncio.to_thread(next, chunks, None)
+            except Exception:
+                # Headers are already sent, so the only option is to end the body early
+                logger.exception("Export failed mid-stream for %s", name)
+            finally:
+                chunks.close()
+            await send({'type': 'http.response.body', 'body': b''})
+
+
+def _if_none_match(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'if-none-match':
+            return [tag.strip() for tag in value.decode('latin-1').split(',')]
+    return []
+
+
+async def _send_json(send, status, body, etag=None, head_only=False):
+    headers = [(b'content-type', b'application/json')]
+    if etag:
+        headers += [(b'etag', etag.encode('latin-1')), (b'cache-control', b'no-cache')]
+    if status != 304:
+        headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head_only or status == 304 else body})
+
+
+def serve(host=None, port=None, max_concurrency=None):
+    """Run the API under uvicorn in one process, so every request shares one dataset."""
+    if uvicorn is None:
+        raise ImportError("Serving the API requires uvicorn (pip install uvicorn)")
+    uvicorn.run(QueryAPI(max_concurrency=max_concurrency), host=host if host else config.API_HOST,
+                port=port if port else config.API_PORT, log_level='info')
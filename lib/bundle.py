@@ -0,0 +1,132 @@
+"""
+Precomputed static bundle for a read-only, serverless dashboard.
+
+For every location the bundle holds per-quarter aggregates that a static
+front end can sum over any range of quarters to redraw the dashboard
+without a Python process:
+
+- offense_counts[q][o]: rows per offense (severity comes from the shared
+  offense_severity list, so this is the severity x offense breakdown)
+- hour_of_week[q][s][h]: rows per severity and hour of week (Monday
+  00:00 = 0), which gives the hour-of-day chart and the 7 x 24 heat map
+- total[q] / high[q]: the quarterly series and overview numbers
+
+index.json.gz lists the locations, the shared offense dictionary and the
+quarter range; each location is one gzip-compressed JSON file. Offenses
+are dictionary-encoded once for the whole bundle so location files only
+carry integers.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .aggregates import HOURS_PER_WEEK, hour_of_week_codes
+from .data_loader import SEVERITY_CATEGORIES, quarter_to_period
+
+BUNDLE_VERSION = 1
+INDEX_FILE = 'index.json.gz'
+
+
+def location_file_name(address):
+    return 'locations/' + re.sub(r'[^A-Za-z0-9]+', '_', address).strip('_').lower() + '.json.gz'
+
+
+def _quarters(dates):
+    return (dates.dt.year * 4 + dates.dt.quarter - 1).to_numpy(dtype=np.int64)
+
+
+def write_json_gz(path, payload):
+    # mtime=0 keeps rebuilt files byte-identical when the data has not changed
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+
+
+def location_aggregates(df, offense_index, first_quarter, n_quarters):
+    """Per-quarter offense, hour-of-week, total and high-severity counts for one location's rows."""
+    quarters = _quarters(df['OccurredFromDate']) - first_quarter
+    offenses = offense_index.get_indexer(df['NIBRS_Offense'].astype(str))
+    severity = pd.Categorical(df['severity'], categories=SEVERITY_CATEGORIES).codes.astype(np.int64)
+    hours = hour_of_week_codes(df['OccurredFromDate']).to_numpy().astype(np.int64)
+    n_severity = len(SEVERITY_CATEGORIES)
+    valid = (severity >= 0) & (offenses >= 0)
+
+    offense_counts = np.bincount(quarters[valid] * len(offense_index) + offenses[valid],
+                                 minlength=n_quarters * len(offense_index)).reshape(n_quarters, len(offense_index))
+    hour_counts = np.bincount((quarters[valid] * n_severity + severity[valid]) * HOURS_PER_WEEK + hours[valid],
+                              minlength=n_quarters * n_severity * HOURS_PER_WEEK)
+    high = np.bincount(quarters[severity == SEVERITY_CATEGORIES.index('High')], minlength=n_quarters)
+    return {
+        'offense_counts': offense_counts.tolist(),
+        'hour_of_week': hour_counts.reshape(n_quarters, n_severity, HOURS_PER_WEEK).tolist(),
+        'total': np.bincount(quarters, minlength=n_quarters).tolist(),
+        'high': high.tolist(),
+    }
+
+
+def build_bundle(loader, locations=None, output_dir=None):
+    """
+    Write the bundle for ``locations`` ({address: name}, default
+    config.LOCATIONS) into ``output_dir``. Returns the index payload.
+    """
+    locations = locations if locations else config.LOCATIONS
+    output_dir = str(output_dir if output_dir else config.STATIC_BUNDLE_DIR)
+    frames = {address: loader.filter_by_address(address) for address in locations}
+    frames = {address: df for address, df in frames.items() if len(df) > 0}
+
+    # One offense dictionary and quarter axis shared by every location file
+    rows = pd.concat([df[['NIBRS_Offense', 'severity', 'OccurredFromDate']] for df in frames.values()]) \
+        if frames else pd.DataFrame(columns=['NIBRS_Offense', 'severity', 'OccurredFromDate'])
+    offense_severity = rows.dropna(subset=['NIBRS_Offense']).astype({'NIBRS_Offense': str, 'severity': str}) \
+        .drop_duplicates('NIBRS_Offense').sort_values('NIBRS_Offense')
+    offense_index = pd.Index(offense_severity['NIBRS_Offense'])
+    quarters = _quarters(pd.to_datetime(rows['OccurredFromDate']))
+    first_quarter = int(quarters.min()) if len(quarters) else 0
+    n_quarters = int(quarters.max()) - first_quarter + 1 if len(quarters) else 0
+
+    # Build into a scratch directory and swap it in, so readers never see a half-written bundle
+    tmp_dir = f"{output_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, 'locations'))
+    entries = []
+    for address, df in frames.items():
+        file_name = location_file_name(address)
+        payload = {'address': address, 'name': locations[address]}
+        payload.update(location_aggregates(df, offense_index, first_quarter, n_quarters))
+        write_json_gz(os.path.join(tmp_dir, file_name), payload)
+        entries.append({
+            'address': address,
+            'name': locations[address],
+            'file': file_name,
+            'min_date': df['OccurredFromDate'].min().isoformat(),
+            'max_date': df['OccurredFromDate'].max().isoformat(),
+        })
+
+    index = {
+        'bundle_version': BUNDLE_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'data_through': max(entry['max_date'] for entry in entries) if entries else None,
+        'severities': SEVERITY_CATEGORIES,
+        'offenses': offense_index.tolist(),
+        'offense_severity': offense_severity['severity'].tolist(),
+        'quarters': [f"{p.year} Q{p.quarter}" for p in (quarter_to_period(first_quarter + q)
+                                                        for q in range(n_quarters))],
+        'first_quarter': first_quarter,
+        'hours_per_week': HOURS_PER_WEEK,
+        'locations': entries,
+    }
+    write_json_gz(os.path.join(tmp_dir, INDEX_FILE), index)
+
+    old_dir = f"{output_dir}.old-{os.getpid()}"
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return index
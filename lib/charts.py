@@ -0,0 +1,195 @@
+"""
+Figures and overview numbers for the single-location dashboard. Shared by
+app.py and the static reports (lib/report.py) so both draw the same charts.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from dateutil.relativedelta import relativedelta
+
+SEVERITY_ORDER = ['High', 'Medium', 'Low']
+SEVERITY_COLORS = {'High': '#dc3545', 'Medium': '#fd7e14', 'Low': '#ffc107'}
+
+
+def format_duration(start_dt, end_dt):
+    rd = relativedelta(end_dt, start_dt)
+    # Compact duration format
+    if rd.years > 0 and rd.months > 0:
+        return f"{rd.years}y {rd.months}m"
+    elif rd.years > 0:
+        return f"{rd.years}y"
+    elif rd.months > 0:
+        return f"{rd.months}m"
+    else:
+        days = (end_dt - start_dt).days
+        return f"{days}d"
+
+
+def overview_numbers(filtered_df, start_date, end_date):
+    """Overview metrics for rows already filtered to the start_date..end_date range."""
+    start_dt = pd.to_datetime(start_date)
+    end_dt = pd.to_datetime(end_date)
+    quarter_index = pd.period_range(start=start_dt.to_period('Q'), end=end_dt.to_period('Q'), freq='Q')
+    quarters = filtered_df['OccurredFromDate'].dt.to_period('Q')
+    high = (filtered_df['severity'] == 'High').to_numpy()
+    all_counts = quarters.value_counts().reindex(quarter_index, fill_value=0)
+    high_counts = quarters[high].value_counts().reindex(quarter_index, fill_value=0)
+    return {
+        'duration': format_duration(start_dt, end_dt),
+        'total': len(filtered_df),
+        'high': int(high.sum()),
+        'avg_high_per_quarter': float(high_counts.mean()) if len(high_counts) > 0 else 0.0,
+        'avg_per_quarter': float(all_counts.mean()) if len(all_counts) > 0 else 0.0,
+    }
+
+
+def severity_chart(filtered_df):
+    """Horizontal bars of offense counts, grouped and colored by severity."""
+    offense_counts_df = (
+        filtered_df[filtered_df['severity'] != 'Exclude']
+        .groupby(['severity', 'NIBRS_Offense'], observed=True)
+        .size()
+        .reset_index(name='count')
+    )
+    offense_counts_df['severity'] = pd.Categorical(
+        offense_counts_df['severity'], categories=SEVERITY_ORDER, ordered=True
+    )
+
+    # Build y-axis order
+    y_order = []
+    for s in SEVERITY_ORDER:
+        subset = offense_counts_df[offense_counts_df['severity'] == s]
+        subset = subset.sort_values('count', ascending=False)
+        y_order.extend(subset['NIBRS_Offense'].tolist())
+
+    fig = px.bar(
+        offense_counts_df,
+        x='count',
+        y='NIBRS_Offense',
+        color='severity',
+        orientation='h',
+        title='Crimes by Severity Group',
+        labels={'count': 'Count', 'NIBRS_Offense': 'Crime Type', 'severity': 'Severity'},
+        color_discrete_map=SEVERITY_COLORS,
+        category_orders={'severity': SEVERITY_ORDER}
+    )
+    fig.update_layout(
+        height=600,
+        showlegend=True,
+        legend=dict(title='Severity', orientation='v', x=1.02, y=1),
+        yaxis=dict(categoryorder='array', categoryarray=y_order, autorange='reversed')
+    )
+    return fig
+
+
+def quarterly_trend_chart(time_data, forecast_df=None):
+    """Quarterly counts (get_quarterly_time_series_data), optionally with forecast rows and interval."""
+    fig = go.Figure()
+    tick_data = time_data
+    if forecast_df is not None and len(forecast_df) > 0:
+        fig.add_trace(go.Scatter(
+            x=pd.concat([forecast_df['quarter_date'], forecast_df['quarter_date'][::-1]]),
+            y=pd.concat([forecast_df['upper'], forecast_df['lower'][::-1]]),
+            fill='toself',
+            fillcolor='rgba(231, 76, 60, 0.15)',
+            line=dict(width=0),
+            hoverinfo='skip',
+            name='Forecast interval'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast_df['quarter_date'],
+            y=forecast_df['forecast'],
+            mode='lines+markers',
+            name='Forecast',
+            line=dict(color='#e74c3c', width=2, dash='dash'),
+            marker=dict(size=6),
+            customdata=forecast_df[['quarter_label', 'lower', 'upper']],
+            hovertemplate='<b>%{customdata[0]}</b><br>' +
+                         'Forecast: %{y:.1f} (%{customdata[1]:.0f}-%{customdata[2]:.0f})<br>' +
+                         '<extra></extra>'
+        ))
+        tick_data = pd.concat([time_data, forecast_df]).drop_duplicates('quarter_label')
+    fig.add_trace(go.Scatter(
+        x=time_data['quarter_date'],
+        y=time_data['count'],
+        mode='lines+markers',
+        name='Crimes',
+        line=dict(color='#e74c3c', width=2),
+        marker=dict(size=8),
+        text=time_data['quarter_label'],
+        customdata=time_data[['quarter_label', 'count']],
+        hovertemplate='<b>%{customdata[0]}</b><br>' +
+                     'Crimes: %{customdata[1]}<br>' +
+                     '<extra></extra>'
+    ))
+    fig.update_layout(
+        xaxis_title="Quarter",
+        yaxis_title="Number of Crimes",
+        height=400,
+        xaxis=dict(
+            tickmode='array',
+            tickvals=tick_data['quarter_date'],
+            ticktext=tick_data['quarter_label'],
+            tickangle=-45,
+            showline=True,
+            linewidth=1,
+            linecolor='gray',
+            showgrid=True,
+            gridcolor='lightgray',
+            zeroline=True
+        ),
+        yaxis=dict(
+            showline=True,
+            linewidth=1,
+            linecolor='gray',
+            showgrid=True,
+            gridcolor='lightgray',
+            zeroline=True,
+            zerolinewidth=2,
+            zerolinecolor='gray',
+            rangemode='tozero'  # Always include zero in the y-axis range
+        ),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def day_night_split(all_hours):
+    """(day %, night %) for 24 hourly counts; day is 5am-5pm."""
+    day_crimes = all_hours[5:17].sum()
+    night_crimes = all_hours.sum() - day_crimes
+    total_with_time = day_crimes + night_crimes
+    if total_with_time > 0:
+        return round((day_crimes / total_with_time) * 100, 1), round((night_crimes / total_with_time) * 100, 1)
+    return 0, 0
+
+
+def time_of_day_chart(all_hours, fractional=False):
+    """Bars of 24 hourly counts; ``fractional`` when counts are spread over time windows."""
+    time_df = pd.DataFrame({
+        'hour': range(24),
+        'count': all_hours
+    })
+    fig = px.bar(
+        time_df,
+        x='hour',
+        y='count',
+        color='count',
+        color_continuous_scale='Reds',
+        labels={'hour': 'Hour of Day', 'count': 'Number of Crimes'}
+    )
+    fig.update_traces(
+        hovertemplate='Hour: %{x}:00<br>Crimes: %{y:,.1f}<extra></extra>' if fractional
+        else 'Hour: %{x}:00<br>Crimes: %{y}<extra></extra>'
+    )
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=2,
+            tickformat='%d:00'
+        )
+    )
+    return fig
@@ -0,0 +1,141 @@
+"""
+Dictionary-encoded columnar store for prepared crime data.
+
+A store is a directory holding one or more named tables. Every column is
+saved as its own .npy file so it can be memory-mapped on load; string
+columns are saved as integer codes plus a JSON list of categories and come
+back as pandas Categoricals. manifest.json records the layout and any
+caller metadata (source file, ingest time, ...).
+
+Each write goes into a new version subdirectory and is published by
+atomically replacing the CURRENT pointer file, so there is always a
+complete store to read. The previous version is kept until the next write
+for readers that resolved the pointer before the switch. A store written
+before versioning (manifest.json at the top level) is still read.
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = "manifest.json"
+POINTER_FILE = "CURRENT"
+VERSION_PREFIX = "v-"
+FORMAT_VERSION = 1
+
+
+def version_dir(store_dir):
+    """Directory holding the published version of ``store_dir``."""
+    store_dir = Path(store_dir)
+    try:
+        name = (store_dir / POINTER_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return store_dir
+    return store_dir / name
+
+
+def manifest_path(store_dir):
+    return version_dir(store_dir) / MANIFEST_FILE
+
+
+def store_exists(store_dir):
+    return manifest_path(store_dir).exists()
+
+
+def read_manifest(store_dir):
+    with open(manifest_path(store_dir), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def encode_column(series):
+    """Return (values, categories) for a column; categories is None for numeric data."""
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_bool_dtype(series) \
+            or (pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype)):
+        return series.to_numpy(), None
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        series = pd.Series(pd.Categorical.from_codes(codes, categories=uniques))
+    # Keep pandas' own (smallest) code width so decoding can reuse the array without a copy
+    return series.cat.codes.to_numpy(), [str(c) for c in series.cat.categories]
+
+
+def decode_column(values, categories):
+    if categories is None:
+        return values
+    # Codes were written by encode_column, so skip the O(n) validation (and its copy)
+    return pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(categories), validate=False)
+
+
+def write_store(store_dir, tables, meta=None):
+    """Write ``tables`` (name -> DataFrame) as a new version of ``store_dir`` and publish it."""
+    store_dir = Path(store_dir)
+    previous = version_dir(store_dir) if (store_dir / POINTER_FILE).exists() else None
+    # Time-ordered names, so pruning can tell older versions from newer ones
+    version = f"{VERSION_PREFIX}{time.time_ns():020d}-{os.getpid()}"
+    tmp_dir = store_dir / version
+    tmp_dir.mkdir(parents=True)
+
+    manifest = {"format_version": FORMAT_VERSION, "meta": meta or {}, "tables": {}}
+    for table_name, df in tables.items():
+        columns = []
+        for col in df.columns:
+            values, categories = encode_column(df[col])
+            file_stem = f"{table_name}.{len(columns)}"
+            np.save(tmp_dir / f"{file_stem}.npy", np.ascontiguousarray(values), allow_pickle=False)
+            if categories is not None:
+                with open(tmp_dir / f"{file_stem}.categories.json", "w", encoding="utf-8") as f:
+                    json.dump(categories, f)
+            columns.append({"name": col, "file": file_stem, "encoded": categories is not None})
+        manifest["tables"][table_name] = {"rows": len(df), "columns": columns}
+
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    # Replacing the pointer is the atomic publish step
+    pointer_tmp = store_dir / f"{POINTER_FILE}.tmp-{os.getpid()}"
+    pointer_tmp.write_text(version, encoding="utf-8")
+    os.replace(pointer_tmp, store_dir / POINTER_FILE)
+    _prune_versions(store_dir, previous)
+    return manifest
+
+
+def _prune_versions(store_dir, previous):
+    """Drop versions older than ``previous``, which stays for readers still using it."""
+    if previous is None:
+        # First versioned write: the old top-level store is the previous version
+        return
+    for entry in store_dir.iterdir():
+        if entry.is_dir() and entry.name.startswith(VERSION_PREFIX) and entry.name < previous.name:
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.is_file() and (entry.name == MANIFEST_FILE or entry.suffix in (".npy", ".json")):
+            # Files of a store written before versioning
+            entry.unlink()
+
+
+def read_store(store_dir, tables=None, mmap=True):
+    """Load tables from ``store_dir``. Returns ({name: DataFrame}, meta)."""
+    store_dir = version_dir(store_dir)
+    with open(store_dir / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported store format in {store_dir}: {manifest.get('format_version')}")
+
+    mmap_mode = "r" if mmap else None
+    result = {}
+    for table_name, layout in manifest["tables"].items():
+        if tables is not None and table_name not in tables:
+            continue
+        data = {}
+        for column in layout["columns"]:
+            values = np.load(store_dir / f"{column['file']}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            categories = None
+            if column["encoded"]:
+                with open(store_dir / f"{column['file']}.categories.json", encoding="utf-8") as f:
+                    categories = json.load(f)
+            data[column["name"]] = decode_column(values, categories)
+        result[table_name] = pd.DataFrame(data, copy=False)
+    return result, manifest["meta"]
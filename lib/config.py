@@ -22,6 +22,80 @@ HISTORICAL_FILES = {
     "2021-2025": LATEST_DATA_FILE
 }
 
+# Pattern matching new Axon exports dropped into RAW_DATA_DIR
+LATEST_EXPORT_PATTERN = "AxonCrimeData_Export_view_*.csv"
+
+# Columnar store maintained by incremental ingest (lib/ingest.py)
+STORE_DIR = PROCESSED_DATA_DIR / "store"
+USE_COLUMNAR_STORE = True
+
+# Prepared loader state, memory-mapped on startup when it matches the sources (lib/snapshot.py)
+STARTUP_SNAPSHOT_PATH = PROCESSED_DATA_DIR / "loader_snapshot.bin"
+USE_STARTUP_SNAPSHOT = True
+WRITE_STARTUP_SNAPSHOT = True
+
+# Multiple server processes on one host: keep the snapshot in shared memory so
+# every worker maps the same pages instead of holding its own copy
+USE_SHARED_MEMORY = False
+SHARED_SNAPSHOT_PATH = Path("/dev/shm") / "atl_crime_loader_snapshot.bin"
+
+# Per-location overview numbers shown while the full dataset loads (lib/summaries.py)
+LOCATION_SUMMARIES_PATH = PROCESSED_DATA_DIR / "location_summaries.json"
+
+# Seconds between checks for new exports / crosswalk edits (lib/reload.py)
+RELOAD_POLL_SECONDS = 30
+
+# Quarterly forecasts (lib/forecast.py): complete quarters each model is fit
+# on and the longest horizon served
+FORECAST_FIT_QUARTERS = 12
+FORECAST_HORIZON = 4
+
+# Default span of PreparedData.quarter_matrix; the full data span is never
+# materialized densely
+QUARTER_MATRIX_QUARTERS = 40
+
+# Hotspot (KDE) grid (lib/hotspots.py): city bounding box as
+# (min longitude, max longitude, min latitude, max latitude) and cells per axis
+HOTSPOT_BOUNDS = (-84.56, -84.28, 33.64, 33.89)
+HOTSPOT_GRID_SIZE = 256
+
+# Near-repeat analysis defaults (lib/near_repeat.py): offenses analysed,
+# distance band edges in meters and time band edges in days
+NEAR_REPEAT_OFFENSES = ["Burglary/Breaking & Entering", "Motor Vehicle Theft"]
+NEAR_REPEAT_DISTANCE_BANDS = [100, 200, 400, 800]
+NEAR_REPEAT_TIME_BANDS = [7, 14, 30, 60]
+NEAR_REPEAT_PERMUTATIONS = 99
+
+# Columns identifying one offense row across exports
+INGEST_KEY_COLUMNS = ["IncidentNumber", "NIBRS_Offense"]
+
+# Storage backend for the loader: "pandas" (in-memory frame of the latest
+# export) or "sqlite" (indexed database built from all HISTORICAL_FILES)
+DATA_BACKEND = "pandas"
+SQLITE_DB_PATH = PROCESSED_DATA_DIR / "crime_data.sqlite"
+
+# Rows dropped while combining the eras (out-of-range years, cross-era duplicates)
+HISTORY_DEDUP_REPORT_PATH = PROCESSED_DATA_DIR / "history_dedup_report.csv"
+
+# Severity-harmonized quarterly counts for every era (lib/long_term.py)
+LONG_TERM_COUNTS_PATH = PROCESSED_DATA_DIR / "long_term_counts.npz"
+
+# Static per-location HTML reports (lib/report.py)
+REPORTS_DIR = PROJECT_ROOT / "reports"
+
+# Precomputed aggregates for a static, serverless front end (lib/bundle.py)
+STATIC_BUNDLE_DIR = PROJECT_ROOT / "static_bundle"
+
+# Local JSON query API (lib/api.py)
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_MAX_CONCURRENCY = 4     # Loader queries running at once; the rest wait
+API_MAX_EXPORTS = 2         # Streaming exports running at once; separate from queries
+API_CACHE_ENTRIES = 512     # Cached responses per data version
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_MAX_RADIUS_M = 5000
+
 # Severity crosswalk file
 SEVERITY_CROSSWALK_FILE = "atl_ucr_nibrs_severity_crosswalk_full.csv"
 SEVERITY_CROSSWALK_PATH = PROCESSED_DATA_DIR / SEVERITY_CROSSWALK_FILE
@@ -1,53 +1,636 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
-from pathlib import Path
+import threading
+from dataclasses import dataclass, field
 from . import config
+from . import columnar
+from . import export
+from . import snapshot
+from . import forecast
+from . import hotspots
+from . import incidents
+from . import near_repeat
+from .aggregates import (
+    CUBE_PREFIX, RANKING_CHANNELS, DailyCounts, address_channel_counts, build_address_month_cube,
+    cube_quarter_matrix, day_index, firearm_flags, hour_of_week_codes, hour_of_week_counts,
+    location_month_counts, month_index, month_to_period, quarter_count_matrix, rolling_anomaly_scores, top_k
+)
+
+DATE_COLUMNS = ['ReportDate', 'OccurredFromDate', 'OccurredToDate']
+NUMERIC_COLUMNS = ['Longitude', 'Latitude']
+SEVERITY_CATEGORIES = ['High', 'Medium', 'Low', 'Exclude']
+# Location levels for citywide analyses; levels other than address only exist in some exports
+LOCATION_LEVELS = {'address': 'StreetAddress', 'beat': 'Beat', 'neighborhood': 'NhoodName'}
+
+
+def read_crime_export(file_path):
+    # Read everything as text so row hashes are stable across exports
+    return pd.read_csv(file_path, dtype=str, encoding='utf-8-sig')
+
+
+def prepare_crime_frame(df):
+    date_format = config.DATE_FORMAT
+    df = df.copy()
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format=date_format, errors='coerce')
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.dropna(subset=['OccurredFromDate'])
+
+
+def load_severity_dict(crosswalk_path=None):
+    crosswalk_path = str(crosswalk_path if crosswalk_path else config.SEVERITY_CROSSWALK_PATH)
+    if not os.path.exists(crosswalk_path):
+        return {}
+    severity_crosswalk = pd.read_csv(crosswalk_path)
+    return dict(zip(
+        severity_crosswalk['offense_description'],
+        severity_crosswalk['severity']
+    ))
+
+
+def map_severity(offenses, severity_dict):
+    # Map once per distinct offense rather than once per row
+    if not isinstance(offenses.dtype, pd.CategoricalDtype):
+        offenses = offenses.astype('category')
+    category_severity = offenses.cat.categories.to_series().map(severity_dict)
+    category_severity = category_severity.where(category_severity.isin(SEVERITY_CATEGORIES), 'Low')
+    severity_codes = pd.Categorical(category_severity.to_numpy(), categories=SEVERITY_CATEGORIES).codes
+    # Missing offenses have code -1, which picks up the trailing 'Low' slot
+    severity_codes = np.append(severity_codes, SEVERITY_CATEGORIES.index('Low'))
+    codes = severity_codes[offenses.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=SEVERITY_CATEGORIES), index=offenses.index)
+
+
+def value_counts_dict(series):
+    # Categorical columns report zero counts for unused categories; drop them
+    counts = series.value_counts()
+    return counts[counts > 0].to_dict()
+
+
+def quarterly_series_frame(quarter_counts, start_date=None, end_date=None):
+    """
+    Turn per-quarter counts (indexed by Period) into the frame the trend charts
+    use, with every quarter in the range present (zeros included).
+    """
+    # Generate complete quarter range
+    if start_date is not None and end_date is not None:
+        q_start = pd.Timestamp(start_date).to_period('Q')
+        q_end = pd.Timestamp(end_date).to_period('Q')
+    else:
+        # If no date range provided, use data's min/max
+        if len(quarter_counts) == 0:
+            return pd.DataFrame()
+        q_start = quarter_counts.index.min()
+        q_end = quarter_counts.index.max()
+    
+    quarter_range = pd.period_range(start=q_start, end=q_end, freq='Q')
+    # Group by quarter and reindex to include all quarters
+    quarter_counts = quarter_counts.reindex(quarter_range, fill_value=0)
+    time_series = pd.DataFrame({'quarter': quarter_range, 'count': quarter_counts.to_numpy()})
+    
+    time_series['quarter_label'] = time_series['quarter'].apply(lambda x: f"{x.year} Q{x.quarter}")
+    time_series['quarter_date'] = time_series['quarter'].dt.to_timestamp()
+    
+    return time_series
+
+
+def location_quarter_frame(locations, quarters, counts):
+    """
+    Long frame of per-location, per-quarter, per-severity counts from a
+    (location, quarter, severity) count array.
+    """
+    n_locations, n_quarters, n_severity = counts.shape
+    frame = pd.DataFrame({
+        'location': np.repeat(np.asarray(locations, dtype=object), n_quarters * n_severity),
+        'quarter': np.tile(np.repeat(quarters, n_severity), n_locations),
+        'severity': pd.Categorical.from_codes(np.tile(np.arange(n_severity), n_locations * n_quarters),
+                                              categories=SEVERITY_CATEGORIES),
+        'count': counts.reshape(-1).astype(np.int64),
+    })
+    frame['quarter_label'] = frame['quarter'].apply(lambda x: f"{x.year} Q{x.quarter}")
+    frame['quarter_date'] = frame['quarter'].dt.to_timestamp()
+    return frame
+
+
+def month_range(start_date=None, end_date=None, months=None):
+    """(first, last) month_index for a date range, or the span of ``months`` if no range."""
+    if start_date is not None and end_date is not None:
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        return start.year * 12 + start.month - 1, end.year * 12 + end.month - 1
+    if months is None or len(months) == 0:
+        return None
+    return int(months.min()), int(months.max())
+
+
+def ranking_frame(addresses, channel_counts, quarter_counts, previous_quarter_counts):
+    """Leaderboard frame for get_top_addresses, one row per ranked address."""
+    ranking = pd.DataFrame({'rank': np.arange(1, len(addresses) + 1), 'address': addresses})
+    for channel in RANKING_CHANNELS:
+        ranking[channel] = channel_counts[channel]
+    ranking['quarter_count'] = quarter_counts
+    ranking['previous_quarter_count'] = previous_quarter_counts
+    ranking['qoq_change'] = ranking['quarter_count'] - ranking['previous_quarter_count']
+    ranking['qoq_pct'] = 100 * ranking['qoq_change'] / ranking['previous_quarter_count'].where(
+        ranking['previous_quarter_count'] > 0)
+    return ranking
+
+
+def day_range(start_date, end_date):
+    """
+    (start, end) timestamps covering the days start_date..end_date, where
+    ``end`` is the last instant of end_date so ``<=`` filters keep that whole
+    day, matching the whole-day bounds of comparison_ranges.
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return start, end
+
+
+def comparison_ranges(start_date, end_date):
+    """
+    The range itself, the preceding range of equal length and the same range
+    one year earlier, as {name: (start, end)} with whole-day bounds.
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    length = end - start + pd.Timedelta(days=1)
+    return {
+        'current': (start, end),
+        'previous_period': (start - length, start - pd.Timedelta(days=1)),
+        'previous_year': (start - pd.DateOffset(years=1), end - pd.DateOffset(years=1)),
+    }
+
+
+def hour_of_week_by_severity(df):
+    """
+    {severity: 168 counts} for the rows of ``df``, Monday 00:00 first. Uses the
+    precomputed hour_of_week column when the frame has one.
+    """
+    if 'hour_of_week' in df.columns:
+        codes = df['hour_of_week'].to_numpy()
+    else:
+        codes = hour_of_week_codes(df['OccurredFromDate']).to_numpy()
+    severity = df['severity']
+    if not isinstance(severity.dtype, pd.CategoricalDtype) or list(severity.cat.categories) != SEVERITY_CATEGORIES:
+        severity = pd.Series(pd.Categorical(severity, categories=SEVERITY_CATEGORIES), index=df.index)
+    counts = hour_of_week_counts(codes, severity.cat.codes.to_numpy(), len(SEVERITY_CATEGORIES))
+    return dict(zip(SEVERITY_CATEGORIES, counts))
+
+
+def quarter_to_period(quarter):
+    return pd.Period(year=int(quarter) // 4, quarter=int(quarter) % 4 + 1, freq='Q')
+
+
+def latest_complete_quarter(last_month):
+    """The last quarter whose final month is covered by data ending in ``last_month``."""
+    return last_month // 3 if last_month % 3 == 2 else last_month // 3 - 1
+
+
+def anomaly_frame(names, matrix, first_quarter, quarter=None, threshold=3.0, min_count=5, window=4):
+    """
+    Locations whose count in ``quarter`` (default: the last column of
+    ``matrix``) is well above their rolling ``window``-quarter baseline,
+    highest Poisson z first.
+    """
+    mean, std, rolling_z, poisson_z = rolling_anomaly_scores(matrix, window)
+    column = matrix.shape[1] - 1 if quarter is None else quarter - first_quarter
+    if not 0 <= column < matrix.shape[1]:
+        return pd.DataFrame()
+    counts = matrix[:, column]
+    flagged = np.flatnonzero((poisson_z[:, column] >= threshold) & (counts >= min_count))
+    flagged = flagged[np.argsort(-poisson_z[flagged, column], kind='stable')]
+    period = quarter_to_period(first_quarter + column)
+    return pd.DataFrame({
+        'location': np.asarray(names, dtype=object)[flagged],
+        'quarter_label': f"{period.year} Q{period.quarter}",
+        'count': counts[flagged].astype(np.int64),
+        'baseline_mean': mean[flagged, column],
+        'baseline_std': std[flagged, column],
+        'rolling_z': rolling_z[flagged, column],
+        'poisson_z': poisson_z[flagged, column],
+    })
+
+
+def near_repeat_table(events, distance_bands=None, time_bands=None, n_permutations=None, workers=None):
+    """
+    Knox table for ``events`` (OccurredFromDate, Longitude, Latitude,
+    IncidentNumber). Each incident counts once, so an incident with several
+    matching offenses does not pair with itself.
+    """
+    events = events.dropna(subset=['Longitude', 'Latitude'])
+    events = events.drop_duplicates(subset=['IncidentNumber'])
+    x, y = near_repeat.project_m(events['Longitude'].to_numpy(dtype=float), events['Latitude'].to_numpy(dtype=float))
+    days = (events['OccurredFromDate'] - pd.Timestamp('1970-01-01')).dt.total_seconds().to_numpy() / 86400
+    return near_repeat.knox_test(
+        x, y, days,
+        distance_bands if distance_bands else config.NEAR_REPEAT_DISTANCE_BANDS,
+        time_bands if time_bands else config.NEAR_REPEAT_TIME_BANDS,
+        n_permutations=n_permutations if n_permutations else config.NEAR_REPEAT_PERMUTATIONS,
+        workers=workers
+    )
+
+
+def summarize_by_address(df, address_ids, n_addresses):
+    """
+    get_crime_summary results for many addresses at once. ``address_ids`` tags
+    each row of ``df`` with the position of the address it matched.
+    """
+    summaries = [{
+        'total_crimes': int(total),
+        'crime_types': {},
+        'location_types': {},
+        'date_range': {'earliest': None, 'latest': None},
+        'firearm_involved': {}
+    } for total in np.bincount(address_ids, minlength=n_addresses)]
+
+    for key, col in [('crime_types', 'NIBRS_Offense'), ('location_types', 'LocationType'),
+                     ('firearm_involved', 'FireArmInvolved')]:
+        counts = df.groupby([address_ids, df[col].to_numpy()], observed=True).size()
+        for (address_id, value), count in counts.sort_values(ascending=False, kind='stable').items():
+            summaries[address_id][key][value] = int(count)
+
+    date_ranges = pd.DataFrame({
+        'earliest': df['OccurredFromDate'].to_numpy(),
+        'latest': df['OccurredToDate'].to_numpy()
+    }).groupby(address_ids).agg({'earliest': 'min', 'latest': 'max'})
+    for address_id, row in date_ranges.iterrows():
+        summaries[address_id]['date_range'] = {'earliest': row['earliest'], 'latest': row['latest']}
+    return summaries
+
+
+def split_by_address(df, address_ids, addresses):
+    """Per-address views of ``df``, preserving row order within each address."""
+    order = np.argsort(address_ids, kind='stable')
+    bounds = np.searchsorted(address_ids[order], np.arange(len(addresses) + 1))
+    tagged = df.take(order)
+    return [tagged.iloc[bounds[i]:bounds[i + 1]] for i in range(len(addresses))]
+
+
+@dataclass(frozen=True)
+class PreparedData:
+    """Everything derived at load time. Published as one unit so readers never mix versions."""
+    df: pd.DataFrame
+    tables: dict = field(default_factory=dict)
+    arrays: dict = field(default_factory=dict)
+    # Lazily derived in-memory helpers (not snapshotted); safe to recompute
+    cache: dict = field(default_factory=dict, compare=False)
+
+    def address_index(self):
+        """Upper-cased distinct addresses plus each row's code into them (-1 = missing)."""
+        index = self.cache.get('address_index')
+        if index is None:
+            addresses = self.df['StreetAddress']
+            if not isinstance(addresses.dtype, pd.CategoricalDtype):
+                addresses = addresses.astype('category')
+            uniques = pd.Series(addresses.cat.categories.astype(str)).str.upper()
+            index = (uniques, addresses.cat.codes.to_numpy())
+            self.cache['address_index'] = index
+        return index
+
+    def matching_addresses(self, address):
+        """Codes of the distinct addresses containing ``address`` (case-insensitive)."""
+        key = ('matching_addresses', address.upper())
+        matched = self.cache.get(key)
+        if matched is None:
+            uniques, _ = self.address_index()
+            matched = np.flatnonzero(uniques.str.contains(address.upper(), regex=False).to_numpy())
+            self.cache[key] = matched
+        return matched
+
+    def address_mask(self, address):
+        uniques, codes = self.address_index()
+        # One extra slot so code -1 (missing address) lands on False
+        lookup = np.zeros(len(uniques) + 1, dtype=bool)
+        lookup[self.matching_addresses(address)] = True
+        return lookup[codes]
+
+    def address_rows(self, address, count='offenses'):
+        """Row positions for a location: every offense row, or one primary row per incident."""
+        rows = np.flatnonzero(self.address_mask(address))
+        if count == 'incidents':
+            return incidents.primary_rows(self.df, self.arrays, rows, len(SEVERITY_CATEGORIES))[1]
+        return rows
+
+    def incidents(self):
+        """Normalized incident table (one row per incident), built once per data version."""
+        table = self.cache.get('incidents')
+        if table is None:
+            table = incidents.incident_table(self.df, self.arrays)
+            self.cache['incidents'] = table
+        return table
+
+    def offenses(self):
+        """Normalized offense table keyed to incidents() by incident_id."""
+        table = self.cache.get('offenses')
+        if table is None:
+            table = incidents.offense_table(self.df, self.arrays)
+            self.cache['offenses'] = table
+        return table
+
+    def daily_counts(self, address, count='offenses'):
+        """DailyCounts for a location, built once per data version."""
+        key = ('daily_counts', address.upper(), count)
+        counts = self.cache.get(key)
+        if counts is None:
+            rows = self.address_rows(address, count)
+            days = day_index(self.df['OccurredFromDate'].to_numpy()[rows])
+            high = self.df['severity'].cat.codes.to_numpy()[rows] == SEVERITY_CATEGORIES.index('High')
+            counts = DailyCounts.from_rows(days, high)
+            self.cache[key] = counts
+        return counts
+
+    def quarter_span(self):
+        """(first quarter, number of quarters) covered by the data; quarters are year * 4 + q - 1."""
+        months = self.arrays[CUBE_PREFIX + 'month']
+        if len(months) == 0:
+            return 0, 0
+        first_quarter = int(months.min()) // 3
+        return first_quarter, int(months.max()) // 3 - first_quarter + 1
+
+    def quarter_matrix(self, level='address', channel='total', first_quarter=None, n_quarters=None):
+        """
+        (names, (location, quarter) count matrix, first quarter) for
+        ``n_quarters`` quarters from ``first_quarter``, built once per span and
+        data version. The default span is the last config.QUARTER_MATRIX_QUARTERS
+        quarters of data; it is never the full span, so a stray old date
+        cannot widen the matrix. ``channel`` is 'total' or 'high'. Level
+        'location' is the configured config.LOCATIONS.
+        """
+        if first_quarter is None:
+            data_first, data_quarters = self.quarter_span()
+            n_quarters = min(data_quarters, config.QUARTER_MATRIX_QUARTERS)
+            first_quarter = data_first + data_quarters - n_quarters
+        key = ('quarter_matrix', level, channel, first_quarter, n_quarters)
+        result = self.cache.get(key)
+        if result is None:
+            high_code = SEVERITY_CATEGORIES.index('High')
+            if level == 'location':
+                address_names, address_matrix, _ = self.quarter_matrix('address', channel, first_quarter, n_quarters)
+                names = list(config.LOCATIONS)
+                matrix = np.stack([address_matrix[self.matching_addresses(a)].sum(axis=0) for a in names]) \
+                    if names else np.zeros((0, n_quarters))
+            elif level == 'address':
+                names = self.df['StreetAddress'].cat.categories.astype(str)
+                matrix = cube_quarter_matrix(self.arrays, len(names), first_quarter, n_quarters,
+                                             severity_code=high_code if channel == 'high' else None)
+            else:
+                groups = self.df[LOCATION_LEVELS[level]].astype('category')
+                names = groups.cat.categories.astype(str)
+                quarters = month_index(self.df['OccurredFromDate']).to_numpy().astype(np.int64) // 3
+                weights = None
+                if channel == 'high':
+                    weights = (self.df['severity'].cat.codes.to_numpy() == high_code).astype(float)
+                matrix = quarter_count_matrix(groups.cat.codes.to_numpy(), len(names), quarters,
+                                              first_quarter, n_quarters, weights=weights)
+            result = (np.asarray(names), matrix, first_quarter)
+            self.cache[key] = result
+        return result
+
+    def forecast_models(self, level):
+        """Rows of the fitted forecast table for ``level``, indexed by name."""
+        key = ('forecast_models', level)
+        models = self.cache.get(key)
+        if models is None:
+            table = self.tables.get('forecasts', pd.DataFrame())
+            models = table[table['level'].astype(str) == level] if len(table) else table
+            models = models.assign(name=models['name'].astype(str), channel=models['channel'].astype(str)) \
+                if len(models) else models
+            self.cache[key] = models
+        return models
+
+    def tag_rows(self, addresses):
+        """
+        Row positions and address ids for every (row, address) match, found in
+        one pass over the rows. A row can match several addresses.
+        """
+        uniques, codes = self.address_index()
+        matched = [self.matching_addresses(a) for a in addresses]
+        pair_codes = np.concatenate(matched + [np.empty(0, dtype=np.int64)])
+        pair_ids = np.concatenate([np.full(len(m), i) for i, m in enumerate(matched)] + [np.empty(0, dtype=np.int64)])
+        order = np.argsort(pair_codes, kind='stable')
+        pair_codes, pair_ids = pair_codes[order], pair_ids[order]
+
+        # CSR layout: pairs for distinct address c sit in [starts[c], starts[c + 1])
+        starts = np.searchsorted(pair_codes, np.arange(len(uniques) + 1))
+        pairs_per_code = np.append(np.diff(starts), 0)  # trailing slot for code -1
+        first_pair = np.append(starts[:-1], 0)
+        per_row = pairs_per_code[codes]
+
+        rows = np.repeat(np.arange(len(codes)), per_row)
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+        return rows, pair_ids[first_pair[codes[rows]] + within]
+
 
 class CrimeDataLoader:
-    def __init__(self, data_path=None):
+    """
+    Loads and queries the crime frame. One instance is shared by every
+    Streamlit session, so it follows read-copy-update rules:
+
+    - loading is single-flight: concurrent first requests wait on one parse
+    - the PreparedData bundle is only ever replaced, never mutated, once
+      published
+    - readers take no lock; each query reads the bundle once and works on
+      it, so a concurrent reload cannot tear a result
+    """
+    def __init__(self, data_path=None, store_dir=None):
         self.data_path = data_path if data_path else config.RAW_DATA_DIR
+        self.store_dir = store_dir if store_dir else config.STORE_DIR
         self.latest_file = config.LATEST_DATA_FILE
-        self.df = None
+        self.crosswalk_path = config.SEVERITY_CROSSWALK_PATH
+        self.snapshot_path = config.SHARED_SNAPSHOT_PATH if config.USE_SHARED_MEMORY \
+            else config.STARTUP_SNAPSHOT_PATH
+        self.version = 0
+        self._data = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def df(self):
+        data = self._data
+        return data.df if data is not None else None
         
     def load_latest_data(self):
+        with self._load_lock:
+            return self._load_locked().df
+
+    def _uses_store(self):
+        return config.USE_COLUMNAR_STORE and columnar.store_exists(self.store_dir)
+
+    def _snapshot_meta(self):
+        # Ties a snapshot to the code that built it and the exact source files
+        if self._uses_store():
+            source = snapshot.file_fingerprint(columnar.manifest_path(self.store_dir))
+        else:
+            source = snapshot.file_fingerprint(os.path.join(self.data_path, self.latest_file))
+        return {
+            'code_version': snapshot.code_version(),
+            'source': source,
+            'crosswalk': snapshot.file_fingerprint(self.crosswalk_path),
+            # Forecasts are fit for the configured locations
+            'locations': list(config.LOCATIONS),
+        }
+
+    def _read_source_frame(self):
+        # Prefer the columnar store maintained by lib.ingest; fall back to the raw export
+        if self._uses_store():
+            tables, _ = columnar.read_store(self.store_dir, tables=['crimes'])
+            return tables['crimes']
         file_path = os.path.join(self.data_path, self.latest_file)
-        self.df = pd.read_csv(file_path, low_memory=False)
-        
-        date_format = config.DATE_FORMAT
-        self.df['ReportDate'] = pd.to_datetime(self.df['ReportDate'], format=date_format, errors='coerce')
-        self.df['OccurredFromDate'] = pd.to_datetime(self.df['OccurredFromDate'], format=date_format, errors='coerce')
-        self.df['OccurredToDate'] = pd.to_datetime(self.df['OccurredToDate'], format=date_format, errors='coerce')
-        
-        self.df = self.df.dropna(subset=['OccurredFromDate'])
-        
-        return self.df
-    
-    def filter_by_address(self, address):
-        if self.df is None:
-            self.load_latest_data()
+        return prepare_crime_frame(read_crime_export(file_path))
+
+    def _build_prepared(self, df):
+        if not isinstance(df['StreetAddress'].dtype, pd.CategoricalDtype):
+            df['StreetAddress'] = df['StreetAddress'].astype('category')
+        # Severity comes from the crosswalk at load time so a crosswalk edit only needs a reload.
+        # Mapped by (code_type, code) with the description as fallback, like lib.long_term
+        # and the SQLite backend, so every backend and view agrees
+        from .long_term import harmonized_severity, load_code_severity
+        era = next((era for era, name in config.HISTORICAL_FILES.items() if name == self.latest_file), None)
+        codes = harmonized_severity(df, era, load_code_severity(self.crosswalk_path),
+                                    load_severity_dict(self.crosswalk_path))
+        df['severity'] = pd.Series(pd.Categorical.from_codes(codes, categories=SEVERITY_CATEGORIES), index=df.index)
+        # Stored with the frame (and snapshot) so time-of-week charts are a single bincount
+        df['hour_of_week'] = hour_of_week_codes(df['OccurredFromDate'])
+        # Per-address monthly counts, so location aggregates never rescan the rows
+        arrays = build_address_month_cube(
+            df['StreetAddress'].cat.codes.to_numpy(),
+            len(df['StreetAddress'].cat.categories),
+            month_index(df['OccurredFromDate']).to_numpy(),
+            df['severity'].cat.codes.to_numpy(),
+            len(SEVERITY_CATEGORIES),
+            firearm_flags(df['FireArmInvolved'])
+        )
+        # Incident keys for counting incidents instead of offense rows
+        arrays.update(incidents.build_incident_index(
+            df['IncidentNumber'], df['severity'].cat.codes.to_numpy(), len(SEVERITY_CATEGORIES)
+        ))
+        arrays.update(hotspots.rasterize(
+            df['Longitude'].to_numpy(dtype=float, na_value=np.nan),
+            df['Latitude'].to_numpy(dtype=float, na_value=np.nan),
+            df['severity'].cat.codes.to_numpy(),
+            month_index(df['OccurredFromDate']).to_numpy(),
+            len(SEVERITY_CATEGORIES)
+        ))
+        data = PreparedData(df=df, arrays=arrays)
+        # Fit every level's forecasts now so the dashboard only ever looks them up
+        return PreparedData(df=df, tables={'forecasts': self._fit_forecasts(data)}, arrays=arrays)
+
+    @staticmethod
+    def _fit_forecasts(data):
+        months = data.arrays[CUBE_PREFIX + 'month']
+        if len(months) == 0:
+            return pd.DataFrame()
+        first_quarter, _ = data.quarter_span()
+        last_complete = latest_complete_quarter(int(months.max()))
+        # Only the fit window is ever read, so only it is counted
+        fit_start = max(first_quarter, last_complete - config.FORECAST_FIT_QUARTERS + 1)
+        n_fit = max(last_complete - fit_start + 1, 0)
+        levels = ['location'] + [level for level, col in LOCATION_LEVELS.items() if col in data.df.columns]
+        tables = []
+        for level in levels:
+            names = data.quarter_matrix(level, 'total', fit_start, n_fit)[0]
+            matrices = {channel: data.quarter_matrix(level, channel, fit_start, n_fit)[1] for channel in ['total', 'high']}
+            tables.append(forecast.forecast_table(level, names, matrices, fit_start, last_complete))
+        return pd.concat(tables, ignore_index=True)
+
+    def _restore_snapshot(self, meta):
+        restored = snapshot.read_snapshot(self.snapshot_path, expected_meta=meta)
+        if restored is None:
+            return None
+        tables, arrays, _ = restored
+        return PreparedData(df=tables.pop('crimes'), tables=tables, arrays=arrays)
+
+    def _load_locked(self):
+        if not config.USE_STARTUP_SNAPSHOT:
+            data = self._build_prepared(self._read_source_frame())
+        else:
+            meta = self._snapshot_meta()
+            data = self._restore_snapshot(meta)
+            if data is None:
+                with snapshot.build_lock(self.snapshot_path):
+                    # Another worker may have published the snapshot while we waited
+                    data = self._restore_snapshot(meta)
+                    if data is None:
+                        data = self._build_prepared(self._read_source_frame())
+                        if config.WRITE_STARTUP_SNAPSHOT:
+                            self.write_snapshot(data, meta)
+
+        # Publish only the fully prepared bundle
+        self._data = data
+        self.version += 1
         
-        filtered_df = self.df[self.df['StreetAddress'].str.upper().str.contains(address.upper(), na=False)]
-        return filtered_df
+        return data
+
+    def write_snapshot(self, data=None, meta=None):
+        data = data if data is not None else self._ensure_prepared()
+        meta = meta if meta is not None else self._snapshot_meta()
+        snapshot.write_snapshot(self.snapshot_path, {'crimes': data.df, **data.tables}, data.arrays, meta)
+
+    def _ensure_prepared(self):
+        data = self._data
+        if data is not None:
+            return data
+        with self._load_lock:
+            # Another thread may have finished loading while we waited
+            if self._data is None:
+                self._load_locked()
+            return self._data
+
+    def _ensure_loaded(self):
+        return self._ensure_prepared().df
+
+    def filter_by_address(self, address, count='offenses'):
+        """
+        Rows for a location. With count='incidents' there is one row per
+        incident: its most severe offense's row, plus offense_count and the
+        list of its offenses.
+        """
+        incidents.check_count_mode(count)
+        data = self._ensure_prepared()
+        if count == 'incidents':
+            return incidents.incident_frame(data.df, data.arrays, np.flatnonzero(data.address_mask(address)),
+                                            len(SEVERITY_CATEGORIES))
+        return data.df[data.address_mask(address)]
     
-    def get_crime_summary(self, address):
-        filtered_df = self.filter_by_address(address)
-        
+    def filter_by_radius(self, longitude, latitude, radius_m, start_date=None, end_date=None, count='offenses'):
+        """Rows within ``radius_m`` meters of a point, optionally over a date range (``count`` as above)."""
+        incidents.check_count_mode(count)
+        data = self._ensure_prepared()
+        df = data.df
+        distance = near_repeat.distance_m(df['Longitude'].to_numpy(dtype=float, na_value=np.nan),
+                                          df['Latitude'].to_numpy(dtype=float, na_value=np.nan),
+                                          longitude, latitude)
+        mask = distance <= radius_m
+        if start_date is not None and end_date is not None:
+            mask = mask & ((df['OccurredFromDate'] >= pd.to_datetime(start_date)) &
+                           (df['OccurredFromDate'] <= pd.to_datetime(end_date))).to_numpy()
+        if count == 'incidents':
+            return incidents.incident_frame(df, data.arrays, np.flatnonzero(mask), len(SEVERITY_CATEGORIES))
+        return df[mask]
+
+    def get_crime_summary(self, address, count='offenses'):
+        return self._summarize(self.filter_by_address(address, count))
+
+    @staticmethod
+    def _summarize(filtered_df):
         summary = {
             'total_crimes': len(filtered_df),
-            'crime_types': filtered_df['NIBRS_Offense'].value_counts().to_dict(),
-            'location_types': filtered_df['LocationType'].value_counts().to_dict(),
+            'crime_types': value_counts_dict(filtered_df['NIBRS_Offense']),
+            'location_types': value_counts_dict(filtered_df['LocationType']),
             'date_range': {
                 'earliest': filtered_df['OccurredFromDate'].min() if len(filtered_df) > 0 else None,
                 'latest': filtered_df['OccurredToDate'].max() if len(filtered_df) > 0 else None
             },
-            'firearm_involved': filtered_df['FireArmInvolved'].value_counts().to_dict()
+            'firearm_involved': value_counts_dict(filtered_df['FireArmInvolved'])
         }
         
         return summary
     
-    def get_time_series_data(self, address, freq='M'):
-        filtered_df = self.filter_by_address(address).copy()
+    def get_time_series_data(self, address, freq='M', count='offenses'):
+        filtered_df = self.filter_by_address(address, count).copy()
         
         if len(filtered_df) == 0:
             return pd.DataFrame()
@@ -58,8 +641,8 @@ class CrimeDataLoader:
         
         return time_series
     
-    def get_quarterly_time_series_data(self, address, start_date=None, end_date=None):
-        filtered_df = self.filter_by_address(address).copy()
+    def get_quarterly_time_series_data(self, address, start_date=None, end_date=None, count='offenses'):
+        filtered_df = self.filter_by_address(address, count)
         
         if len(filtered_df) == 0:
             return pd.DataFrame()
@@ -72,43 +655,191 @@ class CrimeDataLoader:
                    (filtered_df['OccurredFromDate'] <= end_date)
             filtered_df = filtered_df.loc[mask]
         
-        # Generate complete quarter range
-        if start_date is not None and end_date is not None:
-            q_start = start_date.to_period('Q')
-            q_end = end_date.to_period('Q')
+        quarter_counts = filtered_df.groupby(filtered_df['OccurredFromDate'].dt.to_period('Q')).size()
+        return quarterly_series_frame(quarter_counts, start_date, end_date)
+    
+    def get_period_comparison(self, address, start_date, end_date, count='offenses'):
+        """
+        Total and high-severity counts for a day range, the preceding range of
+        equal length and the same range a year earlier. Each is an O(1) lookup
+        in the location's per-day prefix sums.
+        """
+        incidents.check_count_mode(count)
+        counts = self._ensure_prepared().daily_counts(address, count)
+        return {
+            name: {channel: counts.count(start, end, channel) for channel in ['total', 'high']}
+            for name, (start, end) in comparison_ranges(start_date, end_date).items()
+        }
+
+    def location_levels(self):
+        """Location levels available in the loaded data (see LOCATION_LEVELS)."""
+        df = self._ensure_prepared().df
+        return [level for level, col in LOCATION_LEVELS.items() if col in df.columns]
+
+    def get_anomalies(self, level='address', quarter=None, threshold=3.0, min_count=5, window=4):
+        """
+        Locations at ``level`` whose count in ``quarter`` (a Period; default the
+        latest complete quarter) jumps above their own rolling baseline. Every
+        location is scored in one vectorized pass over the quarter count matrix.
+        """
+        if level not in self.location_levels():
+            raise ValueError(f"level must be one of {self.location_levels()}, not {level!r}")
+        data = self._ensure_prepared()
+        months = data.arrays[CUBE_PREFIX + 'month']
+        if len(months) == 0:
+            return pd.DataFrame()
+        if quarter is None:
+            quarter = latest_complete_quarter(int(months.max()))
         else:
-            # If no date range provided, use data's min/max
-            if len(filtered_df) == 0:
-                return pd.DataFrame()
-            q_start = filtered_df['OccurredFromDate'].min().to_period('Q')
-            q_end = filtered_df['OccurredFromDate'].max().to_period('Q')
-        
-        quarter_range = pd.period_range(start=q_start, end=q_end, freq='Q')
-        
-        if len(filtered_df) == 0:
-            # Return empty series with all quarters set to 0
-            time_series = pd.DataFrame({
-                'quarter': quarter_range,
-                'count': 0
-            })
+            quarter = pd.Period(quarter, freq='Q')
+            quarter = quarter.year * 4 + quarter.quarter - 1
+        data_first, data_quarters = data.quarter_span()
+        if not data_first <= quarter < data_first + data_quarters:
+            return pd.DataFrame()
+        # Just the scored quarter and its baseline window
+        first_quarter = max(quarter - window, data_first)
+        names, matrix, first_quarter = data.quarter_matrix(level, 'total', first_quarter, quarter - first_quarter + 1)
+        return anomaly_frame(names, matrix, first_quarter, quarter, threshold, min_count, window)
+
+    def get_forecasts(self, level='location', horizon=None):
+        """
+        Next ``horizon`` quarters (default config.FORECAST_HORIZON) of total
+        and high-severity counts with ~95% intervals, for every location at
+        ``level``. Models are fit when the data is loaded, so this only
+        evaluates them.
+        """
+        horizon = horizon if horizon else config.FORECAST_HORIZON
+        return forecast.predict(self._ensure_prepared().forecast_models(level), horizon)
+
+    def get_quarterly_forecast(self, address, horizon=None):
+        """Forecast frame for one configured location (see get_forecasts)."""
+        horizon = horizon if horizon else config.FORECAST_HORIZON
+        models = self._ensure_prepared().forecast_models('location')
+        if len(models) == 0:
+            return pd.DataFrame()
+        return forecast.predict(models[models['name'] == address], horizon)
+
+    def get_hotspot_surface(self, severities=None, start_date=None, end_date=None, bandwidth_m=250):
+        """
+        Citywide KDE surface for the given severities (default all but
+        'Exclude') over a date range widened to whole months. Returns
+        {'lon': column centers, 'lat': row centers, 'density': incidents per
+        square km, rows by latitude}.
+        """
+        data = self._ensure_prepared()
+        severities = severities if severities else [s for s in SEVERITY_CATEGORIES if s != 'Exclude']
+        months = month_range(start_date, end_date, data.arrays[CUBE_PREFIX + 'month'])
+        lon, lat = hotspots.cell_centers()
+        if months is None:
+            return {'lon': lon, 'lat': lat, 'density': np.zeros((len(lat), len(lon)))}
+        codes = [SEVERITY_CATEGORIES.index(s) for s in severities]
+        density = hotspots.kde_surface(data.arrays, codes, *months, bandwidth_m)
+        return {'lon': lon, 'lat': lat, 'density': density}
+
+    def export_rows(self, address=None, start_date=None, end_date=None, fmt='csv', chunk_rows=None):
+        """
+        Stream a location's rows (citywide if ``address`` is None) over a
+        date range as CSV or Parquet byte chunks, in occurred-date order.
+        """
+        data = self._ensure_prepared()
+        df = data.df
+        mask = data.address_mask(address) if address else np.ones(len(df), dtype=bool)
+        if start_date is not None and end_date is not None:
+            mask = mask & ((df['OccurredFromDate'] >= pd.to_datetime(start_date)) &
+                           (df['OccurredFromDate'] <= pd.to_datetime(end_date))).to_numpy()
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(df['OccurredFromDate'].to_numpy()[rows], kind='stable')]
+        return export.iter_export(export.frame_chunks(df, rows, chunk_rows or export.EXPORT_CHUNK_ROWS), fmt)
+
+    def get_near_repeat(self, offenses=None, start_date=None, end_date=None, distance_bands=None,
+                        time_bands=None, n_permutations=None, workers=None):
+        """
+        Citywide Knox test for ``offenses`` (default config.NEAR_REPEAT_OFFENSES)
+        over a date range: observed vs permutation-expected incident pairs per
+        distance x time-gap band.
+        """
+        df = self._ensure_prepared().df
+        offenses = offenses if offenses else config.NEAR_REPEAT_OFFENSES
+        mask = df['NIBRS_Offense'].isin(offenses).to_numpy()
+        if start_date is not None and end_date is not None:
+            mask = mask & ((df['OccurredFromDate'] >= pd.to_datetime(start_date)) &
+                           (df['OccurredFromDate'] <= pd.to_datetime(end_date))).to_numpy()
+        events = df.loc[mask, ['IncidentNumber', 'OccurredFromDate', 'Longitude', 'Latitude']]
+        return near_repeat_table(events, distance_bands, time_bands, n_permutations, workers)
+
+    def get_location_quarterly_counts(self, addresses, start_date=None, end_date=None):
+        """
+        Quarterly counts by severity for several locations, read from the
+        address-month cube. The date range is widened to whole quarters.
+        """
+        data = self._ensure_prepared()
+        addresses = list(addresses)
+        months = data.arrays[CUBE_PREFIX + 'month']
+        if start_date is not None and end_date is not None:
+            q_start = pd.Timestamp(start_date).to_period('Q')
+            q_end = pd.Timestamp(end_date).to_period('Q')
+        elif len(months) > 0:
+            q_start = month_to_period(months.min()).asfreq('Q')
+            q_end = month_to_period(months.max()).asfreq('Q')
         else:
-            filtered_df['quarter'] = filtered_df['OccurredFromDate'].dt.to_period('Q')
-            # Group by quarter and reindex to include all quarters
-            quarter_counts = filtered_df.groupby('quarter').size()
-            quarter_counts = quarter_counts.reindex(quarter_range, fill_value=0)
-            time_series = quarter_counts.reset_index(name='count')
-            time_series.columns = ['quarter', 'count']
-        
-        time_series['quarter_label'] = time_series['quarter'].apply(lambda x: f"{x.year} Q{x.quarter}")
-        time_series['quarter_date'] = time_series['quarter'].dt.to_timestamp()
-        
-        return time_series
-    
+            return pd.DataFrame()
+
+        quarters = pd.period_range(start=q_start, end=q_end, freq='Q')
+        first_month = q_start.year * 12 + (q_start.quarter - 1) * 3
+        last_month = first_month + 3 * len(quarters) - 1
+        n_severity = len(SEVERITY_CATEGORIES)
+        counts = np.zeros((len(addresses), len(quarters), n_severity), dtype=np.int64)
+        for i, address in enumerate(addresses):
+            monthly = location_month_counts(data.arrays, data.matching_addresses(address),
+                                            first_month, last_month, n_severity)
+            counts[i] = monthly.reshape(len(quarters), 3, n_severity).sum(axis=1)
+        return location_quarter_frame(addresses, quarters, counts)
+
+    def get_top_addresses(self, n=10, start_date=None, end_date=None, by='total'):
+        """
+        Citywide top ``n`` addresses by ``by`` ('total', 'high' or 'firearm')
+        over a date range widened to whole months. quarter_count and
+        previous_quarter_count are the ``by`` counts for the range's last
+        quarter and the one before it.
+        """
+        if by not in RANKING_CHANNELS:
+            raise ValueError(f"by must be one of {RANKING_CHANNELS}, not {by!r}")
+        data = self._ensure_prepared()
+        months = month_range(start_date, end_date, data.arrays[CUBE_PREFIX + 'month'])
+        if months is None:
+            return pd.DataFrame()
+        n_addresses = len(data.df['StreetAddress'].cat.categories)
+        high_code = SEVERITY_CATEGORIES.index('High')
+        channel_counts = address_channel_counts(data.arrays, n_addresses, *months, high_code)
+        top = top_k(channel_counts[by], n)
+        top = top[channel_counts[by][top] > 0]
+
+        last_quarter_start = months[1] - months[1] % 3
+        quarter = address_channel_counts(data.arrays, n_addresses, last_quarter_start,
+                                         last_quarter_start + 2, high_code)[by]
+        previous = address_channel_counts(data.arrays, n_addresses, last_quarter_start - 3,
+                                          last_quarter_start - 1, high_code)[by]
+        addresses = np.asarray(data.df['StreetAddress'].cat.categories.astype(str))[top]
+        return ranking_frame(addresses, {c: v[top] for c, v in channel_counts.items()},
+                             quarter[top], previous[top])
+
     def get_multiple_addresses_data(self, addresses):
-        results = {}
-        for address in addresses:
-            results[address] = {
-                'data': self.filter_by_address(address),
-                'summary': self.get_crime_summary(address)
-            }
-        return results
\ No newline at end of file
+        # One tagging pass and one grouped aggregation for all addresses
+        data = self._ensure_prepared()
+        addresses = list(addresses)
+        rows, address_ids = data.tag_rows(addresses)
+        tagged = data.df.take(rows)
+        summaries = summarize_by_address(tagged, address_ids, len(addresses))
+        frames = split_by_address(tagged, address_ids, addresses)
+        return {
+            address: {'data': frames[i], 'summary': summaries[i]}
+            for i, address in enumerate(addresses)
+        }
+
+
+def create_loader():
+    """Return a loader for the configured DATA_BACKEND ("pandas" or "sqlite")."""
+    if config.DATA_BACKEND == 'sqlite':
+        from .sql_backend import SQLiteCrimeDataLoader
+        return SQLiteCrimeDataLoader()
+    return CrimeDataLoader()
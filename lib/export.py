@@ -0,0 +1,109 @@
+"""
+Streaming export of filtered crime rows as CSV or Parquet.
+
+Exports are generators of encoded byte chunks. Each chunk gathers and
+formats at most ``chunk_rows`` rows, so even a citywide multi-decade
+export never holds a formatted copy of the whole frame. The pandas loader
+feeds row positions into its prepared (memory-mapped) frame, and the
+SQLite loader feeds query result chunks. Parquet needs pyarrow, which is
+optional.
+"""
+import io
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export unavailable; CSV still works
+    pa = None
+    pq = None
+
+from . import config
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+EXPORT_CHUNK_ROWS = 50_000
+# Columns derived at load time that are not part of the source data; the
+# store's bookkeeping columns (lib.ingest hashes) start with an underscore
+DERIVED_COLUMNS = ['hour_of_week']
+
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pq is not None]
+
+
+def export_columns(columns):
+    return [col for col in columns if col not in DERIVED_COLUMNS and not col.startswith('_')]
+
+
+def frame_chunks(df, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Frames of ``df`` at row positions ``rows``, ``chunk_rows`` at a time."""
+    columns = export_columns(df.columns)
+    if len(rows) == 0:
+        # An empty export still carries the CSV header / Parquet schema
+        yield df[columns].iloc[:0]
+        return
+    for start in range(0, len(rows), chunk_rows):
+        yield df[columns].take(rows[start:start + chunk_rows])
+
+
+def iter_csv(chunks):
+    """
+    CSV bytes for an iterable of frames (header once, dates as in the source
+    exports). Chunk sources yield one empty frame for an empty export.
+    """
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header, date_format=config.DATE_FORMAT).encode('utf-8')
+        header = False
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_parquet(chunks):
+    """Parquet bytes for an iterable of frames, one row group per non-empty frame."""
+    if pq is None:
+        raise ImportError("Parquet export requires pyarrow")
+    sink = _ChunkSink()
+    writer = None
+    for chunk in chunks:
+        # Categories become plain strings so every row group has the same schema
+        table = pa.Table.from_pandas(chunk.astype({
+            col: object for col in chunk.columns if isinstance(chunk[col].dtype, pd.CategoricalDtype)
+        }), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        if table.num_rows:
+            writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def iter_export(chunks, fmt='csv'):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt must be one of {list(EXPORT_FORMATS)}, not {fmt!r}")
+    return iter_parquet(chunks) if fmt == 'parquet' else iter_csv(chunks)
@@ -0,0 +1,110 @@
+"""
+Seasonal trend forecasts of quarterly counts, fit for many series at once.
+
+Each series is modelled as intercept + linear trend + quarter-of-year
+effects, fit by least squares over its last FORECAST_FIT_QUARTERS complete
+quarters. Every series in a batch shares the same design matrix, so a
+whole level (thousands of addresses) is fit with one pseudo-inverse and
+one matrix product. Fitted coefficients are kept in a small table so
+serving a forecast is a row lookup and a few multiplications.
+"""
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# Quarter-of-year effects need at least two years of history
+MIN_SEASONAL_QUARTERS = 8
+MIN_FIT_QUARTERS = 3
+INTERVAL_Z = 1.96  # ~95% prediction interval
+N_COEFFICIENTS = 5
+COEFFICIENT_COLUMNS = [f'coef_{i}' for i in range(N_COEFFICIENTS)]
+
+
+def design_matrix(quarters, fit_start, seasonal):
+    """Columns: intercept, trend, and (if ``seasonal``) Q2-Q4 indicators."""
+    quarters = np.asarray(quarters, dtype=np.int64)
+    X = np.zeros((len(quarters), N_COEFFICIENTS))
+    X[:, 0] = 1.0
+    X[:, 1] = quarters - fit_start
+    if seasonal:
+        for q in range(1, 4):
+            X[:, 1 + q] = (quarters % 4) == q
+    return X
+
+
+def fit_quarterly_models(matrix, fit_start):
+    """
+    Fit every row of a (series, quarter) count matrix whose first column is
+    quarter ``fit_start``. Returns (coefficients (n, 5), residual sigma (n,)).
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n_quarters = matrix.shape[1]
+    seasonal = n_quarters >= MIN_SEASONAL_QUARTERS
+    X = design_matrix(fit_start + np.arange(n_quarters), fit_start, seasonal)
+    coefficients = matrix @ np.linalg.pinv(X).T
+    residuals = matrix - coefficients @ X.T
+    dof = max(n_quarters - (N_COEFFICIENTS if seasonal else 2), 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+    return coefficients, sigma
+
+
+def forecast_table(level, names, matrices, first_quarter, last_complete_quarter):
+    """
+    Fitted models for every series of a level, one row per (name, channel).
+    ``matrices`` maps channel -> (series, quarter) counts starting at
+    ``first_quarter``.
+    """
+    fit_start = max(first_quarter, last_complete_quarter - config.FORECAST_FIT_QUARTERS + 1)
+    n_fit = last_complete_quarter - fit_start + 1
+    if n_fit < MIN_FIT_QUARTERS or len(names) == 0:
+        return pd.DataFrame()
+    frames = []
+    for channel, matrix in matrices.items():
+        window = matrix[:, fit_start - first_quarter:last_complete_quarter - first_quarter + 1]
+        coefficients, sigma = fit_quarterly_models(window, fit_start)
+        frame = pd.DataFrame(coefficients, columns=COEFFICIENT_COLUMNS)
+        frame.insert(0, 'level', level)
+        frame.insert(1, 'name', np.asarray(names, dtype=object))
+        frame.insert(2, 'channel', channel)
+        frame['sigma'] = sigma
+        frame['fit_start'] = fit_start
+        frame['fit_quarters'] = n_fit
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def predict(models, horizon):
+    """
+    Forecast frame (name, channel, quarter, forecast, lower, upper) for the
+    ``horizon`` quarters after each model's fit window. ``models`` are rows
+    of a forecast_table sharing one fit window.
+    """
+    if len(models) == 0:
+        return pd.DataFrame()
+    fit_start = int(models['fit_start'].iloc[0])
+    n_fit = int(models['fit_quarters'].iloc[0])
+    seasonal = n_fit >= MIN_SEASONAL_QUARTERS
+    X = design_matrix(fit_start + np.arange(n_fit), fit_start, seasonal)
+    future = fit_start + n_fit + np.arange(horizon)
+    X_future = design_matrix(future, fit_start, seasonal)
+
+    coefficients = models[COEFFICIENT_COLUMNS].to_numpy()
+    mean = coefficients @ X_future.T
+    # Parameter uncertainty grows with distance from the fit window
+    leverage = np.einsum('ij,jk,ik->i', X_future, np.linalg.pinv(X.T @ X), X_future)
+    half_width = INTERVAL_Z * models['sigma'].to_numpy()[:, None] * np.sqrt(1 + leverage)[None, :]
+
+    n_models = len(models)
+    quarters = [pd.Period(year=int(q) // 4, quarter=int(q) % 4 + 1, freq='Q') for q in future]
+    frame = pd.DataFrame({
+        'name': np.repeat(models['name'].to_numpy(dtype=object), horizon),
+        'channel': np.repeat(models['channel'].to_numpy(dtype=object), horizon),
+        'quarter': np.tile(pd.PeriodIndex(quarters), n_models),
+        'forecast': np.clip(mean, 0, None).reshape(-1),
+        'lower': np.clip(mean - half_width, 0, None).reshape(-1),
+        'upper': np.clip(mean + half_width, 0, None).reshape(-1),
+    })
+    frame['quarter_label'] = frame['quarter'].apply(lambda x: f"{x.year} Q{x.quarter}")
+    frame['quarter_date'] = frame['quarter'].dt.to_timestamp()
+    return frame
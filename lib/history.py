@@ -0,0 +1,211 @@
+"""
+Readers that normalize every era in config.HISTORICAL_FILES to the Axon
+column layout used by the dashboard:
+
+    IncidentNumber, ReportDate, OccurredFromDate, OccurredToDate,
+    NibrsUcrCode, NIBRS_Offense, StreetAddress, LocationType,
+    FireArmInvolved, Longitude, Latitude, era
+
+Columns an era does not have (e.g. LocationType before 2021) are left
+empty. See data/raw/raw-data-readme.md for the source layouts.
+
+The eras overlap at their edges (the 2009-2020 file and the Axon export
+around 2020/2021) and carry stray rows from other years (the 1997-2008
+split has a 2014 record), so iter_history drops rows dated outside their
+era's years and rows whose report number, occurred day and address
+already appeared in a newer era.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .data_loader import read_crime_export, prepare_crime_frame
+
+COMMON_COLUMNS = [
+    'IncidentNumber', 'ReportDate', 'OccurredFromDate', 'OccurredToDate',
+    'NibrsUcrCode', 'NIBRS_Offense', 'StreetAddress', 'LocationType',
+    'FireArmInvolved', 'Longitude', 'Latitude',
+]
+
+# Source column -> common column, per era
+ERA_COLUMNS = {
+    "1997-2002": {
+        'Incident_#': 'IncidentNumber',
+        'Report_date1': 'ReportDate',
+        'UCR_#': 'NibrsUcrCode',
+        'Offense_Description': 'NIBRS_Offense',
+        'Address': 'StreetAddress',
+        'Longitude': 'Longitude',
+        'Latitude': 'Latitude',
+    },
+    "2009-2020": {
+        'Report Number': 'IncidentNumber',
+        'Report Date': 'ReportDate',
+        'NIBRS Code': 'NibrsUcrCode',
+        'Crime Type': 'NIBRS_Offense',
+        'Location': 'StreetAddress',
+        'Longitude': 'Longitude',
+        'Latitude': 'Latitude',
+    },
+}
+ERA_COLUMNS["2003-2008"] = ERA_COLUMNS["1997-2002"]
+
+# Source columns holding the occurred date and time, per era
+ERA_OCCURRED = {
+    "1997-2002": ('Date_From1', 'Time_From'),
+    "2003-2008": ('Date_From1', 'Time_From'),
+    "2009-2020": ('Occur Date', 'Occur Time'),
+}
+
+# Columns of the dropped-rows report written by write_dedup_report
+DEDUP_REPORT_COLUMNS = ['era', 'reason', 'kept_era', 'IncidentNumber', 'ReportDate', 'OccurredFromDate',
+                        'StreetAddress', 'NIBRS_Offense']
+
+# Code system used by each era's NibrsUcrCode (matches crosswalk code_type)
+ERA_CODE_TYPES = {
+    "1997-2002": "UCR",
+    "2003-2008": "UCR",
+    "2009-2020": "NIBRS",
+    "2021-2025": "NIBRS",
+}
+
+
+def _parse_time_of_day(times):
+    # Times come as "1530", "15:30" or "3:30:00 PM"; anything unparseable is midnight
+    times = times.astype('string').str.strip()
+    hhmm = times.str.fullmatch(r'\d{1,4}').fillna(False)
+    digits = times.where(hhmm).str.zfill(4)
+    offset = pd.to_timedelta(digits.str[:2].astype('Float64') * 60 + digits.str[2:].astype('Float64'),
+                             unit='m', errors='coerce')
+    parsed = pd.to_datetime(times.where(~hhmm), format='mixed', errors='coerce')
+    offset = offset.fillna(parsed - parsed.dt.normalize())
+    return offset.fillna(pd.Timedelta(0))
+
+
+def normalize_era(raw, era):
+    """Map one era's raw frame (all text) onto COMMON_COLUMNS."""
+    if era not in ERA_COLUMNS:
+        df = prepare_crime_frame(raw)
+        return df.reindex(columns=COMMON_COLUMNS).assign(era=era)
+
+    df = raw.rename(columns=ERA_COLUMNS[era]).reindex(columns=COMMON_COLUMNS)
+    df['ReportDate'] = pd.to_datetime(df['ReportDate'], format='mixed', errors='coerce')
+    date_col, time_col = ERA_OCCURRED[era]
+    if date_col in raw.columns:
+        occurred = pd.to_datetime(raw[date_col], format='mixed', errors='coerce').dt.normalize()
+        if time_col in raw.columns:
+            occurred = occurred + _parse_time_of_day(raw[time_col])
+        df['OccurredFromDate'] = occurred.fillna(df['ReportDate'])
+    else:
+        df['OccurredFromDate'] = df['ReportDate']
+    df['OccurredToDate'] = pd.NaT
+    for col in ['Longitude', 'Latitude']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['era'] = era
+    return df.dropna(subset=['OccurredFromDate'])
+
+
+def era_years(era):
+    """(first year, last year) from an era name like "1997-2002", or None."""
+    match = re.fullmatch(r'(\d{4})-(\d{4})', era)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def dedup_keys(df):
+    """
+    uint64 hash per row of the normalized report number, occurred day and
+    address; 0 where the report number is missing (never deduplicated).
+    """
+    number = df['IncidentNumber'].astype('string').str.upper() \
+        .str.replace(r'[^0-9A-Z]', '', regex=True).str.lstrip('0')
+    address = df['StreetAddress'].astype('string').str.upper() \
+        .str.replace(r'\s+', ' ', regex=True).str.strip()
+    keys = pd.util.hash_pandas_object(pd.DataFrame({
+        'number': number,
+        'day': df['OccurredFromDate'].dt.normalize(),
+        'address': address,
+    }), index=False).to_numpy()
+    return np.where(number.fillna('').to_numpy(dtype=object) != '', keys, np.uint64(0))
+
+
+def _era_frames(file_path, era, chunksize):
+    if chunksize is None:
+        yield normalize_era(read_crime_export(file_path), era)
+        return
+    for chunk in pd.read_csv(file_path, dtype=str, encoding='utf-8-sig', chunksize=chunksize):
+        yield normalize_era(chunk, era)
+
+
+def _dropped_rows(df, mask, era, reason, kept_era=None):
+    return df.loc[mask, DEDUP_REPORT_COLUMNS[3:]].assign(era=era, reason=reason, kept_era=kept_era) \
+        .reindex(columns=DEDUP_REPORT_COLUMNS)
+
+
+def _seen_in_newer_era(keys, seen_keys, seen_eras):
+    """(mask of keys found in the sorted ``seen_keys``, era each was found in)."""
+    if len(seen_keys) == 0:
+        return np.zeros(len(keys), dtype=bool), np.full(len(keys), None, dtype=object)
+    positions = np.minimum(np.searchsorted(seen_keys, keys), len(seen_keys) - 1)
+    return (keys != 0) & (seen_keys[positions] == keys), seen_eras[positions]
+
+
+def iter_history(files=None, data_path=None, chunksize=None, dedupe=True, dropped=None):
+    """
+    Yield normalized frames for each era file (in chunks if ``chunksize``).
+
+    With ``dedupe`` eras are read newest first, since the newest export has
+    the richest columns and wins any overlap. Rows of older eras reported
+    outside their era's years are dropped, as are
+    rows whose dedup_keys hash appeared in a newer era. Repeats within one
+    era are separate offenses of one incident and are kept. Dropped rows
+    are appended to the ``dropped`` list (see write_dedup_report).
+    """
+    files = files if files else config.HISTORICAL_FILES
+    data_path = data_path if data_path else config.RAW_DATA_DIR
+    eras = list(files.items())
+    if dedupe:
+        eras = eras[::-1]
+    # Sorted hashes seen in newer eras, and the era each came from
+    seen_keys = np.empty(0, dtype=np.uint64)
+    seen_eras = np.empty(0, dtype=object)
+    for i, (era, file_name) in enumerate(eras):
+        file_path = os.path.join(data_path, file_name)
+        if not os.path.exists(file_path):
+            continue
+        years = era_years(era)
+        era_keys = []
+        for df in _era_frames(file_path, era, chunksize):
+            if dedupe:
+                year = df['ReportDate'].dt.year.fillna(df['OccurredFromDate'].dt.year).to_numpy()
+                out_of_range = np.zeros(len(df), dtype=bool)
+                # The newest era (read first) is the live export; it keeps growing past its name
+                if years is not None and i > 0:
+                    out_of_range = (year < years[0]) | (year > years[1])
+                keys = dedup_keys(df)
+                duplicate, kept_era = _seen_in_newer_era(keys, seen_keys, seen_eras)
+                duplicate &= ~out_of_range
+                if dropped is not None:
+                    dropped.append(_dropped_rows(df, out_of_range, era, 'out_of_range'))
+                    dropped.append(_dropped_rows(df, duplicate, era, 'duplicate', kept_era[duplicate]))
+                keep = ~(out_of_range | duplicate)
+                era_keys.append(keys[keep & (keys != 0)])
+                df = df.loc[keep]
+            yield df
+        if era_keys:
+            seen_keys = np.concatenate([seen_keys] + era_keys)
+            seen_eras = np.concatenate([seen_eras, np.full(len(seen_keys) - len(seen_eras), era, dtype=object)])
+            order = np.argsort(seen_keys, kind='stable')
+            seen_keys, seen_eras = seen_keys[order], seen_eras[order]
+
+
+def write_dedup_report(dropped, path=None):
+    """Write the rows iter_history dropped to CSV; returns (path, rows written)."""
+    path = path if path else config.HISTORY_DEDUP_REPORT_PATH
+    frames = [df for df in dropped if len(df) > 0]
+    report = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DEDUP_REPORT_COLUMNS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    report.to_csv(path, index=False)
+    return path, len(report)
@@ -0,0 +1,112 @@
+"""
+Kernel density hotspot surfaces.
+
+Incidents are rasterized once per data version onto a fixed city grid
+(config.HOTSPOT_BOUNDS, HOTSPOT_GRID_SIZE cells per axis) as sparse
+(severity, month, cell) counts, sorted so every severity's month range is
+one contiguous slice. Storage follows the occupied cells, not the month
+span, so a stray 1900 date costs nothing. A surface for any severity and
+month range is one weighted bincount into a grid plus one Gaussian
+convolution, done in the frequency domain with numpy.fft so the cost does
+not grow with the bandwidth.
+"""
+import numpy as np
+
+from . import config
+
+GRID_PREFIX = 'hotspot_'
+METERS_PER_DEGREE_LAT = 110_574.0
+METERS_PER_DEGREE_LON_AT_EQUATOR = 111_320.0
+
+
+def cell_size_m():
+    """(width, height) of one grid cell in meters."""
+    lon_min, lon_max, lat_min, lat_max = config.HOTSPOT_BOUNDS
+    n = config.HOTSPOT_GRID_SIZE
+    mid_lat = np.radians((lat_min + lat_max) / 2)
+    width = (lon_max - lon_min) / n * METERS_PER_DEGREE_LON_AT_EQUATOR * np.cos(mid_lat)
+    height = (lat_max - lat_min) / n * METERS_PER_DEGREE_LAT
+    return width, height
+
+
+def cell_centers():
+    """(longitudes, latitudes) of the grid's column and row centers."""
+    lon_min, lon_max, lat_min, lat_max = config.HOTSPOT_BOUNDS
+    n = config.HOTSPOT_GRID_SIZE
+    lon_step = (lon_max - lon_min) / n
+    lat_step = (lat_max - lat_min) / n
+    return lon_min + lon_step * (np.arange(n) + 0.5), lat_min + lat_step * (np.arange(n) + 0.5)
+
+
+def rasterize(lon, lat, severity_codes, months, n_severity):
+    """
+    Sparse cell counts keyed by (severity, month, lat cell, lon cell), in
+    one pass over the rows. Rows outside the bounds or without coordinates
+    are skipped. Returns the arrays to keep in PreparedData.arrays.
+    """
+    lon_min, lon_max, lat_min, lat_max = config.HOTSPOT_BOUNDS
+    n = config.HOTSPOT_GRID_SIZE
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    col = np.floor((lon - lon_min) / (lon_max - lon_min) * n)
+    row = np.floor((lat - lat_min) / (lat_max - lat_min) * n)
+    valid = (col >= 0) & (col < n) & (row >= 0) & (row < n) & (severity_codes >= 0)
+    months = months[valid].astype(np.int64)
+
+    first_month = int(months.min()) if len(months) else 0
+    n_months = int(months.max()) - first_month + 1 if len(months) else 1
+    # Same as histogram2d on uniform bins, for every (severity, month) at once
+    flat = ((severity_codes[valid].astype(np.int64) * n_months + (months - first_month)) * n
+            + row[valid].astype(np.int64)) * n + col[valid].astype(np.int64)
+    keys, counts = np.unique(flat, return_counts=True)
+    return {
+        GRID_PREFIX + 'keys': keys,
+        GRID_PREFIX + 'counts': counts.astype(np.uint32),
+        GRID_PREFIX + 'first_month': np.array([first_month], dtype=np.int64),
+        GRID_PREFIX + 'n_months': np.array([n_months], dtype=np.int64),
+    }
+
+
+def cell_counts(arrays, severity_codes, first_month, last_month):
+    """(lat cell, lon cell) counts for the given severity codes over a month range."""
+    n = config.HOTSPOT_GRID_SIZE
+    keys = arrays[GRID_PREFIX + 'keys']
+    counts = arrays[GRID_PREFIX + 'counts']
+    base_month = int(arrays[GRID_PREFIX + 'first_month'][0])
+    n_months = int(arrays[GRID_PREFIX + 'n_months'][0])
+    start = max(first_month - base_month, 0)
+    stop = min(last_month - base_month + 1, n_months)
+    grid = np.zeros(n * n)
+    if stop <= start:
+        return grid.reshape(n, n)
+    for code in severity_codes:
+        lo, hi = np.searchsorted(keys, [(code * n_months + start) * n * n, (code * n_months + stop) * n * n])
+        grid += np.bincount(keys[lo:hi] % (n * n), weights=counts[lo:hi], minlength=n * n)
+    return grid.reshape(n, n)
+
+
+def gaussian_smooth(grid, sigma_cols, sigma_rows):
+    """Convolve ``grid`` with a Gaussian (sigmas in cells) via FFT, without wrap-around."""
+    rows, cols = grid.shape
+    pad_rows = int(np.ceil(4 * sigma_rows))
+    pad_cols = int(np.ceil(4 * sigma_cols))
+    shape = (rows + 2 * pad_rows, cols + 2 * pad_cols)
+    padded = np.zeros(shape)
+    padded[pad_rows:pad_rows + rows, pad_cols:pad_cols + cols] = grid
+    # The Fourier transform of a Gaussian is a Gaussian, so the kernel never needs building
+    freq_rows = np.fft.fftfreq(shape[0])[:, None]
+    freq_cols = np.fft.rfftfreq(shape[1])[None, :]
+    transfer = np.exp(-2 * np.pi ** 2 * ((sigma_rows * freq_rows) ** 2 + (sigma_cols * freq_cols) ** 2))
+    smoothed = np.fft.irfft2(np.fft.rfft2(padded) * transfer, s=shape)
+    return np.clip(smoothed[pad_rows:pad_rows + rows, pad_cols:pad_cols + cols], 0, None)
+
+
+def kde_surface(arrays, severity_codes, first_month, last_month, bandwidth_m):
+    """
+    Incident density per square km for the given severity codes and month
+    range, smoothed with a Gaussian of ``bandwidth_m`` meters.
+    """
+    counts = cell_counts(arrays, severity_codes, first_month, last_month)
+    width, height = cell_size_m()
+    surface = gaussian_smooth(counts, bandwidth_m / width, bandwidth_m / height)
+    return surface / (width * height / 1e6)
@@ -0,0 +1,105 @@
+"""
+Incident / offense normalization.
+
+Axon exports carry one row per offense, so an incident with several
+offenses repeats its number, dates, address and coordinates on every row.
+The incident index gives every row an integer incident key and picks one
+primary row per incident (its most severe offense, then the first row),
+so the crime frame serves as the offense table and the incident table is
+a gather of primary rows. Because the frame's string columns are
+categoricals, the gathered incident columns share the frame's
+dictionaries instead of copying any strings. The arrays live in
+PreparedData.arrays and are saved in the startup snapshot.
+"""
+import numpy as np
+import pandas as pd
+
+INCIDENT_PREFIX = 'incident_'
+# Columns that describe one offense of an incident; every other column is per incident
+OFFENSE_COLUMNS = ['NibrsUcrCode', 'NIBRS_Offense', 'FireArmInvolved', 'severity']
+COUNT_MODES = ['offenses', 'incidents']
+
+
+def incident_keys(incident_numbers):
+    """
+    Integer incident key per row (0..n_incidents - 1, in order of first
+    appearance). Rows without an incident number are incidents of their own.
+    """
+    keys, uniques = pd.factorize(incident_numbers, use_na_sentinel=True)
+    keys = keys.astype(np.int64)
+    missing = keys < 0
+    keys[missing] = len(uniques) + np.arange(missing.sum())
+    return keys
+
+
+def first_by_severity(keys, severity_codes, n_severity):
+    """
+    (distinct keys, position of each key's most severe row); ties go to the
+    earliest row and missing severity sorts last.
+    """
+    severity_codes = np.where(severity_codes < 0, n_severity, severity_codes)
+    order = np.lexsort((np.arange(len(keys)), severity_codes, keys))
+    sorted_keys = keys[order]
+    first = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else order
+    return sorted_keys[first], order[first]
+
+
+def build_incident_index(incident_numbers, severity_codes, n_severity):
+    """Per-row incident keys, primary row and offense count per incident."""
+    keys = incident_keys(incident_numbers)
+    _, primary = first_by_severity(keys, severity_codes, n_severity)
+    return {
+        INCIDENT_PREFIX + 'key': keys.astype(np.int32),
+        INCIDENT_PREFIX + 'primary_row': primary.astype(np.int64),
+        INCIDENT_PREFIX + 'offense_count': np.bincount(keys, minlength=len(primary)).astype(np.int32),
+    }
+
+
+def check_count_mode(count):
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of {COUNT_MODES}, not {count!r}")
+
+
+def primary_rows(df, arrays, rows, n_severity):
+    """
+    (incident ids, primary row of each) for the incidents among offense rows
+    ``rows``, choosing each incident's most severe offense within ``rows``.
+    """
+    incident_ids, first = first_by_severity(arrays[INCIDENT_PREFIX + 'key'][rows],
+                                            df['severity'].cat.codes.to_numpy()[rows], n_severity)
+    return incident_ids, rows[first]
+
+
+def incident_frame(df, arrays, rows, n_severity):
+    """
+    One row per incident among offense rows ``rows`` of ``df``: the row of
+    its most severe offense, plus offense_count and the '; '-joined list of
+    its distinct offenses, both over ``rows``.
+    """
+    rows = np.asarray(rows)
+    keys = arrays[INCIDENT_PREFIX + 'key'][rows]
+    incident_ids, primary = primary_rows(df, arrays, rows, n_severity)
+    offenses = (
+        pd.Series(df['NIBRS_Offense'].to_numpy()[rows])
+        .groupby(keys)
+        .agg(lambda values: '; '.join(dict.fromkeys(values.dropna().astype(str))))
+    )
+    return df.take(primary).assign(
+        incident_id=incident_ids,
+        offense_count=np.bincount(np.searchsorted(incident_ids, keys), minlength=len(incident_ids)),
+        offenses=offenses.reindex(incident_ids).to_numpy()
+    )
+
+
+def incident_table(df, arrays):
+    """Every incident's per-incident columns (from its primary row) plus offense_count, indexed by incident_id."""
+    columns = [col for col in df.columns if col not in OFFENSE_COLUMNS]
+    table = df[columns].take(arrays[INCIDENT_PREFIX + 'primary_row'])
+    table.index = pd.RangeIndex(len(table), name='incident_id')
+    return table.assign(offense_count=arrays[INCIDENT_PREFIX + 'offense_count'])
+
+
+def offense_table(df, arrays):
+    """The offense columns with each row's incident_id; joins to incident_table on it."""
+    columns = [col for col in OFFENSE_COLUMNS if col in df.columns]
+    return df[columns].assign(incident_id=arrays[INCIDENT_PREFIX + 'key']).reset_index(drop=True)
@@ -0,0 +1,196 @@
+"""
+Incremental ingest of Axon crime exports into the columnar store.
+
+Each export overlaps heavily with the previous one, so instead of
+re-preparing every row we hash rows by IncidentNumber + offense, compare
+them with the rows already in the store and only parse the delta:
+
+- inserted:     key not present in the store
+- updated:      key present but some other column changed
+- reclassified: incident present but its offense set changed; the old
+                offense rows are dropped and the new ones added
+
+Rows missing from the new export whose incident is also missing are kept,
+since exports are not guaranteed to cover the full history. A key repeated
+within one export is a genuinely repeated offense row, so repeats are told
+apart by their occurrence number rather than collapsed.
+
+Rows whose OccurredFromDate does not parse never reach the crimes table;
+their hashes go into a small 'rejected' table so an unchanged bad row is
+reported as skipped on later ingests instead of being re-inserted.
+"""
+import glob
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from . import columnar
+from . import snapshot
+from .data_loader import read_crime_export, prepare_crime_frame
+
+KEY_HASH_COLUMN = '_key_hash'
+ROW_HASH_COLUMN = '_row_hash'
+
+
+@dataclass
+class IngestReport:
+    source_file: str
+    rows_in_export: int
+    inserted: int = 0
+    updated: int = 0
+    reclassified: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    skipped: int = 0
+    full_rebuild: bool = False
+
+    def __str__(self):
+        mode = "full rebuild" if self.full_rebuild else "incremental"
+        return (f"{self.source_file} ({mode}): {self.rows_in_export:,} rows in export, "
+                f"{self.inserted:,} inserted, {self.updated:,} updated, "
+                f"{self.reclassified:,} reclassified, {self.removed:,} removed, "
+                f"{self.unchanged:,} unchanged, {self.skipped:,} skipped (unparsable date)")
+
+
+def find_latest_export(raw_dir=None):
+    """Return the most recently modified Axon export in ``raw_dir``."""
+    raw_dir = raw_dir if raw_dir else config.RAW_DATA_DIR
+    matches = glob.glob(os.path.join(raw_dir, config.LATEST_EXPORT_PATTERN))
+    if not matches:
+        raise FileNotFoundError(f"No files matching {config.LATEST_EXPORT_PATTERN} in {raw_dir}")
+    return Path(max(matches, key=os.path.getmtime))
+
+
+def hash_rows(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def key_hashes(raw):
+    """Hash of the ingest key columns, with repeats of a key numbered apart."""
+    keys = raw[config.INGEST_KEY_COLUMNS]
+    hashes = hash_rows(keys).copy()
+    occurrence = keys.groupby(config.INGEST_KEY_COLUMNS, dropna=False, sort=False).cumcount().to_numpy()
+    # First occurrences hash as before, so existing stores still match
+    repeats = occurrence > 0
+    if repeats.any():
+        hashes[repeats] = hash_rows(keys.loc[repeats].assign(_occurrence=occurrence[repeats]))
+    return hashes
+
+
+def _with_hashes(raw):
+    raw = raw.copy()
+    raw[KEY_HASH_COLUMN] = key_hashes(raw)
+    raw[ROW_HASH_COLUMN] = hash_rows(raw.drop(columns=[KEY_HASH_COLUMN]))
+    return raw
+
+
+def _prepare(raw):
+    """Prepared rows of ``raw`` plus the hashes of rows dropped for an unparsable date."""
+    crimes = prepare_crime_frame(raw)
+    rejected = raw.loc[~raw.index.isin(crimes.index), [KEY_HASH_COLUMN, ROW_HASH_COLUMN]]
+    return crimes, rejected.reset_index(drop=True)
+
+
+def _source_meta(export_path):
+    stat = os.stat(export_path)
+    return {
+        'source_file': Path(export_path).name,
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def is_ingested(export_path, store_dir=None):
+    """True if the store was last built from ``export_path`` as it is on disk now."""
+    store_dir = Path(store_dir) if store_dir else config.STORE_DIR
+    if not columnar.store_exists(store_dir):
+        return False
+    meta = columnar.read_manifest(store_dir)['meta']
+    stat = os.stat(export_path)
+    return (meta.get('source_file'), meta.get('source_size'), meta.get('source_mtime')) == \
+        (Path(export_path).name, stat.st_size, stat.st_mtime)
+
+
+def ingest_export(export_path=None, store_dir=None, full=False, only_if_new=False):
+    """
+    Merge ``export_path`` into the columnar store and return an IngestReport.
+
+    Ingests are serialized across processes with a lock next to the store.
+    With ``only_if_new`` the export is skipped (and None returned) if it was
+    already ingested, which is checked again once the lock is held.
+    """
+    export_path = Path(export_path) if export_path else find_latest_export()
+    store_dir = Path(store_dir) if store_dir else config.STORE_DIR
+    with snapshot.build_lock(store_dir):
+        if only_if_new and is_ingested(export_path, store_dir):
+            return None
+        return _ingest_locked(export_path, store_dir, full)
+
+
+def _ingest_locked(export_path, store_dir, full):
+    raw = _with_hashes(read_crime_export(export_path))
+    report = IngestReport(source_file=export_path.name, rows_in_export=len(raw))
+
+    tables = None
+    if not full and columnar.store_exists(store_dir):
+        tables, _ = columnar.read_store(store_dir)
+    # Missing, empty-schema or pre-hash stores are rebuilt rather than diffed
+    if tables is None or KEY_HASH_COLUMN not in tables.get('crimes', {}):
+        crimes, rejected = _prepare(raw)
+        report.inserted = len(crimes)
+        report.skipped = len(rejected)
+        report.full_rebuild = True
+        columnar.write_store(store_dir, {'crimes': crimes, 'rejected': rejected}, meta=_source_meta(export_path))
+        return report
+
+    store = tables['crimes']
+    store_keys = store[KEY_HASH_COLUMN].to_numpy()
+    store_hashes = store[ROW_HASH_COLUMN].to_numpy()
+
+    # Bad rows already seen unchanged are skipped before diffing
+    old_rejected = tables.get('rejected', pd.DataFrame(columns=[KEY_HASH_COLUMN, ROW_HASH_COLUMN]))
+    known_rejected = raw[ROW_HASH_COLUMN].isin(old_rejected[ROW_HASH_COLUMN]).to_numpy()
+    kept_rejected = raw.loc[known_rejected, [KEY_HASH_COLUMN, ROW_HASH_COLUMN]]
+    raw = raw.loc[~known_rejected]
+
+    positions = pd.Index(store_keys).get_indexer(raw[KEY_HASH_COLUMN].to_numpy())
+    is_new = positions == -1
+    is_changed = np.zeros(len(raw), dtype=bool)
+    is_changed[~is_new] = store_hashes[positions[~is_new]] != raw[ROW_HASH_COLUMN].to_numpy()[~is_new]
+
+    # Store rows whose key vanished but whose incident is still exported were reclassified
+    key_missing = ~np.isin(store_keys, raw[KEY_HASH_COLUMN].to_numpy())
+    exported_incidents = pd.Index(raw['IncidentNumber'].dropna().unique())
+    incident_exported = store['IncidentNumber'].astype(object).isin(exported_incidents).to_numpy()
+    reclassified_old = key_missing & incident_exported
+
+    delta, new_rejected = _prepare(raw.loc[is_new | is_changed])
+    # Rows whose date no longer parses leave the store like any other changed row
+    parsed = raw.index.isin(delta.index)
+
+    drop_mask = reclassified_old.copy()
+    drop_mask[positions[is_changed]] = True
+
+    known_incidents = pd.Index(store['IncidentNumber'].astype(object).unique())
+    new_in_known_incident = raw['IncidentNumber'].isin(known_incidents).to_numpy()
+
+    report.updated = int((is_changed & parsed).sum())
+    report.reclassified = int((is_new & parsed & new_in_known_incident).sum())
+    report.inserted = int((is_new & parsed).sum()) - report.reclassified
+    report.removed = int(reclassified_old.sum()) + int((is_changed & ~parsed).sum())
+    report.unchanged = len(raw) - int(is_new.sum()) - int(is_changed.sum())
+    report.skipped = len(kept_rejected) + len(new_rejected)
+
+    rejected = pd.concat([kept_rejected, new_rejected], ignore_index=True)
+    if not drop_mask.any() and not is_new.any() and not is_changed.any() and len(rejected) == len(old_rejected):
+        return report
+
+    crimes = pd.concat([store.loc[~drop_mask], delta], ignore_index=True)
+    columnar.write_store(store_dir, {'crimes': crimes, 'rejected': rejected}, meta=_source_meta(export_path))
+    return report
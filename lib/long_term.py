@@ -0,0 +1,188 @@
+"""
+Severity-harmonized quarterly counts across every era (1997 to today).
+
+The UCR eras (1997-2008) and the NIBRS eras (2009 on) number their
+offenses differently, and the same code can mean different things in each
+(UCR 120 is manslaughter, NIBRS 120 robbery). Rows are therefore mapped
+to a severity through the crosswalk by (code_type, code), using the code
+system in history.ERA_CODE_TYPES, and fall back to the offense description
+and then 'Low' like map_severity.
+
+build_long_term_counts streams the de-duplicated history once and keeps
+only per-address and citywide (quarter, severity) counts. They are saved
+as a compressed .npz (config.LONG_TERM_COUNTS_PATH) so the dashboard can
+draw a 27-year trend without touching any row-level history.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .data_loader import SEVERITY_CATEGORIES, load_severity_dict, quarter_to_period
+from .history import ERA_CODE_TYPES, iter_history
+
+# Quarters (year * 4 + q - 1) fit in the low bits of the accumulation key
+QUARTER_BITS = 16
+
+
+def normalize_codes(codes):
+    return codes.astype('string').str.strip().str.upper().str.lstrip('0')
+
+
+def load_code_severity(crosswalk_path=None):
+    """{code_type: {normalized code: severity}} from the crosswalk."""
+    crosswalk_path = str(crosswalk_path if crosswalk_path else config.SEVERITY_CROSSWALK_PATH)
+    if not os.path.exists(crosswalk_path):
+        return {}
+    crosswalk = pd.read_csv(crosswalk_path, dtype=str)
+    crosswalk['code'] = normalize_codes(crosswalk['code'])
+    return {
+        code_type: dict(zip(rows['code'], rows['severity']))
+        for code_type, rows in crosswalk.groupby('code_type')
+    }
+
+
+def _lookup(values, mapping):
+    """mapping[value] per row, looked up once per distinct value (NaN where missing)."""
+    values = values.astype('category')
+    mapped = values.cat.categories.to_series().map(mapping).to_numpy(dtype=object)
+    return np.append(mapped, np.nan)[values.cat.codes.to_numpy()]
+
+
+def harmonized_severity(df, era, code_severity, description_severity):
+    """Severity code (index into SEVERITY_CATEGORIES) per row of a normalized era frame."""
+    code_type = ERA_CODE_TYPES.get(era, 'NIBRS')
+    severity = pd.Series(_lookup(normalize_codes(df['NibrsUcrCode']), code_severity.get(code_type, {})))
+    severity = severity.fillna(pd.Series(_lookup(df['NIBRS_Offense'], description_severity)))
+    severity = severity.where(severity.isin(SEVERITY_CATEGORIES), 'Low')
+    return pd.Categorical(severity, categories=SEVERITY_CATEGORIES).codes
+
+
+@dataclass(frozen=True)
+class LongTermCounts:
+    """
+    Quarterly severity counts for every address and citywide. Per-address
+    entries are sparse and sorted by address, with CSR offsets.
+    """
+    addresses: np.ndarray
+    first_quarter: int
+    citywide: np.ndarray
+    offsets: np.ndarray
+    quarter: np.ndarray
+    severity: np.ndarray
+    count: np.ndarray
+
+    @property
+    def n_quarters(self):
+        return self.citywide.shape[0]
+
+    def location_counts(self, address=None):
+        """(quarter, severity) counts for addresses containing ``address``; citywide if None."""
+        if address is None:
+            return self.citywide
+        matched = np.flatnonzero(pd.Series(self.addresses).str.contains(address.upper(), regex=False).to_numpy())
+        entries = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in matched] +
+                                 [np.empty(0, dtype=np.int64)])
+        flat = self.quarter[entries].astype(np.int64) * len(SEVERITY_CATEGORIES) + self.severity[entries]
+        counts = np.bincount(flat, weights=self.count[entries], minlength=self.citywide.size)
+        return counts.reshape(self.citywide.shape).astype(np.int64)
+
+    def quarterly_frame(self, address=None, severities=None):
+        """Long frame of quarter, quarter_label, quarter_date, severity, count for charting."""
+        severities = severities if severities else SEVERITY_CATEGORIES
+        counts = self.location_counts(address)
+        periods = [quarter_to_period(self.first_quarter + q) for q in range(self.n_quarters)]
+        frames = [pd.DataFrame({
+            'quarter': pd.PeriodIndex(periods, freq='Q'),
+            'severity': severity,
+            'count': counts[:, SEVERITY_CATEGORIES.index(severity)],
+        }) for severity in severities]
+        df = pd.concat(frames, ignore_index=True)
+        df['quarter_label'] = df['quarter'].apply(lambda x: f"{x.year} Q{x.quarter}")
+        df['quarter_date'] = df['quarter'].dt.to_timestamp()
+        return df
+
+
+def build_long_term_counts(files=None, data_path=None, chunksize=200_000, crosswalk_path=None):
+    """Stream every era once and reduce it to LongTermCounts."""
+    code_severity = load_code_severity(crosswalk_path)
+    description_severity = load_severity_dict(crosswalk_path)
+    n_severity = len(SEVERITY_CATEGORIES)
+    address_ids = {}
+    keys = []
+    weights = []
+    for chunk in iter_history(files=files, data_path=data_path, chunksize=chunksize):
+        severity = harmonized_severity(chunk, chunk['era'].iloc[0], code_severity, description_severity) \
+            if len(chunk) else np.empty(0, dtype=np.int8)
+        dates = chunk['OccurredFromDate']
+        quarters = (dates.dt.year * 4 + dates.dt.quarter - 1).to_numpy(dtype=np.int64)
+        norm = chunk['StreetAddress'].astype('string').str.upper().str.replace(r'\s+', ' ', regex=True).str.strip()
+        for address in norm.dropna().unique():
+            address_ids.setdefault(address, len(address_ids) + 1)
+        # Address id 0 collects rows without an address: citywide only
+        ids = norm.map(address_ids).fillna(0).to_numpy(dtype=np.int64)
+        chunk_keys, chunk_counts = np.unique(((ids << QUARTER_BITS) | quarters) * n_severity + severity,
+                                             return_counts=True)
+        keys.append(chunk_keys)
+        weights.append(chunk_counts)
+
+    keys, inverse = np.unique(np.concatenate(keys + [np.empty(0, dtype=np.int64)]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(weights + [np.empty(0)])).astype(np.int32)
+    severity = (keys % n_severity).astype(np.int8)
+    quarters = (keys // n_severity) & ((1 << QUARTER_BITS) - 1)
+    ids = (keys // n_severity) >> QUARTER_BITS
+    first_quarter = int(quarters.min()) if len(keys) else 0
+    n_quarters = int(quarters.max()) - first_quarter + 1 if len(keys) else 0
+    quarters = (quarters - first_quarter).astype(np.int16)
+    citywide = np.bincount(quarters.astype(np.int64) * n_severity + severity, weights=counts,
+                           minlength=n_quarters * n_severity).reshape(n_quarters, n_severity).astype(np.int32)
+
+    # Keys sort by address id, so every address's entries are already contiguous
+    keep = ids > 0
+    addresses = np.array(list(address_ids), dtype=str)
+    return LongTermCounts(
+        addresses=addresses,
+        first_quarter=first_quarter,
+        citywide=citywide,
+        offsets=np.searchsorted(ids[keep], np.arange(1, len(addresses) + 2)).astype(np.int64),
+        quarter=quarters[keep],
+        severity=severity[keep],
+        count=counts[keep],
+    )
+
+
+def write_long_term_counts(counts, path=None):
+    path = str(path if path else config.LONG_TERM_COUNTS_PATH)
+    tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+    np.savez_compressed(
+        tmp_path,
+        addresses=counts.addresses,
+        first_quarter=np.array(counts.first_quarter),
+        citywide=counts.citywide,
+        offsets=counts.offsets,
+        quarter=counts.quarter,
+        severity=counts.severity,
+        count=counts.count,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_long_term_counts(path=None):
+    """LongTermCounts from disk, or None if they have not been built."""
+    path = str(path if path else config.LONG_TERM_COUNTS_PATH)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return LongTermCounts(
+                addresses=data['addresses'],
+                first_quarter=int(data['first_quarter']),
+                citywide=data['citywide'],
+                offsets=data['offsets'],
+                quarter=data['quarter'],
+                severity=data['severity'],
+                count=data['count'],
+            )
+    except (OSError, ValueError, KeyError):
+        return None
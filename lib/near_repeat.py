@@ -0,0 +1,152 @@
+"""
+Near-repeat (Knox test) analysis.
+
+Pairs of incidents are counted into distance x time-gap bands and compared
+with a permutation baseline in which incident times are shuffled over the
+fixed locations. A cell's Knox ratio is observed / expected pairs; above 1
+means incidents cluster at that distance and gap more than chance.
+
+Spatially close pairs are found once with a uniform grid index whose
+cells are as wide as the largest distance band, so each incident is only
+compared with incidents in its own and the eight neighbouring cells.
+Shuffling times does not change which pairs are close, so every
+permutation only recomputes time gaps for those pairs. Permutations are
+split across a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+METERS_PER_DEGREE_LAT = 110_574.0
+METERS_PER_DEGREE_LON_AT_EQUATOR = 111_320.0
+# Below this many permutations x pairs a pool costs more than it saves
+MIN_POOL_WORK = 5_000_000
+
+_worker_state = {}
+
+
+def project_m(lon, lat):
+    """Local equirectangular projection to meters (fine at city scale)."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    mid_lat = np.radians(np.nanmean(lat)) if len(lat) else 0.0
+    return (lon * METERS_PER_DEGREE_LON_AT_EQUATOR * np.cos(mid_lat),
+            lat * METERS_PER_DEGREE_LAT)
+
+
+def distance_m(lon, lat, center_lon, center_lat):
+    """Meters from (center_lon, center_lat), projected at the center's latitude; NaN without coordinates."""
+    scale = np.cos(np.radians(center_lat))
+    dx = (np.asarray(lon, dtype=float) - center_lon) * METERS_PER_DEGREE_LON_AT_EQUATOR * scale
+    dy = (np.asarray(lat, dtype=float) - center_lat) * METERS_PER_DEGREE_LAT
+    return np.hypot(dx, dy)
+
+
+def radius_bounds(center_lon, center_lat, radius_m):
+    """(lon_min, lon_max, lat_min, lat_max) box enclosing a circle, for index-friendly prefilters."""
+    d_lon = radius_m / (METERS_PER_DEGREE_LON_AT_EQUATOR * np.cos(np.radians(center_lat)))
+    d_lat = radius_m / METERS_PER_DEGREE_LAT
+    return center_lon - d_lon, center_lon + d_lon, center_lat - d_lat, center_lat + d_lat
+
+
+def close_pairs(x, y, max_distance):
+    """
+    All pairs (i, j), i < j, no more than ``max_distance`` apart, plus their
+    distances. Uses a grid index, so work grows with the pairs found rather
+    than with n squared.
+    """
+    cell_x = np.floor((x - x.min()) / max_distance).astype(np.int64) if len(x) else np.empty(0, np.int64)
+    cell_y = np.floor((y - y.min()) / max_distance).astype(np.int64) if len(y) else np.empty(0, np.int64)
+    width = int(cell_y.max()) + 3 if len(y) else 1
+    keys = (cell_x + 1) * width + (cell_y + 1)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    pair_i, pair_j = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbour = keys + dx * width + dy
+            lo = np.searchsorted(sorted_keys, neighbour, side='left')
+            hi = np.searchsorted(sorted_keys, neighbour, side='right')
+            counts = hi - lo
+            i = np.repeat(np.arange(len(keys)), counts)
+            within = np.arange(len(i)) - np.repeat(np.cumsum(counts) - counts, counts)
+            j = order[np.repeat(lo, counts) + within]
+            keep = i < j
+            pair_i.append(i[keep])
+            pair_j.append(j[keep])
+    pair_i = np.concatenate(pair_i)
+    pair_j = np.concatenate(pair_j)
+    distance = np.hypot(x[pair_i] - x[pair_j], y[pair_i] - y[pair_j])
+    close = distance <= max_distance
+    return pair_i[close], pair_j[close], distance[close]
+
+
+def _band_counts(distance_band, gaps, time_edges, n_distance):
+    time_band = np.searchsorted(time_edges, gaps, side='left')
+    keep = time_band < len(time_edges)
+    flat = distance_band[keep] * len(time_edges) + time_band[keep]
+    return np.bincount(flat, minlength=n_distance * len(time_edges))
+
+
+def _init_worker(pair_i, pair_j, distance_band, times, time_edges, n_distance):
+    _worker_state.update(pair_i=pair_i, pair_j=pair_j, distance_band=distance_band, times=times,
+                         time_edges=time_edges, n_distance=n_distance)
+
+
+def _permutation_counts(seed, n_runs):
+    state = _worker_state
+    rng = np.random.default_rng(seed)
+    results = np.empty((n_runs, state['n_distance'] * len(state['time_edges'])), dtype=np.int64)
+    for run in range(n_runs):
+        shuffled = rng.permutation(state['times'])
+        gaps = np.abs(shuffled[state['pair_i']] - shuffled[state['pair_j']])
+        results[run] = _band_counts(state['distance_band'], gaps, state['time_edges'], state['n_distance'])
+    return results
+
+
+def knox_test(x, y, times_days, distance_bands, time_bands, n_permutations=99, seed=0, workers=None):
+    """
+    Knox table for incidents at (x, y) meters and ``times_days``. Bands are
+    upper edges (inclusive), e.g. distance_bands=[100, 200, 400] meters and
+    time_bands=[7, 14, 30] days.
+    """
+    distance_edges = np.asarray(sorted(distance_bands), dtype=float)
+    time_edges = np.asarray(sorted(time_bands), dtype=float)
+    times_days = np.asarray(times_days, dtype=float)
+    pair_i, pair_j, distance = close_pairs(np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                                           distance_edges[-1])
+    distance_band = np.searchsorted(distance_edges, distance, side='left')
+    n_distance = len(distance_edges)
+    observed = _band_counts(distance_band, np.abs(times_days[pair_i] - times_days[pair_j]),
+                            time_edges, n_distance)
+
+    args = (pair_i, pair_j, distance_band, times_days, time_edges, n_distance)
+    workers = workers if workers else os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    runs = [len(chunk) for chunk in np.array_split(np.arange(n_permutations), workers)]
+    if workers == 1 or n_permutations * len(pair_i) < MIN_POOL_WORK:
+        _init_worker(*args)
+        permuted = [_permutation_counts(s, n) for s, n in zip(seeds, runs) if n]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as pool:
+            permuted = list(pool.map(_permutation_counts, [s for s, n in zip(seeds, runs) if n],
+                                     [n for n in runs if n]))
+    permuted = np.concatenate(permuted) if permuted else np.zeros((0, len(observed)), dtype=np.int64)
+
+    expected = permuted.mean(axis=0) if len(permuted) else np.full(len(observed), np.nan)
+    p_value = (1 + (permuted >= observed).sum(axis=0)) / (1 + len(permuted))
+    distance_labels = [f"{lo:g}-{hi:g} m" for lo, hi in zip(np.r_[0, distance_edges[:-1]], distance_edges)]
+    time_labels = [f"{lo:g}-{hi:g} days" for lo, hi in zip(np.r_[0, time_edges[:-1]], time_edges)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(expected > 0, observed / expected, np.nan)
+    return pd.DataFrame({
+        'distance_band': np.repeat(distance_labels, len(time_edges)),
+        'time_band': np.tile(time_labels, n_distance),
+        'observed': observed,
+        'expected': expected,
+        'knox_ratio': ratio,
+        'p_value': p_value,
+    })
@@ -0,0 +1,156 @@
+"""
+Hot reload of the crime dataset without restarting the server.
+
+DatasetWatcher polls RAW_DATA_DIR, the columnar store and the severity
+crosswalk. When anything changes it ingests the newest export (if the
+columnar store is enabled), builds a fresh CrimeDataLoader in a background
+thread and publishes it with a single reference swap. Each Streamlit rerun
+grabs one snapshot up front, so in-flight reruns keep using the loader
+they started with and no session waits on a reload.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import config
+from . import columnar
+from .data_loader import create_loader
+from .summaries import write_location_summaries
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    version: int
+    loader: object
+    loaded_at: float
+
+
+def _path_fingerprint(path):
+    path = Path(path)
+    if path.is_dir():
+        return tuple(sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in os.scandir(path) if entry.is_file()
+        ))
+    if path.exists():
+        stat = path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+    return None
+
+
+class DatasetWatcher:
+    def __init__(self, loader_factory=create_loader, watch_paths=None, poll_seconds=None):
+        self.loader_factory = loader_factory
+        self.watch_paths = watch_paths if watch_paths else [
+            config.RAW_DATA_DIR,
+            config.STORE_DIR,
+            config.SEVERITY_CROSSWALK_PATH,
+        ]
+        self.poll_seconds = poll_seconds if poll_seconds else config.RELOAD_POLL_SECONDS
+        self._snapshot = None
+        self._fingerprint = None
+        self._reload_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.preload_error = None
+
+    def fingerprint(self):
+        return tuple(_path_fingerprint(p) for p in self.watch_paths)
+
+    def snapshot(self, block=True):
+        """
+        Return the currently published DatasetSnapshot. On first use this loads
+        synchronously, unless ``block`` is False, in which case None is returned
+        while a background preload is still running.
+        """
+        snapshot = self._snapshot
+        if snapshot is None and block:
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the first snapshot is published; returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else 0
+
+    def _sync_store(self):
+        # A new export in RAW_DATA_DIR only reaches the dashboard once it is ingested
+        if not (config.USE_COLUMNAR_STORE and columnar.store_exists(config.STORE_DIR)):
+            return
+        from .ingest import find_latest_export, ingest_export, is_ingested
+        try:
+            export_path = find_latest_export()
+        except FileNotFoundError:
+            return
+        if is_ingested(export_path):
+            return
+        # Every worker's watcher sees the new export; the store lock lets one ingest it
+        logger.info("Ingesting %s", export_path.name)
+        report = ingest_export(export_path, only_if_new=True)
+        logger.info("%s", report if report else f"{export_path.name} already ingested by another process")
+
+    def reload(self):
+        """Build a new loader and publish it; concurrent callers share one rebuild."""
+        if not self._reload_lock.acquire(blocking=self._snapshot is None):
+            return self._snapshot
+        try:
+            if self._snapshot is not None and self._fingerprint == self.fingerprint():
+                return self._snapshot
+            self._sync_store()
+            fingerprint = self.fingerprint()
+            loader = self.loader_factory()
+            loader.load_latest_data()
+            version = self.version + 1
+            # Single reference assignment is the atomic publish step
+            self._snapshot = DatasetSnapshot(version=version, loader=loader, loaded_at=time.time())
+            self._fingerprint = fingerprint
+            self._ready.set()
+            logger.info("Published dataset version %d", version)
+            self._write_summaries(loader)
+            return self._snapshot
+        finally:
+            self._reload_lock.release()
+
+    def _write_summaries(self, loader):
+        try:
+            write_location_summaries(loader)
+        except Exception:
+            logger.exception("Could not write location summaries")
+
+    def _run(self, preload):
+        if preload and self._snapshot is None:
+            try:
+                self.reload()
+            except Exception as e:
+                self.preload_error = e
+                logger.exception("Dataset preload failed")
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                if self.fingerprint() != self._fingerprint:
+                    self.reload()
+            except Exception:
+                # Keep serving the previous snapshot if a rebuild fails
+                logger.exception("Dataset reload failed")
+
+    def start(self, preload=False):
+        """Start polling; with ``preload`` the first load also happens on the watcher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(preload,),
+                                            name="dataset-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,167 @@
+"""
+Static HTML reports, one per location, with the dashboard's overview
+metrics, severity chart, quarterly trend, time-of-day chart and recent
+incidents. Figures are embedded as Plotly JSON and drawn by plotly.js
+from its CDN, so a report is a single self-contained file.
+
+generate_reports fans locations out across a process pool. The parent
+loads the data once, which publishes the startup snapshot, and each
+worker maps that same snapshot instead of parsing the exports again.
+"""
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs_version
+
+from . import config
+from .charts import (
+    day_night_split, overview_numbers, quarterly_trend_chart, severity_chart, time_of_day_chart
+)
+from .data_loader import create_loader, day_range, hour_of_week_by_severity
+
+RECENT_INCIDENTS = 25
+
+_worker_state = {}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="https://cdn.plot.ly/plotly-{plotly_js_version}.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1200px; color: #222; }}
+.metrics {{ display: flex; gap: 2rem; margin: 1rem 0 2rem; }}
+.metric .value {{ font-size: 1.8rem; font-weight: bold; }}
+.metric .label {{ color: #666; }}
+.charts {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }}
+table {{ border-collapse: collapse; width: 100%; font-size: 0.9rem; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 0.3rem 0.5rem; text-align: left; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Address: {address}<br>{period}<br>Generated {generated}</p>
+<div class="metrics">{metrics}</div>
+<h2>Crimes by Severity Group</h2>
+{severity_chart}
+<div class="charts">
+<div><h2>Crime Trends Over Time (Quarterly)</h2>{trend_chart}</div>
+<div><h2>Crime by Time of Day</h2>{time_of_day_chart}<p>{day_night}</p></div>
+</div>
+<h2>Recent Incidents</h2>
+{incidents}
+</body>
+</html>
+"""
+
+
+def report_file_name(address):
+    return re.sub(r'[^A-Za-z0-9]+', '_', address).strip('_').lower() + '.html'
+
+
+def _figure_html(fig):
+    return pio.to_html(fig, full_html=False, include_plotlyjs=False, config={'displayModeBar': False})
+
+
+def _metric_html(label, value):
+    return f'<div class="metric"><div class="value">{html.escape(value)}</div>' \
+           f'<div class="label">{html.escape(label)}</div></div>'
+
+
+def render_location_report(loader, address, name=None, start_date=None, end_date=None):
+    """HTML report for one location, or None when it has no incidents in the range."""
+    filtered_df = loader.filter_by_address(address)
+    if len(filtered_df) == 0:
+        return None
+    # Whole days, like the dashboard's date inputs
+    start_dt, end_dt = day_range(start_date if start_date else filtered_df['OccurredFromDate'].min(),
+                                 end_date if end_date else filtered_df['OccurredFromDate'].max())
+    filtered_df = filtered_df[(filtered_df['OccurredFromDate'] >= start_dt) &
+                              (filtered_df['OccurredFromDate'] <= end_dt)]
+    if len(filtered_df) == 0:
+        return None
+
+    overview = overview_numbers(filtered_df, start_dt, end_dt)
+    metrics = ''.join([
+        _metric_html("Duration", overview['duration']),
+        _metric_html("Total", f"{overview['total']:,}"),
+        _metric_html("High Severity", f"{overview['high']:,}"),
+        _metric_html("High/Qtr", f"{overview['avg_high_per_quarter']:.1f}"),
+        _metric_html("Total/Qtr", f"{overview['avg_per_quarter']:.1f}"),
+    ])
+
+    time_data = loader.get_quarterly_time_series_data(address, start_dt, end_dt)
+    trend_html = _figure_html(quarterly_trend_chart(time_data)) if len(time_data) > 0 \
+        else "<p>Insufficient data for time series</p>"
+    all_hours = sum(hour_of_week_by_severity(filtered_df).values()).reshape(7, 24).sum(axis=0)
+    day_percent, night_percent = day_night_split(all_hours)
+
+    incidents = loader.filter_by_address(address, 'incidents')
+    incidents = incidents[(incidents['OccurredFromDate'] >= start_dt) & (incidents['OccurredFromDate'] <= end_dt)]
+    table_df = incidents.sort_values('OccurredFromDate', ascending=False).head(RECENT_INCIDENTS)
+    table_df = table_df[['IncidentNumber', 'OccurredFromDate', 'offenses', 'LocationType', 'FireArmInvolved']].copy()
+    table_df['OccurredFromDate'] = table_df['OccurredFromDate'].dt.strftime(config.DISPLAY_DATETIME_FORMAT)
+    table_df.columns = ['Incident #', 'Date/Time', 'Crime Type(s)', 'Location Type', 'Firearm']
+
+    return PAGE_TEMPLATE.format(
+        title=html.escape(name if name else address),
+        plotly_js_version=get_plotlyjs_version(),
+        address=html.escape(address),
+        period=f"{start_dt.strftime(config.DISPLAY_DATE_FORMAT)} - {end_dt.strftime(config.DISPLAY_DATE_FORMAT)}",
+        generated=datetime.now().strftime(config.DISPLAY_DATETIME_FORMAT),
+        metrics=metrics,
+        severity_chart=_figure_html(severity_chart(filtered_df)),
+        trend_chart=trend_html,
+        time_of_day_chart=_figure_html(time_of_day_chart(all_hours)),
+        day_night=f"Day (5am-5pm): {day_percent}% | Night (5pm-5am): {night_percent}%",
+        incidents=table_df.to_html(index=False, na_rep='', border=0),
+    )
+
+
+def write_location_report(loader, address, name, output_dir, start_date=None, end_date=None):
+    """Render and write one report; returns its path, or None if there was nothing to report."""
+    page = render_location_report(loader, address, name, start_date, end_date)
+    if page is None:
+        return None
+    path = os.path.join(output_dir, report_file_name(address))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return path
+
+
+def _init_worker():
+    # Maps the snapshot the parent published; no export parsing per worker
+    _worker_state['loader'] = create_loader()
+
+
+def _write_report(address, name, output_dir, start_date, end_date):
+    return write_location_report(_worker_state['loader'], address, name, output_dir, start_date, end_date)
+
+
+def generate_reports(locations=None, output_dir=None, start_date=None, end_date=None, workers=None):
+    """
+    Write a report for every location ({address: name}, default
+    config.LOCATIONS) into ``output_dir``. Returns {address: path or None}.
+    """
+    locations = locations if locations else config.LOCATIONS
+    output_dir = str(output_dir if output_dir else config.REPORTS_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    addresses = list(locations)
+    workers = workers if workers else min(len(addresses), os.cpu_count() or 1)
+
+    # Load once up front so the snapshot exists before any worker starts
+    loader = create_loader()
+    loader.load_latest_data()
+    if workers <= 1:
+        paths = [write_location_report(loader, a, locations[a], output_dir, start_date, end_date) for a in addresses]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            paths = list(pool.map(_write_report, addresses, [locations[a] for a in addresses],
+                                  [output_dir] * len(addresses), [start_date] * len(addresses),
+                                  [end_date] * len(addresses), chunksize=max(1, len(addresses) // (workers * 4))))
+    return dict(zip(addresses, paths))
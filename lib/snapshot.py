@@ -0,0 +1,160 @@
+"""
+Single-file, memory-mappable snapshot of the prepared loader state.
+
+Layout:
+
+    b"ATLSNAP1" | uint64 header length | JSON header | aligned array blobs
+
+The header lists every array (dtype, shape, byte offset), the table
+layouts (columns plus dictionary categories for string columns) and
+the versioning metadata. Reading maps the file once and builds numpy views
+straight onto it, so a cold start costs an mmap plus header validation.
+
+Several server processes pointed at the same snapshot (e.g. on /dev/shm)
+share one copy of the arrays through the page cache: the first process
+builds it under a file lock and the rest simply map it.
+
+A snapshot is only used when its code version and source fingerprint match
+the running code and the current data files; otherwise the loader rebuilds
+and writes a fresh one.
+"""
+import hashlib
+import json
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, workers may build concurrently
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from . import columnar
+
+MAGIC = b"ATLSNAP1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+def code_version():
+    """Hash of the library sources that shape the prepared state."""
+    digest = hashlib.sha1()
+    for source in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def file_fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [Path(path).name, stat.st_size, stat.st_mtime_ns]
+
+
+@contextmanager
+def build_lock(path):
+    """Exclusive cross-process lock so only one worker builds a given snapshot."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a+") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path, tables, arrays=None, meta=None):
+    """Write ``tables`` (name -> DataFrame) and ``arrays`` (name -> ndarray) to ``path``."""
+    blobs = []
+    header = {
+        "format_version": FORMAT_VERSION,
+        "meta": meta or {},
+        "tables": {},
+        "arrays": {},
+    }
+
+    def add_blob(values):
+        values = np.ascontiguousarray(values)
+        blobs.append(values)
+        return {"blob": len(blobs) - 1, "dtype": values.dtype.str, "shape": list(values.shape)}
+
+    for table_name, df in tables.items():
+        columns = []
+        for col in df.columns:
+            values, categories = columnar.encode_column(df[col])
+            columns.append({"name": col, "categories": categories, **add_blob(values)})
+        header["tables"][table_name] = {"rows": len(df), "columns": columns}
+    for name, values in (arrays or {}).items():
+        header["arrays"][name] = add_blob(values)
+
+    # Offsets are relative to the aligned start of the data section
+    entries = [c for t in header["tables"].values() for c in t["columns"]] + list(header["arrays"].values())
+    offset = 0
+    for entry in entries:
+        entry["offset"] = offset
+        offset = _aligned(offset + blobs[entry["blob"]].nbytes)
+    header_bytes = json.dumps(header, default=str).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for entry in entries:
+            f.seek(data_start + entry["offset"])
+            f.write(blobs[entry["blob"]].tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a loader snapshot")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    header["data_start"] = _aligned(len(MAGIC) + 8 + header_len)
+    return header
+
+
+def read_snapshot(path, expected_meta=None):
+    """
+    Map ``path`` and return (tables, arrays, meta), or None if the snapshot is
+    missing, malformed or its meta does not match ``expected_meta``.
+    """
+    try:
+        header = read_header(path)
+    except (OSError, ValueError):
+        return None
+    if header.get("format_version") != FORMAT_VERSION:
+        return None
+    if expected_meta is not None and header["meta"] != expected_meta:
+        return None
+
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def view(entry):
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"])) if entry["shape"] else 1
+        offset = header["data_start"] + entry["offset"]
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(entry["shape"])
+
+    tables = {}
+    for table_name, layout in header["tables"].items():
+        data = {c["name"]: columnar.decode_column(view(c), c["categories"]) for c in layout["columns"]}
+        tables[table_name] = pd.DataFrame(data, copy=False)
+    arrays = {name: view(entry) for name, entry in header["arrays"].items()}
+    return tables, arrays, header["meta"]
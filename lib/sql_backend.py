@@ -0,0 +1,550 @@
+"""
+SQLite storage backend for CrimeDataLoader.
+
+The database is built once from every era in config.HISTORICAL_FILES
+(normalized by lib.history) and indexed on address, occurred date and
+severity. Queries push filtering and grouping down into SQL, so only
+result rows are materialized in pandas. The public methods mirror
+CrimeDataLoader and return the same frame and dict shapes. Select it
+with DATA_BACKEND = "sqlite" in lib/config.py.
+
+Addresses are matched as substrings, like the pandas backend. The LIKE
+scan runs over the small distinct-address table, and the matching ids
+are then looked up through the index on crimes.address_id.
+
+Severity is stored per row at build time by (code_type, code) through the
+crosswalk, falling back to the offense description, exactly like
+lib.long_term and the pandas backend, so every view agrees on every era.
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from . import export
+from . import forecast
+from . import hotspots
+from . import incidents
+from . import near_repeat
+from .aggregates import RANKING_CHANNELS
+from .data_loader import (
+    CrimeDataLoader, SEVERITY_CATEGORIES, load_severity_dict, quarterly_series_frame, location_quarter_frame,
+    anomaly_frame, comparison_ranges, near_repeat_table, latest_complete_quarter, month_range, ranking_frame, summarize_by_address,
+    split_by_address
+)
+from .history import COMMON_COLUMNS, iter_history, write_dedup_report
+from .long_term import harmonized_severity, load_code_severity
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = ['ReportDate', 'OccurredFromDate', 'OccurredToDate']
+SQL_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+SELECT_COLUMNS = COMMON_COLUMNS + ['severity', 'era']
+# Rows without an incident number count as incidents of their own
+INCIDENT_KEY_SQL = "COALESCE(IncidentNumber, 'row:' || rowid)"
+# Address patterns escape LIKE wildcards with a backslash
+ADDRESS_LIKE_SQL = "LIKE ? ESCAPE '\\'"
+
+
+def _like_pattern(address):
+    """Substring LIKE pattern for ``address``; '%' and '_' in it match literally."""
+    escaped = address.upper().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _to_sql_dates(series):
+    return series.dt.strftime(SQL_DATE_FORMAT)
+
+
+def _count_sql(count, condition=None):
+    """SQL aggregate counting offense rows or distinct incidents, optionally only where ``condition`` holds."""
+    incidents.check_count_mode(count)
+    value = INCIDENT_KEY_SQL if count == 'incidents' else '1'
+    if condition is not None:
+        value = f"CASE WHEN {condition} THEN {value} END"
+    return f"COUNT(DISTINCT {value})" if count == 'incidents' else f"COUNT({value})"
+
+
+def build_sqlite_database(db_path=None, files=None, data_path=None, chunksize=200_000):
+    """(Re)build the SQLite database from the historical exports."""
+    db_path = str(db_path if db_path else config.SQLITE_DB_PATH)
+    tmp_path = f"{db_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    code_severity = load_code_severity()
+    description_severity = load_severity_dict()
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.execute("""
+            CREATE TABLE addresses (
+                address_id INTEGER PRIMARY KEY,
+                address_norm TEXT UNIQUE NOT NULL
+            )
+        """)
+        columns_sql = ", ".join(f'"{c}" TEXT' for c in SELECT_COLUMNS)
+        con.execute(f"CREATE TABLE crimes (address_id INTEGER, {columns_sql})")
+
+        address_ids = {}
+        dropped = []
+        for chunk in iter_history(files=files, data_path=data_path, chunksize=chunksize, dropped=dropped):
+            if len(chunk) == 0:
+                continue
+            chunk = chunk.copy()
+            codes = harmonized_severity(chunk, chunk['era'].iloc[0], code_severity, description_severity)
+            chunk['severity'] = np.asarray(SEVERITY_CATEGORIES, dtype=object)[codes]
+            norm = chunk['StreetAddress'].astype('string').str.upper().str.strip()
+            new_addresses = [a for a in norm.dropna().unique() if a not in address_ids]
+            for address in new_addresses:
+                address_ids[address] = len(address_ids) + 1
+            con.executemany("INSERT INTO addresses VALUES (?, ?)",
+                            [(address_ids[a], a) for a in new_addresses])
+            chunk['address_id'] = norm.map(address_ids)
+            for col in DATE_COLUMNS:
+                chunk[col] = _to_sql_dates(chunk[col])
+            chunk[['address_id'] + SELECT_COLUMNS].to_sql('crimes', con, if_exists='append', index=False)
+
+        con.execute("CREATE INDEX idx_crimes_address ON crimes (address_id, OccurredFromDate)")
+        con.execute("CREATE INDEX idx_crimes_occurred ON crimes (OccurredFromDate)")
+        con.execute("CREATE INDEX idx_crimes_severity ON crimes (severity, OccurredFromDate)")
+        con.execute("ANALYZE")
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, db_path)
+    report_path, n_dropped = write_dedup_report(dropped)
+    logger.info("Dropped %d out-of-range or duplicate rows (see %s)", n_dropped, report_path)
+    return db_path
+
+
+class SQLiteCrimeDataLoader:
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path if db_path else config.SQLITE_DB_PATH)
+        self.version = 0
+        self._local = threading.local()
+        # {connection: owning thread}
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        self._build_lock = threading.Lock()
+        self._forecast_models = None
+
+    def _is_stale(self):
+        if not os.path.exists(self.db_path):
+            return True
+        built = os.path.getmtime(self.db_path)
+        sources = [os.path.join(config.RAW_DATA_DIR, f) for f in config.HISTORICAL_FILES.values()]
+        sources.append(str(config.SEVERITY_CROSSWALK_PATH))
+        return any(os.path.exists(p) and os.path.getmtime(p) > built for p in sources)
+
+    def load_latest_data(self):
+        # Nothing is loaded into memory; make sure the database exists and is current
+        with self._build_lock:
+            if self._is_stale():
+                logger.info("Building %s", self.db_path)
+                build_sqlite_database(self.db_path)
+            self.version += 1
+            # Retire connections opened on the previous database file
+            self._generation += 1
+            # Refit here so dashboard reruns only evaluate the models
+            self._forecast_models = self._fit_forecasts()
+
+    def _connection(self):
+        # sqlite3 connections are per thread; open read-only ones lazily. A
+        # connection from before the last load is closed by its own thread,
+        # which is the only one that can be using it
+        con = getattr(self._local, 'con', None)
+        if con is not None and self._local.generation != self._generation:
+            self._forget(con)
+            con = None
+        if con is None:
+            if not os.path.exists(self.db_path):
+                self.load_latest_data()
+            con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.con = con
+            self._local.generation = self._generation
+            with self._connections_lock:
+                self._connections[con] = threading.current_thread()
+        return con
+
+    def _forget(self, con):
+        with self._connections_lock:
+            self._connections.pop(con, None)
+        con.close()
+
+    def close(self):
+        """
+        Retire every thread's connection; later queries reopen them. Only
+        connections no query can be using are closed here (this thread's and
+        those of exited threads); other threads close theirs on their next
+        query.
+        """
+        self._generation += 1
+        current = threading.current_thread()
+        with self._connections_lock:
+            retired = [con for con, thread in self._connections.items()
+                       if thread is current or not thread.is_alive()]
+        for con in retired:
+            self._forget(con)
+        if getattr(self._local, 'con', None) in retired:
+            self._local.con = None
+
+    def _query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    @staticmethod
+    def _where(start_date=None, end_date=None):
+        clauses = [f"address_id IN (SELECT address_id FROM addresses WHERE address_norm {ADDRESS_LIKE_SQL})"]
+        if start_date is not None and end_date is not None:
+            clauses.append("OccurredFromDate BETWEEN ? AND ?")
+        return " AND ".join(clauses)
+
+    @staticmethod
+    def _params(address, start_date=None, end_date=None):
+        params = [_like_pattern(address)]
+        if start_date is not None and end_date is not None:
+            params += [pd.to_datetime(start_date).strftime(SQL_DATE_FORMAT),
+                       pd.to_datetime(end_date).strftime(SQL_DATE_FORMAT)]
+        return params
+
+    @staticmethod
+    def _typed(df):
+        for col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], format=SQL_DATE_FORMAT, errors='coerce')
+        for col in ['Longitude', 'Latitude']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
+
+    def filter_by_address(self, address, count='offenses'):
+        incidents.check_count_mode(count)
+        columns = ", ".join(f'"{c}"' for c in SELECT_COLUMNS)
+        df = self._typed(self._query(f"SELECT {columns} FROM crimes WHERE {self._where()}", self._params(address)))
+        return self._incidents(df) if count == 'incidents' else df
+
+    @staticmethod
+    def _incidents(df):
+        # Same normalization as the pandas backend, over just the selected rows
+        df['severity'] = pd.Categorical(df['severity'], categories=SEVERITY_CATEGORIES)
+        arrays = incidents.build_incident_index(df['IncidentNumber'], df['severity'].cat.codes.to_numpy(),
+                                                len(SEVERITY_CATEGORIES))
+        return incidents.incident_frame(df, arrays, np.arange(len(df)), len(SEVERITY_CATEGORIES))
+
+    def filter_by_radius(self, longitude, latitude, radius_m, start_date=None, end_date=None, count='offenses'):
+        incidents.check_count_mode(count)
+        columns = ", ".join(f'"{c}"' for c in SELECT_COLUMNS)
+        # Bounding box in SQL, exact distance on the few rows it returns
+        lon_min, lon_max, lat_min, lat_max = near_repeat.radius_bounds(longitude, latitude, radius_m)
+        clauses = ["CAST(Longitude AS REAL) BETWEEN ? AND ?", "CAST(Latitude AS REAL) BETWEEN ? AND ?"]
+        params = [lon_min, lon_max, lat_min, lat_max]
+        if start_date is not None and end_date is not None:
+            clauses.append("OccurredFromDate BETWEEN ? AND ?")
+            params += [pd.to_datetime(start_date).strftime(SQL_DATE_FORMAT),
+                       pd.to_datetime(end_date).strftime(SQL_DATE_FORMAT)]
+        df = self._typed(self._query(f"SELECT {columns} FROM crimes WHERE {' AND '.join(clauses)}", params))
+        df = df[near_repeat.distance_m(df['Longitude'], df['Latitude'], longitude, latitude) <= radius_m]
+        df = df.reset_index(drop=True)
+        return self._incidents(df) if count == 'incidents' else df
+
+    def _counts(self, column, address):
+        df = self._query(
+            f'SELECT "{column}" AS value, COUNT(*) AS n FROM crimes WHERE {self._where()} '
+            f'AND "{column}" IS NOT NULL GROUP BY "{column}" ORDER BY n DESC',
+            self._params(address))
+        return dict(zip(df['value'], df['n'].astype(int)))
+
+    def get_crime_summary(self, address, count='offenses'):
+        if count == 'incidents':
+            # Incidents are classified by their most severe offense, which needs the rows
+            return CrimeDataLoader._summarize(self.filter_by_address(address, count))
+        totals = self._query(
+            f"SELECT COUNT(*) AS n, MIN(OccurredFromDate) AS earliest, MAX(OccurredToDate) AS latest "
+            f"FROM crimes WHERE {self._where()}", self._params(address)).iloc[0]
+        total = int(totals['n'])
+        return {
+            'total_crimes': total,
+            'crime_types': self._counts('NIBRS_Offense', address),
+            'location_types': self._counts('LocationType', address),
+            'date_range': {
+                'earliest': pd.to_datetime(totals['earliest']) if total > 0 else None,
+                'latest': pd.to_datetime(totals['latest']) if total > 0 else None
+            },
+            'firearm_involved': self._counts('FireArmInvolved', address)
+        }
+
+    def get_time_series_data(self, address, freq='M', count='offenses'):
+        if freq != 'M':
+            df = self.filter_by_address(address, count)
+            if len(df) == 0:
+                return pd.DataFrame()
+            counts = df.groupby(df['OccurredFromDate'].dt.to_period(freq)).size()
+            time_series = counts.rename_axis('month').reset_index(name='count')
+            time_series['month'] = time_series['month'].dt.to_timestamp()
+            return time_series
+        time_series = self._query(
+            f"SELECT substr(OccurredFromDate, 1, 7) AS month, {_count_sql(count)} AS count FROM crimes "
+            f"WHERE {self._where()} GROUP BY month ORDER BY month", self._params(address))
+        if len(time_series) == 0:
+            return pd.DataFrame()
+        time_series['month'] = pd.to_datetime(time_series['month'], format='%Y-%m')
+        return time_series
+
+    def get_quarterly_time_series_data(self, address, start_date=None, end_date=None, count='offenses'):
+        if start_date is not None and end_date is not None:
+            start_date = pd.to_datetime(start_date)
+            end_date = pd.to_datetime(end_date)
+        counts = self._query(
+            f"SELECT CAST(substr(OccurredFromDate, 1, 4) AS INTEGER) AS year, "
+            f"(CAST(substr(OccurredFromDate, 6, 2) AS INTEGER) + 2) / 3 AS q, {_count_sql(count)} AS count "
+            f"FROM crimes WHERE {self._where(start_date, end_date)} GROUP BY year, q",
+            self._params(address, start_date, end_date))
+        if len(counts) == 0 and self._query(
+                f"SELECT 1 FROM crimes WHERE {self._where()} LIMIT 1", self._params(address)).empty:
+            return pd.DataFrame()
+        quarters = pd.PeriodIndex.from_fields(year=counts['year'], quarter=counts['q'], freq='Q')
+        quarter_counts = pd.Series(counts['count'].to_numpy(), index=quarters)
+        return quarterly_series_frame(quarter_counts, start_date, end_date)
+
+    def get_period_comparison(self, address, start_date, end_date, count='offenses'):
+        ranges = comparison_ranges(start_date, end_date)
+        # One indexed scan of the location's rows, counted into all three ranges
+        columns = []
+        params = []
+        in_range = "OccurredFromDate >= ? AND OccurredFromDate < ?"
+        # An incident is high severity when any of its offenses is
+        high_in_range = in_range + " AND severity = 'High'"
+        for name, (start, end) in ranges.items():
+            bounds = [start.strftime(SQL_DATE_FORMAT), (end + pd.Timedelta(days=1)).strftime(SQL_DATE_FORMAT)]
+            columns.append(f"{_count_sql(count, in_range)} AS {name}_total")
+            columns.append(f"{_count_sql(count, high_in_range)} AS {name}_high")
+            params += bounds + bounds
+        row = self._query(f"SELECT {', '.join(columns)} FROM crimes WHERE {self._where()}",
+                          params + self._params(address)).iloc[0]
+        return {
+            name: {channel: int(row[f"{name}_{channel}"] or 0) for channel in ['total', 'high']}
+            for name in ranges
+        }
+
+    def location_levels(self):
+        # The database only keeps the columns common to every era
+        return ['address']
+
+    def get_anomalies(self, level='address', quarter=None, threshold=3.0, min_count=5, window=4):
+        if level not in self.location_levels():
+            raise ValueError(f"level must be one of {self.location_levels()}, not {level!r}")
+        quarter_sql = ("CAST(substr(OccurredFromDate, 1, 4) AS INTEGER) * 4 + "
+                       "(CAST(substr(OccurredFromDate, 6, 2) AS INTEGER) - 1) / 3")
+        if quarter is None:
+            last = self._query("SELECT MAX(OccurredFromDate) AS last FROM crimes").iloc[0]['last']
+            if last is None:
+                return pd.DataFrame()
+            last = pd.Timestamp(last)
+            quarter = latest_complete_quarter(last.year * 12 + last.month - 1)
+        else:
+            quarter = pd.Period(quarter, freq='Q')
+            quarter = quarter.year * 4 + quarter.quarter - 1
+
+        # Only the scored quarter and its baseline window are needed
+        first_quarter = quarter - window
+        counts = self._query(
+            f"SELECT c.address_id, a.address_norm, {quarter_sql} AS quarter, COUNT(*) AS n "
+            f"FROM crimes c JOIN addresses a ON a.address_id = c.address_id "
+            f"WHERE OccurredFromDate >= ? AND OccurredFromDate < ? GROUP BY c.address_id, quarter",
+            [f"{first_quarter // 4:04d}-{first_quarter % 4 * 3 + 1:02d}-01 00:00:00",
+             f"{(quarter + 1) // 4:04d}-{(quarter + 1) % 4 * 3 + 1:02d}-01 00:00:00"])
+        ids, group_codes = np.unique(counts['address_id'].to_numpy(), return_inverse=True)
+        names = counts.drop_duplicates('address_id').set_index('address_id')['address_norm'].reindex(ids)
+        matrix = np.zeros((len(ids), window + 1))
+        np.add.at(matrix, (group_codes, counts['quarter'].to_numpy() - first_quarter), counts['n'].to_numpy())
+        return anomaly_frame(names.to_numpy(), matrix, first_quarter, quarter, threshold, min_count, window)
+
+    def _fit_forecasts(self):
+        # Configured locations only; the database has no beat or neighborhood columns
+        counts = self.get_location_quarterly_counts(list(config.LOCATIONS))
+        if len(counts) == 0:
+            return pd.DataFrame()
+        last = pd.Timestamp(self._query("SELECT MAX(OccurredFromDate) AS last FROM crimes").iloc[0]['last'])
+        last_complete = latest_complete_quarter(last.year * 12 + last.month - 1)
+        first = counts['quarter'].min()
+        first_quarter = first.year * 4 + first.quarter - 1
+        totals = counts.groupby(['location', 'quarter'], sort=False)['count'].sum()
+        high = counts[counts['severity'] == 'High'].groupby(['location', 'quarter'], sort=False)['count'].sum()
+        n_quarters = counts['quarter'].nunique()
+        matrices = {
+            'total': totals.to_numpy().reshape(len(config.LOCATIONS), n_quarters),
+            'high': high.reindex(totals.index, fill_value=0).to_numpy().reshape(len(config.LOCATIONS), n_quarters),
+        }
+        return forecast.forecast_table('location', list(config.LOCATIONS), matrices, first_quarter, last_complete)
+
+    def get_forecasts(self, level='location', horizon=None):
+        if level != 'location':
+            raise ValueError("The SQLite backend only forecasts the configured locations")
+        if self._forecast_models is None:
+            self.load_latest_data()
+        return forecast.predict(self._forecast_models, horizon if horizon else config.FORECAST_HORIZON)
+
+    def get_quarterly_forecast(self, address, horizon=None):
+        if self._forecast_models is None:
+            self.load_latest_data()
+        models = self._forecast_models
+        if len(models) == 0:
+            return pd.DataFrame()
+        return forecast.predict(models[models['name'] == address], horizon if horizon else config.FORECAST_HORIZON)
+
+    def get_hotspot_surface(self, severities=None, start_date=None, end_date=None, bandwidth_m=250):
+        severities = severities if severities else [s for s in SEVERITY_CATEGORIES if s != 'Exclude']
+        lon_min, lon_max, lat_min, lat_max = config.HOTSPOT_BOUNDS
+        clauses = ["CAST(Longitude AS REAL) BETWEEN ? AND ?", "CAST(Latitude AS REAL) BETWEEN ? AND ?",
+                   f"severity IN ({', '.join('?' for _ in severities)})"]
+        params = [lon_min, lon_max, lat_min, lat_max] + list(severities)
+        if start_date is not None and end_date is not None:
+            # Whole months, like the pandas backend
+            clauses.append("OccurredFromDate >= ? AND OccurredFromDate < ?")
+            params += [pd.Timestamp(start_date).to_period('M').start_time.strftime(SQL_DATE_FORMAT),
+                       (pd.Timestamp(end_date).to_period('M') + 1).start_time.strftime(SQL_DATE_FORMAT)]
+        points = self._query(
+            f"SELECT CAST(Longitude AS REAL) AS lon, CAST(Latitude AS REAL) AS lat, severity FROM crimes "
+            f"WHERE {' AND '.join(clauses)}", params)
+        # Rasterize just this selection as a single base grid, then smooth it
+        arrays = hotspots.rasterize(points['lon'].to_numpy(), points['lat'].to_numpy(),
+                                    np.zeros(len(points), dtype=np.int64), np.zeros(len(points), dtype=np.int64), 1)
+        lon, lat = hotspots.cell_centers()
+        return {'lon': lon, 'lat': lat, 'density': hotspots.kde_surface(arrays, [0], 0, 0, bandwidth_m)}
+
+    def export_rows(self, address=None, start_date=None, end_date=None, fmt='csv', chunk_rows=None):
+        columns = ", ".join(f'"{c}"' for c in SELECT_COLUMNS)
+        if address:
+            where, params = self._where(start_date, end_date), self._params(address, start_date, end_date)
+        else:
+            where, params = "1", []
+            if start_date is not None and end_date is not None:
+                where = "OccurredFromDate BETWEEN ? AND ?"
+                params = [pd.to_datetime(start_date).strftime(SQL_DATE_FORMAT),
+                          pd.to_datetime(end_date).strftime(SQL_DATE_FORMAT)]
+        # The cursor streams result chunks; only one is in pandas at a time
+        chunks = pd.read_sql_query(
+            f"SELECT {columns} FROM crimes WHERE {where} ORDER BY OccurredFromDate", self._connection(),
+            params=params, chunksize=chunk_rows or export.EXPORT_CHUNK_ROWS)
+        return export.iter_export((self._typed(chunk) for chunk in chunks), fmt)
+
+    def get_near_repeat(self, offenses=None, start_date=None, end_date=None, distance_bands=None,
+                        time_bands=None, n_permutations=None, workers=None):
+        offenses = offenses if offenses else config.NEAR_REPEAT_OFFENSES
+        clauses = [f"NIBRS_Offense IN ({', '.join('?' for _ in offenses)})"]
+        params = list(offenses)
+        if start_date is not None and end_date is not None:
+            clauses.append("OccurredFromDate BETWEEN ? AND ?")
+            params += [pd.to_datetime(start_date).strftime(SQL_DATE_FORMAT),
+                       pd.to_datetime(end_date).strftime(SQL_DATE_FORMAT)]
+        events = self._query(
+            f"SELECT IncidentNumber, OccurredFromDate, CAST(Longitude AS REAL) AS Longitude, "
+            f"CAST(Latitude AS REAL) AS Latitude FROM crimes WHERE {' AND '.join(clauses)}", params)
+        events['OccurredFromDate'] = pd.to_datetime(events['OccurredFromDate'], format=SQL_DATE_FORMAT)
+        return near_repeat_table(events, distance_bands, time_bands, n_permutations, workers)
+
+    @staticmethod
+    def _targets(addresses):
+        # (position, LIKE pattern) rows for matching several addresses in one query
+        targets = " UNION ALL ".join("SELECT ? AS aid, ? AS pattern" for _ in addresses)
+        params = [p for i, a in enumerate(addresses) for p in (i, _like_pattern(a))]
+        return targets, params
+
+    def get_location_quarterly_counts(self, addresses, start_date=None, end_date=None):
+        addresses = list(addresses)
+        if not addresses:
+            return pd.DataFrame()
+        targets, params = self._targets(addresses)
+        date_clause = ""
+        if start_date is not None and end_date is not None:
+            # Widen to whole quarters, like the pandas backend
+            q_start = pd.Timestamp(start_date).to_period('Q')
+            q_end = pd.Timestamp(end_date).to_period('Q')
+            date_clause = "AND c.OccurredFromDate >= ? AND c.OccurredFromDate < ?"
+            params += [q_start.start_time.strftime(SQL_DATE_FORMAT),
+                       (q_end + 1).start_time.strftime(SQL_DATE_FORMAT)]
+        counts = self._query(
+            f"WITH targets AS ({targets}) "
+            f"SELECT t.aid AS aid, CAST(substr(c.OccurredFromDate, 1, 4) AS INTEGER) AS year, "
+            f"(CAST(substr(c.OccurredFromDate, 6, 2) AS INTEGER) + 2) / 3 AS q, "
+            f"c.severity AS severity, COUNT(*) AS n FROM targets t "
+            f"JOIN addresses a ON a.address_norm LIKE t.pattern ESCAPE '\\' "
+            f"JOIN crimes c ON c.address_id = a.address_id "
+            f"WHERE 1 = 1 {date_clause} GROUP BY aid, year, q, severity", params)
+        if start_date is None or end_date is None:
+            if len(counts) == 0:
+                return pd.DataFrame()
+            present = pd.PeriodIndex.from_fields(year=counts['year'], quarter=counts['q'], freq='Q')
+            q_start, q_end = present.min(), present.max()
+
+        quarters = pd.period_range(start=q_start, end=q_end, freq='Q')
+        result = np.zeros((len(addresses), len(quarters), len(SEVERITY_CATEGORIES)), dtype=np.int64)
+        quarter_pos = (counts['year'] * 4 + counts['q'] - 1) - (q_start.year * 4 + q_start.quarter - 1)
+        severity_pos = pd.Categorical(counts['severity'], categories=SEVERITY_CATEGORIES).codes
+        np.add.at(result, (counts['aid'].to_numpy(), quarter_pos.to_numpy(), severity_pos), counts['n'].to_numpy())
+        return location_quarter_frame(addresses, quarters, result)
+
+    def get_top_addresses(self, n=10, start_date=None, end_date=None, by='total'):
+        if by not in RANKING_CHANNELS:
+            raise ValueError(f"by must be one of {RANKING_CHANNELS}, not {by!r}")
+        if start_date is None or end_date is None:
+            bounds = self._query("SELECT MIN(OccurredFromDate) AS first, MAX(OccurredFromDate) AS last "
+                                 "FROM crimes").iloc[0]
+            if bounds['first'] is None:
+                return pd.DataFrame()
+            start_date, end_date = bounds['first'], bounds['last']
+        first_month, last_month = month_range(start_date, end_date)
+
+        def month_start(month):
+            return f"{month // 12:04d}-{month % 12 + 1:02d}-01 00:00:00"
+
+        channels = ("COUNT(*) AS total, SUM(severity = 'High') AS high, "
+                    "SUM(lower(trim(FireArmInvolved)) = 'yes') AS firearm")
+        ranked = self._query(
+            f"SELECT address_id, {channels} FROM crimes "
+            f"WHERE OccurredFromDate >= ? AND OccurredFromDate < ? AND address_id IS NOT NULL "
+            f"GROUP BY address_id HAVING {by} > 0 ORDER BY {by} DESC, address_id LIMIT ?",
+            [month_start(first_month), month_start(last_month + 1), int(n)])
+        if len(ranked) == 0:
+            return pd.DataFrame()
+
+        ids = ", ".join(str(int(i)) for i in ranked['address_id'])
+        last_quarter_start = last_month - last_month % 3
+        quarters = self._query(
+            f"SELECT address_id, OccurredFromDate >= ? AS current, {channels} FROM crimes "
+            f"WHERE address_id IN ({ids}) AND OccurredFromDate >= ? AND OccurredFromDate < ? "
+            f"GROUP BY address_id, current",
+            [month_start(last_quarter_start), month_start(last_quarter_start - 3),
+             month_start(last_quarter_start + 3)])
+        quarters = quarters.pivot(index='address_id', columns='current', values=by) \
+            .reindex(index=ranked['address_id'], columns=[0, 1]).fillna(0).astype(np.int64)
+        names = self._query(f"SELECT address_id, address_norm FROM addresses WHERE address_id IN ({ids})")
+        names = names.set_index('address_id')['address_norm'].reindex(ranked['address_id'])
+        return ranking_frame(names.to_numpy(), {c: ranked[c].to_numpy(dtype=np.int64) for c in RANKING_CHANNELS},
+                             quarters[1].to_numpy(), quarters[0].to_numpy())
+
+    def get_multiple_addresses_data(self, addresses):
+        # One query tags every matching row with its address id; summaries are one grouped pass
+        addresses = list(addresses)
+        if not addresses:
+            return {}
+        targets, params = self._targets(addresses)
+        columns = ", ".join(f'c."{col}"' for col in SELECT_COLUMNS)
+        tagged = self._query(
+            f"WITH targets AS ({targets}) "
+            f"SELECT t.aid AS _aid, {columns} FROM targets t "
+            f"JOIN addresses a ON a.address_norm LIKE t.pattern ESCAPE '\\' "
+            f"JOIN crimes c ON c.address_id = a.address_id ORDER BY t.aid, c.rowid", params)
+        address_ids = tagged.pop('_aid').to_numpy(dtype=np.int64)
+        for col in DATE_COLUMNS:
+            tagged[col] = pd.to_datetime(tagged[col], format=SQL_DATE_FORMAT, errors='coerce')
+        for col in ['Longitude', 'Latitude']:
+            tagged[col] = pd.to_numeric(tagged[col], errors='coerce')
+        summaries = summarize_by_address(tagged, address_ids, len(addresses))
+        frames = split_by_address(tagged, address_ids, addresses)
+        return {
+            address: {'data': frames[i].reset_index(drop=True), 'summary': summaries[i]}
+            for i, address in enumerate(addresses)
+        }
@@ -0,0 +1,61 @@
+"""
+Small precomputed overview summaries for the configured locations.
+
+The dashboard reads these on a cold start so the overview metrics can
+render before the full incident frame has finished loading. They are
+rewritten whenever the dataset is ingested or reloaded.
+"""
+import json
+import os
+
+import pandas as pd
+
+from . import config
+from .data_loader import day_range
+
+
+def build_location_summary(filtered_df):
+    """Overview numbers for a location's full available date range."""
+    if len(filtered_df) == 0:
+        return None
+    min_date = filtered_df['OccurredFromDate'].min()
+    max_date = filtered_df['OccurredFromDate'].max()
+    # The dashboard's default range: the whole first through last day
+    start_dt, end_dt = day_range(min_date, max_date)
+    in_range = filtered_df[(filtered_df['OccurredFromDate'] >= start_dt) &
+                           (filtered_df['OccurredFromDate'] <= end_dt)]
+    quarters = len(pd.period_range(start=start_dt.to_period('Q'), end=end_dt.to_period('Q'), freq='Q'))
+    total = len(in_range)
+    high = int((in_range['severity'] == 'High').sum())
+    return {
+        'min_date': min_date.isoformat(),
+        'max_date': max_date.isoformat(),
+        'total_crimes': total,
+        'total_high': high,
+        'quarters': quarters,
+        'avg_crimes_per_quarter': total / quarters if quarters else 0.0,
+        'avg_high_per_quarter': high / quarters if quarters else 0.0,
+    }
+
+
+def write_location_summaries(loader, addresses=None, path=None):
+    path = path if path else config.LOCATION_SUMMARIES_PATH
+    addresses = addresses if addresses else list(config.LOCATIONS)
+    summaries = {
+        address: build_location_summary(loader.filter_by_address(address))
+        for address in addresses
+    }
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': loader.version, 'locations': summaries}, f, indent=2)
+    os.replace(tmp_path, path)
+    return summaries
+
+
+def read_location_summary(address, path=None):
+    path = path if path else config.LOCATION_SUMMARIES_PATH
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['locations'].get(address)
+    except (OSError, ValueError, KeyError):
+        return None
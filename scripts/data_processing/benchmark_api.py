@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+
+DEFAULT_PATHS = [
+    f"/summary?address={config.DEFAULT_LOCATION}",
+    f"/quarterly?address={config.DEFAULT_LOCATION}",
+    f"/rows?address={config.DEFAULT_LOCATION}&limit=100",
+    "/top?n=20",
+    "/radius?lon=-84.388&lat=33.749&radius_m=500",
+]
+
+
+async def _request(reader, writer, host, path, etag=None):
+    lines = [f"GET {path.replace(' ', '%20')} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('etag')
+
+
+async def _client(url, paths, deadline, revalidate, latencies, statuses, offset):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    etags = {}
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        status, etag = await _request(reader, writer, parts.netloc, path, etags.get(path) if revalidate else None)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        if etag:
+            etags[path] = etag
+    writer.close()
+
+
+async def run(url, paths, connections, duration, revalidate):
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[_client(url, paths, deadline, revalidate, latencies, statuses, i)
+                           for i in range(connections)])
+    return np.array(latencies), statuses
+
+
+def main():
+    """Closed-loop keep-alive load generator for the query API (start serve_api.py first)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("paths", nargs="*", help="Request paths (default: a mix of every route)")
+    parser.add_argument("--url", default=f"http://{config.API_HOST}:{config.API_PORT}")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--revalidate", action="store_true", help="Send If-None-Match with the last ETag")
+    args = parser.parse_args()
+
+    latencies, statuses = asyncio.run(run(args.url, args.paths or DEFAULT_PATHS, args.connections,
+                                          args.duration, args.revalidate))
+    if len(latencies) == 0:
+        print("No requests completed")
+        return
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    print(f"{len(latencies)} requests in {args.duration:.0f}s: {len(latencies) / args.duration:.0f} req/s")
+    print(f"Latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {latencies.max() * 1000:.1f}")
+    print(f"Status: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.long_term import build_long_term_counts, write_long_term_counts
+
+
+def build_counts():
+    """Reduce every era to severity-harmonized quarterly counts for the long-term trend chart."""
+    print(f"Reading {len(config.HISTORICAL_FILES)} files...")
+    start = time.perf_counter()
+    counts = build_long_term_counts()
+    path = write_long_term_counts(counts)
+    size = Path(path).stat().st_size / 1024
+    print(f"Wrote {path} ({size:.0f} KB, {len(counts.addresses):,} addresses, "
+          f"{counts.n_quarters} quarters) in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    build_counts()
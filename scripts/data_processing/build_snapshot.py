@@ -0,0 +1,24 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.data_loader import CrimeDataLoader
+
+
+def build_snapshot():
+    """Prepare the loader state from the sources and write the startup snapshot."""
+    start = time.perf_counter()
+    loader = CrimeDataLoader()
+    data = loader._build_prepared(loader._read_source_frame())
+    loader.write_snapshot(data)
+    elapsed = time.perf_counter() - start
+
+    size = config.STARTUP_SNAPSHOT_PATH.stat().st_size / (1024 * 1024)
+    print(f"Wrote {config.STARTUP_SNAPSHOT_PATH} ({size:.1f} MB, {len(data.df):,} rows) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    build_snapshot()
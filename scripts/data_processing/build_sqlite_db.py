@@ -0,0 +1,23 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.sql_backend import build_sqlite_database
+
+
+def build_database():
+    """Build the indexed SQLite database used when DATA_BACKEND = "sqlite"."""
+    print(f"Building {config.SQLITE_DB_PATH} from {len(config.HISTORICAL_FILES)} files...")
+    print("This may take a few minutes...")
+    start = time.perf_counter()
+    db_path = build_sqlite_database()
+    size = Path(db_path).stat().st_size / (1024 * 1024)
+    print(f"Done in {time.perf_counter() - start:.0f}s ({size:.1f} MB)")
+    print(f"Dropped rows report: {config.HISTORY_DEDUP_REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    build_database()
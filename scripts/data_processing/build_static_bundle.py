@@ -0,0 +1,31 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.bundle import build_bundle
+from lib.data_loader import create_loader
+
+
+def main():
+    """Precompute per-location, per-quarter aggregates as gzip JSON for a static front end."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("addresses", nargs="*", help="Addresses to include (default: config.LOCATIONS)")
+    parser.add_argument("--output", default=str(config.STATIC_BUNDLE_DIR), help="Output directory")
+    args = parser.parse_args()
+
+    locations = {a: config.LOCATIONS.get(a, a) for a in args.addresses} if args.addresses else config.LOCATIONS
+    start = time.perf_counter()
+    loader = create_loader()
+    loader.load_latest_data()
+    index = build_bundle(loader, locations, args.output)
+    size = sum(f.stat().st_size for f in Path(args.output).rglob('*.json.gz'))
+    print(f"Wrote {len(index['locations'])} locations x {len(index['quarters'])} quarters "
+          f"({size / 1024:.0f} KiB) to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib.data_loader import create_loader
+from lib.export import available_formats
+
+
+def main():
+    """Stream crime rows for an address (or the whole city) and date range to a CSV or Parquet file."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("output", help="Output file")
+    parser.add_argument("--address", help="Address substring (default: every address)")
+    parser.add_argument("--start", help="Start date, e.g. 2021-01-01")
+    parser.add_argument("--end", help="End date, e.g. 2025-12-31")
+    parser.add_argument("--format", choices=available_formats(), help="Default: from the output file extension")
+    args = parser.parse_args()
+
+    fmt = args.format if args.format else Path(args.output).suffix.lstrip('.').lower()
+    start = time.perf_counter()
+    written = 0
+    with open(args.output, "wb") as f:
+        for chunk in create_loader().export_rows(args.address, args.start, args.end, fmt=fmt):
+            f.write(chunk)
+            written += len(chunk)
+    print(f"Wrote {args.output} ({written / (1024 * 1024):.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
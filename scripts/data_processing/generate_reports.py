@@ -0,0 +1,33 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.report import generate_reports
+
+
+def main():
+    """Write a static HTML dashboard report for every watched location."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("addresses", nargs="*", help="Addresses to report on (default: config.LOCATIONS)")
+    parser.add_argument("--output", default=str(config.REPORTS_DIR), help="Output directory")
+    parser.add_argument("--start", help="Start date, e.g. 2025-01-01 (default: first incident)")
+    parser.add_argument("--end", help="End date, e.g. 2025-12-31 (default: last incident)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    locations = {a: config.LOCATIONS.get(a, a) for a in args.addresses} if args.addresses else config.LOCATIONS
+    start = time.perf_counter()
+    paths = generate_reports(locations, args.output, args.start, args.end, workers=args.workers)
+    written = [p for p in paths.values() if p]
+    for address, path in paths.items():
+        if path is None:
+            print(f"No incidents for {address}; skipped")
+    print(f"Wrote {len(written)} reports to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
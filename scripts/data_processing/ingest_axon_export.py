@@ -0,0 +1,30 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib.data_loader import CrimeDataLoader
+from lib.ingest import ingest_export, find_latest_export
+from lib.summaries import write_location_summaries
+
+
+def main():
+    """Merge the newest Axon export into the columnar store, parsing only changed rows."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("export", nargs="?", help="Export CSV (default: newest AxonCrimeData_Export_view_*.csv)")
+    parser.add_argument("--full", action="store_true", help="Rebuild the store from scratch")
+    args = parser.parse_args()
+
+    export_path = Path(args.export) if args.export else find_latest_export()
+    print(f"Ingesting {export_path}...")
+    report = ingest_export(export_path, full=args.full)
+    print(report)
+
+    # Refresh the cold-start overview numbers shown while the dashboard loads
+    write_location_summaries(CrimeDataLoader())
+    print("Location summaries updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from lib import config
+from lib.api import serve
+
+
+def main():
+    """Serve the local JSON query API (needs uvicorn)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--concurrency", type=int, default=config.API_MAX_CONCURRENCY,
+                        help="Loader queries running at once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+// Clientside mode of src/dashboard.py (config.DASH_CLIENTSIDE): recomputes
+// the overview, severity chart, time-of-day chart, day/night split and
+// incident table from the per-day aggregates and row index in the
+// 'day-aggregates' store, so changing the date range never calls the server.
+
+(function () {
+    var SEVERITY_ORDER = ['High', 'Medium', 'Low'];
+    var SEVERITY_COLORS = {High: '#dc3545', Medium: '#fd7e14', Low: '#ffc107'};
+
+    // First index whose value is >= target (values sorted ascending)
+    function lowerBound(values, target) {
+        var lo = 0, hi = values.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (values[mid] < target) { lo = mid + 1; } else { hi = mid; }
+        }
+        return lo;
+    }
+
+    // First index whose value is > target
+    function upperBound(values, target) {
+        var lo = 0, hi = values.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (values[mid] <= target) { lo = mid + 1; } else { hi = mid; }
+        }
+        return lo;
+    }
+
+    function sum(values, lo, hi) {
+        var total = 0;
+        for (var i = lo; i < hi; i++) { total += values[i]; }
+        return total;
+    }
+
+    function quarterOf(day) {
+        return parseInt(day.slice(0, 4), 10) * 4 + Math.floor((parseInt(day.slice(5, 7), 10) - 1) / 3);
+    }
+
+    // Same as relativedelta(end, start) rendered as "X years, Y months"
+    function duration(start, end) {
+        var months = (parseInt(end.slice(0, 4), 10) - parseInt(start.slice(0, 4), 10)) * 12 +
+            parseInt(end.slice(5, 7), 10) - parseInt(start.slice(5, 7), 10);
+        if (end.slice(8, 10) < start.slice(8, 10)) { months -= 1; }
+        return Math.floor(months / 12) + ' years, ' + (months % 12) + ' months';
+    }
+
+    // Same as get_red_gradient_color in src/dashboard.py
+    function percentStyle(percent) {
+        var intensity = percent / 100;
+        var r = 254 - Math.floor(intensity * 115);
+        var g = 229 - Math.floor(intensity * 229);
+        return {color: 'rgb(' + r + ', ' + g + ', ' + g + ')', fontSize: '18px', fontWeight: 'bold'};
+    }
+
+    function emptyFigure() {
+        return {data: [], layout: {annotations: [{
+            text: 'No data available for selected filters', xref: 'paper', yref: 'paper',
+            x: 0.5, y: 0.5, showarrow: false
+        }]}};
+    }
+
+    // Sums the (day, key, count) triples whose day lies in [lo, hi)
+    function countTriples(days, keys, counts, lo, hi, size) {
+        var totals = new Array(size).fill(0);
+        for (var i = lowerBound(days, lo); i < days.length && days[i] < hi; i++) {
+            totals[keys[i]] += counts[i];
+        }
+        return totals;
+    }
+
+    function severityFigure(agg, lo, hi) {
+        var counts = countTriples(agg.offense_day, agg.offense, agg.offense_count, lo, hi, agg.offenses.length);
+        var traces = [];
+        var yOrder = [];
+        SEVERITY_ORDER.forEach(function (severity) {
+            var rows = [];
+            agg.offenses.forEach(function (pair, i) {
+                if (pair[1] === severity && counts[i] > 0) { rows.push([pair[0], counts[i]]); }
+            });
+            rows.sort(function (a, b) { return b[1] - a[1]; });
+            rows.forEach(function (row) { yOrder.push(row[0]); });
+            if (rows.length > 0) {
+                traces.push({
+                    type: 'bar', orientation: 'h', name: severity, legendgroup: severity,
+                    x: rows.map(function (row) { return row[1]; }),
+                    y: rows.map(function (row) { return row[0]; }),
+                    marker: {color: SEVERITY_COLORS[severity]},
+                    hovertemplate: 'Severity=' + severity + '<br>Count=%{x}<br>Crime Type=%{y}<extra></extra>'
+                });
+            }
+        });
+        return {data: traces, layout: {
+            title: {text: 'Crimes by Severity Group'},
+            height: 600,
+            barmode: 'relative',
+            showlegend: true,
+            legend: {title: {text: 'Severity'}, orientation: 'v', x: 1.02, y: 1},
+            xaxis: {title: {text: 'Count'}},
+            yaxis: {title: {text: 'Crime Type'}, categoryorder: 'array', categoryarray: yOrder, autorange: 'reversed'}
+        }};
+    }
+
+    function decoded(codes, values, i) {
+        return codes[i] >= 0 ? values[codes[i]] : null;
+    }
+
+    // Table records for row index positions [lo, hi), newest first
+    function tableRows(agg, lo, hi) {
+        var rows = [];
+        for (var i = hi - 1; i >= lo; i--) {
+            rows.push({
+                IncidentNumber: agg.row_incident[i],
+                OccurredFromDate: agg.days[agg.row_day[i]] + ' ' + agg.row_time[i],
+                NIBRS_Offense: decoded(agg.row_offense, agg.row_offenses, i),
+                LocationType: decoded(agg.row_location, agg.row_locations, i),
+                FireArmInvolved: decoded(agg.row_firearm, agg.row_firearms, i)
+            });
+        }
+        return rows;
+    }
+
+    function timeOfDayFigure(hours) {
+        var hourIndex = hours.map(function (_, i) { return i; });
+        return {data: [{
+            type: 'bar', x: hourIndex, y: hours,
+            marker: {color: hours, coloraxis: 'coloraxis'},
+            hovertemplate: 'Hour: %{x}:00<br>Crimes: %{y}<extra></extra>'
+        }], layout: {
+            title: {text: 'Crime by Time of Day'},
+            height: 400,
+            showlegend: false,
+            coloraxis: {colorscale: 'Reds', colorbar: {title: {text: 'Number of Crimes'}}},
+            xaxis: {title: {text: 'Hour of Day'}, tickmode: 'linear', tick0: 0, dtick: 2, tickformat: '%d:00'},
+            yaxis: {title: {text: 'Number of Crimes'}}
+        }};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            update: function (startDate, endDate, agg) {
+                var noUpdate = window.dash_clientside.no_update;
+                if (!agg) { return new Array(12).fill(noUpdate); }
+                var days = agg.days;
+                var start = startDate ? startDate.slice(0, 10) : (days[0] || '');
+                var end = endDate ? endDate.slice(0, 10) : (days[days.length - 1] || '');
+                // Day positions [lo, hi) inside the range; the end day is inclusive
+                var lo = lowerBound(days, start);
+                var hi = Math.max(lo, upperBound(days, end));
+                var total = sum(agg.total, lo, hi);
+                var high = sum(agg.high, lo, hi);
+                var nQuarters = Math.max(quarterOf(end) - quarterOf(start) + 1, 1);
+
+                var hours = countTriples(agg.hour_day, agg.hour, agg.hour_count, lo, hi, 24);
+                var dayCrimes = sum(hours, 5, 17);
+                var withTime = sum(hours, 0, 24);
+                var dayPercent = withTime > 0 ? Math.round(dayCrimes / withTime * 1000) / 10 : 0;
+                var nightPercent = withTime > 0 ? Math.round((withTime - dayCrimes) / withTime * 1000) / 10 : 0;
+
+                return [
+                    duration(start, end),
+                    total.toLocaleString('en-US'),
+                    high.toLocaleString('en-US'),
+                    (high / nQuarters).toFixed(1),
+                    (total / nQuarters).toFixed(1),
+                    total > 0 ? severityFigure(agg, lo, hi) : emptyFigure(),
+                    total > 0 ? timeOfDayFigure(hours) : emptyFigure(),
+                    dayPercent + '%',
+                    percentStyle(dayPercent),
+                    nightPercent + '%',
+                    percentStyle(nightPercent),
+                    tableRows(agg, lowerBound(agg.row_day, lo), lowerBound(agg.row_day, hi))
+                ];
+            }
+        }
+    });
+})();
@@ -5,14 +5,14 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 import dash
 from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, ClientsideFunction
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
-import os
 from datetime import datetime, timedelta
-from data_loader import CrimeDataLoader
+from lib.data_loader import CrimeDataLoader, day_range
 from dateutil.relativedelta import relativedelta
 from config import config
 
@@ -22,6 +22,216 @@ loader = CrimeDataLoader()
 loader.load_latest_data()
 
 PRIMARY_ADDRESS = config.PRIMARY_ADDRESS
+CLIENTSIDE = config.DASH_CLIENTSIDE
+
+# (id suffix, label, color) for the overview row
+OVERVIEW_METRICS = [
+    ('duration', 'Duration', '#2c3e50'),
+    ('total', 'Total Crimes', '#e74c3c'),
+    ('high', 'High Severity Crimes', '#dc3545'),
+    ('avg-high', 'Avg High Severity Crimes per Quarter', '#fd7e14'),
+    ('avg-total', 'Avg Crimes per Quarter', '#3498db'),
+]
+
+
+# Function to get red gradient color based on percentage (mirrored in assets/clientside.js)
+def get_red_gradient_color(percent):
+    # Map 0-100% to gradient from light to dark red
+    intensity = percent / 100
+    # Using RGB interpolation for smooth gradient
+    r = 254 - int(intensity * 115)  # 254 to 139
+    g = 229 - int(intensity * 229)  # 229 to 0
+    b = 229 - int(intensity * 229)  # 229 to 0
+    return f'rgb({r}, {g}, {b})'
+
+
+def empty_figure(text="No data available for selected filters"):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=text,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    return fig
+
+
+def overview_layout(values):
+    """Overview metrics row; ``values`` are the display strings in OVERVIEW_METRICS order."""
+    return html.Div([
+        html.Div([
+            html.Div([
+                html.H3(value, id=f'overview-{key}', style={'margin': '0', 'color': color}),
+                html.P(label, style={'margin': '0', 'color': '#6c757d'})
+            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'})
+            for (key, label, color), value in zip(OVERVIEW_METRICS, values)
+        ])
+    ])
+
+
+def percent_style(percent):
+    return {'color': get_red_gradient_color(percent), 'fontSize': '18px', 'fontWeight': 'bold'}
+
+
+def time_stats_layout(day_percent, night_percent):
+    return html.Div([
+        html.Span([
+            html.B('Day (5am-5pm): ', style={'color': 'black'}),
+            html.Span(f'{day_percent}%', id='day-percent', style=percent_style(day_percent))
+        ]),
+        html.Span(' | ', style={'margin': '0 10px', 'color': '#6c757d'}),
+        html.Span([
+            html.B('Night (5pm-5am): ', style={'color': 'black'}),
+            html.Span(f'{night_percent}%', id='night-percent', style=percent_style(night_percent))
+        ])
+    ])
+
+
+def time_series_figure(time_data):
+    if len(time_data) == 0:
+        return empty_figure("Insufficient data for time series")
+    time_series_fig = go.Figure()
+    time_series_fig.add_trace(go.Scatter(
+        x=time_data['quarter_date'],
+        y=time_data['count'],
+        mode='lines+markers',
+        name='Crimes',
+        line=dict(color='#e74c3c', width=2),
+        marker=dict(size=8),
+        text=time_data['quarter_label'],
+        customdata=time_data[['quarter_label', 'count']],
+        hovertemplate='<b>%{customdata[0]}</b><br>' +
+                     'Crimes: %{customdata[1]}<br>' +
+                     '<extra></extra>'
+    ))
+    time_series_fig.update_layout(
+        title="Crime Trends Over Time (Quarterly)",
+        xaxis_title="Quarter",
+        yaxis_title="Number of Crimes",
+        height=400,
+        xaxis=dict(
+            tickmode='array',
+            tickvals=time_data['quarter_date'],
+            ticktext=time_data['quarter_label'],
+            tickangle=-45
+        ),
+        hovermode='x unified'
+    )
+    return time_series_fig
+
+
+def filter_days(df, start_date, end_date):
+    """Rows of ``df`` on days start_date..end_date; the end day is inclusive, as in assets/clientside.js."""
+    if not (start_date and end_date):
+        return df
+    start_dt, end_dt = day_range(start_date, end_date)
+    return df.loc[(df['OccurredFromDate'] >= start_dt) & (df['OccurredFromDate'] <= end_dt)]
+
+
+# Incident table columns; the clientside row index in day_aggregates carries the same ones
+TABLE_COLUMNS = ['IncidentNumber', 'OccurredFromDate', 'NIBRS_Offense', 'LocationType', 'FireArmInvolved']
+
+
+def table_order(filtered_df):
+    """Row positions oldest first (stable); the table shows them in reverse."""
+    return np.argsort(filtered_df['OccurredFromDate'].to_numpy(), kind='stable')
+
+
+def table_records(filtered_df):
+    table_df = filtered_df[TABLE_COLUMNS].iloc[table_order(filtered_df)[::-1]]
+    table_df = table_df.assign(OccurredFromDate=table_df['OccurredFromDate'].dt.strftime('%Y-%m-%d %H:%M'))
+    # Categories become plain values so the records serialize to JSON
+    return table_df.astype(object).where(table_df.notna(), None).to_dict('records')
+
+
+def _dictionary(series):
+    """(codes, values) for a column; missing values get code -1."""
+    codes, values = pd.factorize(series.astype(object))
+    return codes.tolist(), [str(v) for v in values]
+
+
+def crime_table(records):
+    return dash_table.DataTable(
+        id='crime-table',
+        data=records,
+        columns=[
+            {'name': 'Incident #', 'id': 'IncidentNumber'},
+            {'name': 'Date/Time', 'id': 'OccurredFromDate'},
+            {'name': 'Crime Type', 'id': 'NIBRS_Offense'},
+            {'name': 'Location Type', 'id': 'LocationType'},
+            {'name': 'Firearm', 'id': 'FireArmInvolved'}
+        ],
+        virtualization=True,
+        style_cell={'textAlign': 'left', 'padding': '10px'},
+        style_header={'backgroundColor': '#3498db', 'color': 'white', 'fontWeight': 'bold'},
+        style_data_conditional=[
+            {
+                'if': {'row_index': 'odd'},
+                'backgroundColor': '#f8f9fa'
+            },
+            {
+                'if': {'column_id': 'FireArmInvolved', 'filter_query': '{FireArmInvolved} = yes'},
+                'backgroundColor': '#ffcccc'
+            }
+        ],
+        style_table={
+            'height': '500px',
+            'overflowY': 'auto'
+        },
+        sort_action='native',
+        filter_action='native'
+    )
+
+
+def day_aggregates(filtered_df):
+    """
+    Everything the clientside callback needs, aggregated per day: daily
+    total and high-severity counts, and (day, key, count) triples for
+    offense x severity and hour of day. Days are ISO date strings in
+    ascending order; triples are sorted by day.
+
+    The incident table comes from a compact row index ('row_*'): rows
+    oldest first with their day position and HH:MM time, and the text
+    columns dictionary-encoded, so a date range is one slice in the browser.
+    """
+    day_codes, days = pd.factorize(filtered_df['OccurredFromDate'].dt.normalize(), sort=True)
+    n_days = len(days)
+    severity = filtered_df['severity'].astype(str).to_numpy()
+
+    keep = (severity != 'Exclude') & filtered_df['NIBRS_Offense'].notna().to_numpy()
+    pairs = pd.MultiIndex.from_arrays([filtered_df['NIBRS_Offense'].astype(str).to_numpy()[keep], severity[keep]])
+    pair_codes, pair_values = pd.factorize(pairs)
+    n_pairs = max(len(pair_values), 1)
+    offense_keys, offense_counts = np.unique(day_codes[keep].astype(np.int64) * n_pairs + pair_codes,
+                                             return_counts=True)
+    hour_keys, hour_counts = np.unique(day_codes.astype(np.int64) * 24 + filtered_df['OccurredFromDate'].dt.hour.to_numpy(),
+                                       return_counts=True)
+    return {
+        'days': [d.strftime('%Y-%m-%d') for d in days],
+        'total': np.bincount(day_codes, minlength=n_days).tolist(),
+        'high': np.bincount(day_codes[severity == 'High'], minlength=n_days).tolist(),
+        'offenses': [list(pair) for pair in pair_values],
+        'offense_day': (offense_keys // n_pairs).tolist(),
+        'offense': (offense_keys % n_pairs).tolist(),
+        'offense_count': offense_counts.tolist(),
+        'hour_day': (hour_keys // 24).tolist(),
+        'hour': (hour_keys % 24).tolist(),
+        'hour_count': hour_counts.tolist(),
+        **row_index(filtered_df, day_codes),
+    }
+
+
+def row_index(filtered_df, day_codes):
+    order = table_order(filtered_df)
+    rows = filtered_df.iloc[order]
+    index = {
+        'row_day': day_codes[order].tolist(),
+        'row_time': rows['OccurredFromDate'].dt.strftime('%H:%M').tolist(),
+        'row_incident': rows['IncidentNumber'].astype(object).where(rows['IncidentNumber'].notna(), None).tolist(),
+    }
+    for key, col in [('offense', 'NIBRS_Offense'), ('location', 'LocationType'), ('firearm', 'FireArmInvolved')]:
+        index[f'row_{key}'], index[f'row_{key}s'] = _dictionary(rows[col])
+    return index
+
 
 app.layout = html.Div([
     html.Div([
@@ -32,7 +242,7 @@ app.layout = html.Div([
     html.Div([
         html.Div([
             html.H4("Overview Statistics", style={'color': '#2c3e50'}),
-            html.Div(id='overview-stats')
+            html.Div(id='overview-stats', children=overview_layout([''] * len(OVERVIEW_METRICS)) if CLIENTSIDE else None)
         ], style={'width': '100%', 'padding': '20px', 'backgroundColor': 'white', 
                   'borderRadius': '10px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'})
     ], style={'padding': '10px'}),
@@ -115,12 +325,15 @@ app.layout = html.Div([
     
     html.Div([
         html.Div([
-            dcc.Graph(id='time-series-chart')
+            dcc.Graph(id='time-series-chart',
+                      # Not date filtered, so clientside mode draws it once on the server
+                      figure=time_series_figure(loader.get_quarterly_time_series_data(PRIMARY_ADDRESS))
+                      if CLIENTSIDE else None)
         ], style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}),
         
         html.Div([
             dcc.Graph(id='time-of-day-chart'),
-            html.Div(id='time-stats-box', style={
+            html.Div(id='time-stats-box', children=time_stats_layout(0, 0) if CLIENTSIDE else None, style={
                 'backgroundColor': '#f8f9fa',
                 'borderRadius': '8px',
                 'padding': '10px',
@@ -134,38 +347,41 @@ app.layout = html.Div([
     html.Div([
         html.Div([
             html.H4("Crime Details", style={'color': '#2c3e50', 'padding': '10px'}),
-            html.Div(id='crime-table-container', style={'paddingBottom': '50px'})
+            html.Div(id='crime-table-container', children=crime_table([]) if CLIENTSIDE else None,
+                     style={'paddingBottom': '50px'})
         ], style={'padding': '10px', 'backgroundColor': 'white', 
                   'borderRadius': '10px', 'margin': '20px', 'marginBottom': '80px'})
-    ])
+    ]),
+
+    # Shipped once with the page; the browser filters it on every date change
+    dcc.Store(id='day-aggregates', data=day_aggregates(loader.filter_by_address(PRIMARY_ADDRESS)) if CLIENTSIDE else None)
 ], style={'backgroundColor': '#f5f5f5', 'minHeight': '100vh'})
 
-@app.callback(
-    [Output('overview-stats', 'children'),
-     Output('crime-severity-grouped-chart', 'figure'),
-     Output('time-series-chart', 'figure'),
-     Output('time-of-day-chart', 'figure'),
-     Output('time-stats-box', 'children'),
-     Output('crime-table-container', 'children')],
-    [Input('date-range-picker', 'start_date'),
-     Input('date-range-picker', 'end_date')]
-)
+if CLIENTSIDE:
+    # assets/clientside.js; recomputes every date-filtered output in the browser
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='update'),
+        [Output(f'overview-{key}', 'children') for key, _, _ in OVERVIEW_METRICS] +
+        [Output('crime-severity-grouped-chart', 'figure'),
+         Output('time-of-day-chart', 'figure'),
+         Output('day-percent', 'children'),
+         Output('day-percent', 'style'),
+         Output('night-percent', 'children'),
+         Output('night-percent', 'style'),
+         Output('crime-table', 'data')],
+        [Input('date-range-picker', 'start_date'),
+         Input('date-range-picker', 'end_date'),
+         Input('day-aggregates', 'data')]
+    )
+
+
 def update_dashboard(start_date, end_date):
-    filtered_df = loader.filter_by_address(PRIMARY_ADDRESS)
-    
-    if start_date and end_date:
-        mask = (filtered_df['OccurredFromDate'] >= start_date) & (filtered_df['OccurredFromDate'] <= end_date)
-        filtered_df = filtered_df.loc[mask]
+    filtered_df = filter_days(loader.filter_by_address(PRIMARY_ADDRESS), start_date, end_date)
     
     total_crimes = len(filtered_df)
     
     if total_crimes == 0:
-        empty_fig = go.Figure()
-        empty_fig.add_annotation(
-            text="No data available for selected filters",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
+        empty_fig = empty_figure()
         
         overview = html.Div([
             html.P(f"Total Crimes: 0", style={'fontSize': '18px', 'fontWeight': 'bold'})
@@ -173,24 +389,15 @@ def update_dashboard(start_date, end_date):
         
         return overview, empty_fig, empty_fig, empty_fig, html.Div("No data available"), html.Div("No crimes found for this period")
     
-    # Map offenses to severity using crosswalk and create filtered_df_for_severity
-    crosswalk_path = str(config.SEVERITY_CROSSWALK_PATH)
-    if os.path.exists(crosswalk_path):
-        severity_crosswalk = pd.read_csv(crosswalk_path)
-        severity_dict = dict(zip(
-            severity_crosswalk['offense_description'],
-            severity_crosswalk['severity']
-        ))
-    else:
-        severity_dict = {}
+    # Severity is mapped from the crosswalk by the loader; create filtered_df_for_severity
     filtered_df = filtered_df.copy()
-    filtered_df['severity'] = filtered_df['NIBRS_Offense'].map(severity_dict)
-    filtered_df['severity'] = filtered_df['severity'].fillna('Low')
     filtered_df_for_severity = filtered_df[filtered_df['severity'] != 'Exclude']
 
     # Compute dynamic overview metrics based on selected date range
-    start_dt = pd.to_datetime(start_date) if start_date else filtered_df['OccurredFromDate'].min()
-    end_dt = pd.to_datetime(end_date) if end_date else filtered_df['OccurredFromDate'].max()
+    if start_date and end_date:
+        start_dt, end_dt = day_range(start_date, end_date)
+    else:
+        start_dt, end_dt = filtered_df['OccurredFromDate'].min(), filtered_df['OccurredFromDate'].max()
     # Duration in years and months
     rd = relativedelta(end_dt, start_dt)
     duration_str = f"{rd.years} years, {rd.months} months"
@@ -216,48 +423,16 @@ def update_dashboard(start_date, end_date):
     avg_high_per_quarter = float(high_counts.mean()) if len(high_counts) > 0 else 0.0
 
     # Build overview UI
-    overview = html.Div([
-        html.Div([
-            html.Div([
-                html.H3(duration_str, style={'margin': '0', 'color': '#2c3e50'}),
-                html.P("Duration", style={'margin': '0', 'color': '#6c757d'})
-            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'}),
-            html.Div([
-                html.H3(f"{total_crimes:,}", style={'margin': '0', 'color': '#e74c3c'}),
-                html.P("Total Crimes", style={'margin': '0', 'color': '#6c757d'})
-            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'}),
-            html.Div([
-                html.H3(f"{total_high:,}", style={'margin': '0', 'color': '#dc3545'}),
-                html.P("High Severity Crimes", style={'margin': '0', 'color': '#6c757d'})
-            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'}),
-            html.Div([
-                html.H3(f"{avg_high_per_quarter:.1f}", style={'margin': '0', 'color': '#fd7e14'}),
-                html.P("Avg High Severity Crimes per Quarter", style={'margin': '0', 'color': '#6c757d'})
-            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'}),
-            html.Div([
-                html.H3(f"{avg_crimes_per_quarter:.1f}", style={'margin': '0', 'color': '#3498db'}),
-                html.P("Avg Crimes per Quarter", style={'margin': '0', 'color': '#6c757d'})
-            ], style={'textAlign': 'center', 'width': '20%', 'display': 'inline-block'})
-        ])
-    ])
+    overview = overview_layout([duration_str, f"{total_crimes:,}", f"{total_high:,}",
+                                f"{avg_high_per_quarter:.1f}", f"{avg_crimes_per_quarter:.1f}"])
     
     # Removed "Top Crime Types" chart
     
-    # Function to get red gradient color based on percentage
-    def get_red_gradient_color(percent):
-        # Map 0-100% to gradient from light to dark red
-        intensity = percent / 100
-        # Using RGB interpolation for smooth gradient
-        r = 254 - int(intensity * 115)  # 254 to 139
-        g = 229 - int(intensity * 229)  # 229 to 0
-        b = 229 - int(intensity * 229)  # 229 to 0
-        return f'rgb({r}, {g}, {b})'
-    
     # Create severity-grouped chart listing all offenses, grouped by severity
     severity_order = ['High', 'Medium', 'Low']
     offense_counts_df = (
         filtered_df_for_severity
-        .groupby(['severity', 'NIBRS_Offense'])
+        .groupby(['severity', 'NIBRS_Offense'], observed=True)
         .size()
         .reset_index(name='count')
     )
@@ -338,99 +513,25 @@ def update_dashboard(start_date, end_date):
     )
     
     # Create the statistics box content
-    time_stats = html.Div([
-        html.Span([
-            html.B('Day (5am-5pm): ', style={'color': 'black'}),
-            html.Span(f'{day_percent}%', style={
-                'color': get_red_gradient_color(day_percent),
-                'fontSize': '18px',
-                'fontWeight': 'bold'
-            })
-        ]),
-        html.Span(' | ', style={'margin': '0 10px', 'color': '#6c757d'}),
-        html.Span([
-            html.B('Night (5pm-5am): ', style={'color': 'black'}),
-            html.Span(f'{night_percent}%', style={
-                'color': get_red_gradient_color(night_percent),
-                'fontSize': '18px',
-                'fontWeight': 'bold'
-            })
-        ])
-    ])
-    
-    time_data = loader.get_quarterly_time_series_data(PRIMARY_ADDRESS)
-    if len(time_data) > 0:
-        time_series_fig = go.Figure()
-        time_series_fig.add_trace(go.Scatter(
-            x=time_data['quarter_date'],
-            y=time_data['count'],
-            mode='lines+markers',
-            name='Crimes',
-            line=dict(color='#e74c3c', width=2),
-            marker=dict(size=8),
-            text=time_data['quarter_label'],
-            customdata=time_data[['quarter_label', 'count']],
-            hovertemplate='<b>%{customdata[0]}</b><br>' +
-                         'Crimes: %{customdata[1]}<br>' +
-                         '<extra></extra>'
-        ))
-        time_series_fig.update_layout(
-            title="Crime Trends Over Time (Quarterly)",
-            xaxis_title="Quarter",
-            yaxis_title="Number of Crimes",
-            height=400,
-            xaxis=dict(
-                tickmode='array',
-                tickvals=time_data['quarter_date'],
-                ticktext=time_data['quarter_label'],
-                tickangle=-45
-            ),
-            hovermode='x unified'
-        )
-    else:
-        time_series_fig = go.Figure()
-        time_series_fig.add_annotation(
-            text="Insufficient data for time series",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
+    time_stats = time_stats_layout(day_percent, night_percent)
     
-    table_df = filtered_df[['IncidentNumber', 'OccurredFromDate', 'NIBRS_Offense', 
-                            'LocationType', 'FireArmInvolved']].copy()
-    table_df['OccurredFromDate'] = table_df['OccurredFromDate'].dt.strftime('%Y-%m-%d %H:%M')
-    table_df = table_df.sort_values('OccurredFromDate', ascending=False)
+    time_series_fig = time_series_figure(loader.get_quarterly_time_series_data(PRIMARY_ADDRESS))
+    crime_table_div = crime_table(table_records(filtered_df))
     
-    crime_table = dash_table.DataTable(
-        data=table_df.to_dict('records'),
-        columns=[
-            {'name': 'Incident #', 'id': 'IncidentNumber'},
-            {'name': 'Date/Time', 'id': 'OccurredFromDate'},
-            {'name': 'Crime Type', 'id': 'NIBRS_Offense'},
-            {'name': 'Location Type', 'id': 'LocationType'},
-            {'name': 'Firearm', 'id': 'FireArmInvolved'}
-        ],
-        virtualization=True,
-        style_cell={'textAlign': 'left', 'padding': '10px'},
-        style_header={'backgroundColor': '#3498db', 'color': 'white', 'fontWeight': 'bold'},
-        style_data_conditional=[
-            {
-                'if': {'row_index': 'odd'},
-                'backgroundColor': '#f8f9fa'
-            },
-            {
-                'if': {'column_id': 'FireArmInvolved', 'filter_query': '{FireArmInvolved} = yes'},
-                'backgroundColor': '#ffcccc'
-            }
-        ],
-        style_table={
-            'height': '500px',
-            'overflowY': 'auto'
-        },
-        sort_action='native',
-        filter_action='native'
-    )
-    
-    return overview, severity_grouped_fig, time_series_fig, time_of_day_fig, time_stats, crime_table
+    return overview, severity_grouped_fig, time_series_fig, time_of_day_fig, time_stats, crime_table_div
+
+
+if not CLIENTSIDE:
+    app.callback(
+        [Output('overview-stats', 'children'),
+         Output('crime-severity-grouped-chart', 'figure'),
+         Output('time-series-chart', 'figure'),
+         Output('time-of-day-chart', 'figure'),
+         Output('time-stats-box', 'children'),
+         Output('crime-table-container', 'children')],
+        [Input('date-range-picker', 'start_date'),
+         Input('date-range-picker', 'end_date')]
+    )(update_dashboard)
 
 if __name__ == '__main__':
     print(f"Starting dashboard for {PRIMARY_ADDRESS}...")
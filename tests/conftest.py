@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path to import lib
+sys.path.append(str(Path(__file__).parent.parent))
+from lib import config
+
+EXPORT_FILE = "AxonCrimeData_Export_view_1.csv"
+ADDRESSES = ["234 MEMORIAL DR SW", "277 MORELAND AVE SE", "265 KIRKWOOD RD NE", "10 PEACHTREE ST NE"]
+OFFENSES = ["Aggravated Assault", "Simple Assault", "Burglary/Breaking & Entering", "Robbery"]
+
+
+def make_export(n=300, seed=0, start="2022-01-01", days=730):
+    """Small synthetic Axon export, every column as text like read_crime_export returns it."""
+    rng = np.random.default_rng(seed)
+    occurred = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    return pd.DataFrame({
+        "IncidentNumber": [f"{23000000 + i}" for i in range(n)],
+        "FireArmInvolved": rng.choice(["yes", "no"], n),
+        "ReportDate": (occurred + pd.Timedelta(hours=3)).strftime(config.DATE_FORMAT),
+        "OccurredFromDate": occurred.strftime(config.DATE_FORMAT),
+        "OccurredToDate": (occurred + pd.Timedelta(hours=1)).strftime(config.DATE_FORMAT),
+        "NibrsUcrCode": rng.choice(["13A", "13B", "220"], n),
+        "NIBRS_Offense": rng.choice(OFFENSES, n),
+        "StreetAddress": rng.choice(ADDRESSES, n),
+        "LocationType": rng.choice(["Street", "Parking Lot"], n),
+        "Longitude": (-84.39 + rng.normal(0, 0.01, n)).astype(str),
+        "Latitude": (33.75 + rng.normal(0, 0.01, n)).astype(str),
+    })
+
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    """Point every data path in lib.config at a scratch directory."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    monkeypatch.setattr(config, "RAW_DATA_DIR", str(raw_dir))
+    monkeypatch.setattr(config, "STORE_DIR", tmp_path / "store")
+    monkeypatch.setattr(config, "STARTUP_SNAPSHOT_PATH", tmp_path / "loader_snapshot.bin")
+    monkeypatch.setattr(config, "USE_SHARED_MEMORY", False)
+    monkeypatch.setattr(config, "SQLITE_DB_PATH", tmp_path / "crime_data.sqlite")
+    monkeypatch.setattr(config, "HISTORY_DEDUP_REPORT_PATH", tmp_path / "history_dedup_report.csv")
+    monkeypatch.setattr(config, "LOCATION_SUMMARIES_PATH", tmp_path / "location_summaries.json")
+    monkeypatch.setattr(config, "LATEST_DATA_FILE", EXPORT_FILE)
+    monkeypatch.setattr(config, "HISTORICAL_FILES", {"2021-2025": EXPORT_FILE})
+    return tmp_path
+
+
+@pytest.fixture
+def export_path(data_dirs):
+    path = Path(config.RAW_DATA_DIR) / EXPORT_FILE
+    make_export().to_csv(path, index=False)
+    return path
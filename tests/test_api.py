@@ -0,0 +1,90 @@
+import asyncio
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from lib import config
+from lib.api import QueryAPI
+from lib.reload import DatasetWatcher
+
+
+@pytest.fixture
+def app(export_path, monkeypatch):
+    monkeypatch.setattr(config, "USE_COLUMNAR_STORE", False)
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", False)
+    return QueryAPI(watcher=DatasetWatcher())
+
+
+def call(app, path, query='', method='GET', headers=()):
+    """Run one request through the ASGI app; returns (status, headers, body messages)."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+             'headers': list(headers)}
+    asyncio.run(app(scope, None, send))
+    start = messages[0]
+    assert start['type'] == 'http.response.start'
+    assert [m['type'] for m in messages[1:]] == ['http.response.body'] * (len(messages) - 1)
+    return start['status'], dict(start['headers']), messages[1:]
+
+
+def body(messages):
+    return b''.join(m['body'] for m in messages)
+
+
+def test_etag_revalidation_returns_304(app):
+    status, headers, messages = call(app, '/summary', 'address=234 MEMORIAL')
+    assert status == 200
+    assert json.loads(body(messages))['total_crimes'] > 0
+    etag = headers[b'etag']
+
+    status, headers, messages = call(app, '/summary', 'address=234 MEMORIAL', headers=[(b'if-none-match', etag)])
+    assert status == 304
+    assert body(messages) == b''
+    # Parameter order does not change the ETag
+    status, other, _ = call(app, '/rows', 'limit=5&address=MEMORIAL')
+    assert other[b'etag'] == call(app, '/rows', 'address=MEMORIAL&limit=5')[1][b'etag']
+
+
+def test_bad_requests(app):
+    assert call(app, '/nope')[0] == 404
+    assert call(app, '/rows', 'address=x&count=nope')[0] == 400
+    assert call(app, '/summary', method='POST')[0] == 405
+
+
+def test_export_streams_csv(app):
+    status, headers, messages = call(app, '/export', 'address=234 MEMORIAL&start=2022-01-01&end=2023-12-31')
+    assert status == 200
+    assert headers[b'content-type'] == b'text/csv'
+    assert messages[-1].get('more_body', False) is False
+    exported = pd.read_csv(io.BytesIO(body(messages)), dtype=str)
+    assert len(exported) > 0
+    assert set(exported['StreetAddress']) == {'234 MEMORIAL DR SW'}
+
+
+def test_head_export_does_not_run_the_export(app, monkeypatch):
+    loader = app.watcher.snapshot().loader
+
+    def no_export(*args, **kwargs):
+        raise AssertionError("HEAD ran the export")
+    monkeypatch.setattr(loader, 'export_rows', no_export)
+    status, headers, messages = call(app, '/export', 'address=234 MEMORIAL', method='HEAD')
+    assert status == 200
+    assert body(messages) == b''
+
+
+def test_export_error_mid_stream_ends_the_body(app, monkeypatch):
+    loader = app.watcher.snapshot().loader
+
+    def failing_export(*args, **kwargs):
+        yield b'IncidentNumber\n'
+        raise OSError("disk gone")
+    monkeypatch.setattr(loader, 'export_rows', failing_export)
+    status, _, messages = call(app, '/export', 'address=234 MEMORIAL')
+    assert status == 200
+    assert body(messages) == b'IncidentNumber\n'
+    assert messages[-1].get('more_body', False) is False
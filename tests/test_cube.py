@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from lib.aggregates import CUBE_PREFIX, address_channel_counts, build_address_month_cube, cube_quarter_matrix
+
+
+def _rows(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'address': rng.integers(-1, 6, n),       # -1: row without an address
+        'month': rng.integers(2020 * 12, 2023 * 12, n),
+        'severity': rng.integers(0, 3, n),
+        'firearm': rng.integers(0, 2, n).astype(bool),
+    })
+
+
+def _cube(rows, n_addresses=6):
+    return build_address_month_cube(rows['address'].to_numpy(), n_addresses, rows['month'].to_numpy(),
+                                    rows['severity'].to_numpy(), 3, rows['firearm'].to_numpy())
+
+
+def test_cube_matches_groupby():
+    rows = _rows()
+    cube = _cube(rows)
+    got = pd.DataFrame({name: cube[CUBE_PREFIX + name] for name in ['address', 'month', 'severity', 'firearm', 'count']})
+    got = got.astype({'address': np.int64, 'month': np.int64, 'severity': np.int64, 'count': np.int64})
+    expected = rows[rows['address'] >= 0].groupby(['address', 'month', 'severity', 'firearm']).size() \
+        .rename('count').reset_index()
+    pd.testing.assert_frame_equal(got.sort_values(list(got.columns)).reset_index(drop=True),
+                                  expected.sort_values(list(expected.columns)).reset_index(drop=True))
+    # Offsets delimit each address's entries
+    offsets = cube[CUBE_PREFIX + 'offsets']
+    for address in range(6):
+        assert (cube[CUBE_PREFIX + 'address'][offsets[address]:offsets[address + 1]] == address).all()
+
+
+def test_quarter_matrix_and_channel_counts():
+    rows = _rows(seed=1)
+    cube = _cube(rows)
+    valid = rows[rows['address'] >= 0]
+    first_quarter = 2021 * 4
+    matrix = cube_quarter_matrix(cube, 6, first_quarter, 4, severity_code=0)
+    high = valid[(valid['severity'] == 0) & (valid['month'] // 3 >= first_quarter) & (valid['month'] // 3 < first_quarter + 4)]
+    expected = np.zeros((6, 4), dtype=np.int64)
+    np.add.at(expected, (high['address'].to_numpy(), high['month'].to_numpy() // 3 - first_quarter), 1)
+    assert np.array_equal(matrix, expected)
+
+    counts = address_channel_counts(cube, 6, 2021 * 12, 2021 * 12 + 11, high_code=0)
+    in_range = valid[(valid['month'] >= 2021 * 12) & (valid['month'] <= 2021 * 12 + 11)]
+    assert counts['total'].tolist() == np.bincount(in_range['address'], minlength=6).tolist()
+    assert counts['high'].tolist() == np.bincount(in_range['address'][in_range['severity'] == 0], minlength=6).tolist()
+    assert counts['firearm'].tolist() == np.bincount(in_range['address'][in_range['firearm']], minlength=6).tolist()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from lib.aggregates import DailyCounts, day_index
+from lib.data_loader import comparison_ranges, day_range
+
+
+def _counts(timestamps, high):
+    days = day_index(pd.to_datetime(timestamps).to_numpy())
+    return DailyCounts.from_rows(np.asarray(days), np.asarray(high))
+
+
+def test_bounds_are_inclusive_days():
+    counts = _counts(['2024-03-01 00:00', '2024-03-01 23:59', '2024-03-02 12:00', '2024-03-05 08:00'],
+                     [True, False, True, False])
+    assert counts.count('2024-03-01', '2024-03-01') == 2
+    assert counts.count('2024-03-01', '2024-03-02') == 3
+    assert counts.count('2024-03-01', '2024-03-02', 'high') == 2
+    assert counts.count('2024-03-02', '2024-03-05') == 2
+    # Times within the bounding days do not matter
+    assert counts.count('2024-03-01 18:00', '2024-03-05 00:00') == 4
+
+
+def test_ranges_outside_the_data():
+    counts = _counts(['2024-03-01 10:00', '2024-03-03 10:00'], [False, False])
+    assert counts.count('2023-01-01', '2024-02-29') == 0
+    assert counts.count('2024-03-04', '2025-01-01') == 0
+    assert counts.count('2020-01-01', '2030-01-01') == 2
+    assert counts.count('2024-03-03', '2024-03-01') == 0
+
+
+def test_empty_location():
+    counts = DailyCounts.from_rows(np.empty(0, dtype=np.int64), np.empty(0, dtype=bool))
+    assert counts.count('2024-01-01', '2024-12-31') == 0
+
+
+def test_day_range_filter_matches_daily_counts():
+    timestamps = pd.Series(pd.to_datetime(['2024-03-01 00:00:00', '2024-03-02 23:59:59', '2024-03-03 00:00:00']))
+    counts = _counts(timestamps, [False] * 3)
+    start, end = day_range('2024-03-01', '2024-03-02')
+    assert int(((timestamps >= start) & (timestamps <= end)).sum()) == counts.count(start, end) == 2
+
+
+def test_comparison_ranges():
+    ranges = comparison_ranges('2024-03-01', '2024-03-10')
+    assert ranges['current'] == (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-10'))
+    assert ranges['previous_period'] == (pd.Timestamp('2024-02-20'), pd.Timestamp('2024-02-29'))
+    assert ranges['previous_year'] == (pd.Timestamp('2023-03-01'), pd.Timestamp('2023-03-10'))
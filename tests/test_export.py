@@ -0,0 +1,61 @@
+import io
+
+import pandas as pd
+import pytest
+
+from lib import config
+from lib.data_loader import CrimeDataLoader
+
+
+@pytest.fixture
+def loader(export_path, monkeypatch):
+    monkeypatch.setattr(config, "USE_COLUMNAR_STORE", False)
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", False)
+    loader = CrimeDataLoader()
+    loader.load_latest_data()
+    return loader
+
+
+def test_csv_chunks_join_into_one_table(loader):
+    chunks = list(loader.export_rows("MEMORIAL", "2022-03-01", "2023-02-28", chunk_rows=7))
+    assert len(chunks) > 1
+    exported = pd.read_csv(io.BytesIO(b"".join(chunks)), dtype=str)
+
+    rows = loader.filter_by_address("MEMORIAL")
+    rows = rows[(rows["OccurredFromDate"] >= "2022-03-01") & (rows["OccurredFromDate"] <= "2023-02-28")]
+    assert len(exported) == len(rows) > 0
+    assert sorted(exported["IncidentNumber"]) == sorted(rows["IncidentNumber"].astype(str))
+    # Bookkeeping and derived columns stay out; rows come in occurred-date order
+    assert not any(col.startswith("_") or col == "hour_of_week" for col in exported.columns)
+    occurred = pd.to_datetime(exported["OccurredFromDate"], format=config.DATE_FORMAT)
+    assert occurred.is_monotonic_increasing
+
+
+def test_parquet_export_matches_csv(loader):
+    pytest.importorskip("pyarrow")
+    parquet = pd.read_parquet(io.BytesIO(b"".join(loader.export_rows(None, fmt="parquet", chunk_rows=50))))
+    csv = pd.read_csv(io.BytesIO(b"".join(loader.export_rows(None, fmt="csv", chunk_rows=50))), dtype=str)
+    assert len(parquet) == len(csv) == len(loader.df)
+    assert list(parquet["IncidentNumber"].astype(str)) == list(csv["IncidentNumber"])
+
+
+def test_unknown_format_is_rejected(loader):
+    with pytest.raises(ValueError):
+        loader.export_rows(None, fmt="xlsx")
+
+
+def test_empty_csv_export_has_the_header(loader):
+    exported = b"".join(loader.export_rows("MEMORIAL", "2030-01-01", "2030-12-31"))
+    full = pd.read_csv(io.BytesIO(b"".join(loader.export_rows(None))), dtype=str)
+    empty = pd.read_csv(io.BytesIO(exported), dtype=str)
+    assert len(empty) == 0
+    assert list(empty.columns) == list(full.columns)
+
+
+def test_empty_parquet_export_has_the_schema(loader):
+    pytest.importorskip("pyarrow")
+    exported = b"".join(loader.export_rows("MEMORIAL", "2030-01-01", "2030-12-31", fmt="parquet"))
+    full = pd.read_parquet(io.BytesIO(b"".join(loader.export_rows(None, fmt="parquet"))))
+    empty = pd.read_parquet(io.BytesIO(exported))
+    assert len(empty) == 0
+    assert list(empty.columns) == list(full.columns)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from lib import config
+from lib.history import iter_history, write_dedup_report
+from conftest import EXPORT_FILE, make_export
+
+ERA_FILE = "2009_2020CrimeData.csv"
+
+
+@pytest.fixture
+def history_files(data_dirs, monkeypatch):
+    axon = make_export(3)
+    axon.loc[0, ["IncidentNumber", "OccurredFromDate", "ReportDate", "StreetAddress"]] = \
+        ["20123456", "12/31/2020 10:00:00 PM", "01/01/2021 01:00:00 AM", "234 MEMORIAL DR SW"]
+    axon.to_csv(Path(config.RAW_DATA_DIR) / EXPORT_FILE, index=False)
+
+    pd.DataFrame({
+        "Report Number": ["020123456", "20123456", "555", "777", "777", "", "888"],
+        "Report Date": ["12/31/2020", "12/30/2020", "06/01/2015", "06/02/2015", "06/02/2015", "12/31/2020",
+                        "01/05/2022"],
+        "Occur Date": ["12/31/2020", "12/30/2020", "06/01/2015", "06/02/2015", "06/02/2015", "12/31/2020",
+                       "01/05/2022"],
+        "Occur Time": ["2200", "1000", "0930", "13:15", "13:15", "2200", "0800"],
+        "NIBRS Code": ["13A", "13A", "220", "13B", "13B", "13A", "13B"],
+        "Crime Type": ["Aggravated Assault", "Aggravated Assault", "Burglary/Breaking & Entering",
+                       "Simple Assault", "Simple Assault", "Aggravated Assault", "Simple Assault"],
+        "Location": ["234  memorial dr sw", "234 MEMORIAL DR SW", "1 PEACHTREE ST NE", "2 PEACHTREE ST NE",
+                     "2 PEACHTREE ST NE", "234 MEMORIAL DR SW", "3 PEACHTREE ST NE"],
+        "Longitude": ["-84.39"] * 7,
+        "Latitude": ["33.75"] * 7,
+    }).to_csv(Path(config.RAW_DATA_DIR) / ERA_FILE, index=False)
+    return {"2009-2020": ERA_FILE, "2021-2025": EXPORT_FILE}
+
+
+def test_cross_era_duplicates_and_out_of_range_rows_are_dropped(history_files):
+    dropped = []
+    frames = list(iter_history(files=history_files, dropped=dropped))
+    rows = pd.concat(frames, ignore_index=True)
+    eras = rows.groupby("era").size().to_dict()
+    # Newest era first and untouched; of the old era only the duplicate and the 2022 row go
+    assert [df["era"].iloc[0] for df in frames] == ["2021-2025", "2009-2020"]
+    assert eras == {"2021-2025": 3, "2009-2020": 5}
+
+    report_path, n_dropped = write_dedup_report(dropped)
+    report = pd.read_csv(report_path, dtype=str)
+    assert n_dropped == 2
+    assert sorted(zip(report["reason"], report["IncidentNumber"])) == \
+        [("duplicate", "020123456"), ("out_of_range", "888")]
+    assert report.loc[report["reason"] == "duplicate", "kept_era"].tolist() == ["2021-2025"]
+
+
+def test_repeats_within_an_era_and_rows_without_numbers_are_kept(history_files):
+    old = pd.concat([df for df in iter_history(files=history_files) if df["era"].iloc[0] == "2009-2020"])
+    numbers = old["IncidentNumber"].fillna("").tolist()
+    assert numbers.count("777") == 2
+    assert "" in numbers
+    # Same report number on another day is a different report
+    assert "20123456" in numbers
+
+
+def test_without_dedupe_every_row_is_kept(history_files):
+    rows = pd.concat(list(iter_history(files=history_files, dedupe=False)))
+    assert len(rows) == 3 + 7
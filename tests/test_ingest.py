@@ -0,0 +1,119 @@
+import os
+
+import pandas as pd
+
+from lib import columnar, ingest
+from conftest import make_export
+
+
+def _write(df, path):
+    df.to_csv(path, index=False)
+    return path
+
+
+def _stored(store_dir):
+    tables, _ = columnar.read_store(store_dir)
+    return tables
+
+
+def _rebuild(export_path, data_dirs):
+    ingest.ingest_export(export_path, data_dirs / "rebuilt", full=True)
+    return data_dirs / "rebuilt"
+
+
+def _assert_same_rows(store_dir, other_dir):
+    def rows(crimes):
+        return crimes.astype(object).sort_values([ingest.KEY_HASH_COLUMN]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(rows(_stored(store_dir)["crimes"]), rows(_stored(other_dir)["crimes"]))
+
+
+def test_first_ingest_is_a_full_rebuild(export_path, data_dirs):
+    report = ingest.ingest_export(export_path, data_dirs / "store")
+    assert report.full_rebuild
+    assert report.inserted == 300
+    assert len(_stored(data_dirs / "store")["crimes"]) == 300
+
+
+def test_insert_update_and_reclassify_counts(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    ingest.ingest_export(export_path, store_dir)
+
+    df = pd.read_csv(export_path, dtype=str)
+    df.loc[0:9, "LocationType"] = "Residence/Home"           # 10 updated
+    df.loc[10:14, "NIBRS_Offense"] = "Motor Vehicle Theft"   # 5 reclassified
+    new = make_export(7, seed=1)
+    new["IncidentNumber"] = [f"X{i}" for i in range(7)]      # 7 inserted
+    _write(pd.concat([df, new]), export_path)
+
+    report = ingest.ingest_export(export_path, store_dir)
+    assert not report.full_rebuild
+    assert (report.inserted, report.updated, report.reclassified, report.removed) == (7, 10, 5, 5)
+    assert report.unchanged == 300 - 10 - 5
+
+    again = ingest.ingest_export(export_path, store_dir)
+    assert (again.inserted, again.updated, again.reclassified, again.removed) == (0, 0, 0, 0)
+
+    # The incremental store holds the same rows as a rebuild
+    _assert_same_rows(store_dir, _rebuild(export_path, data_dirs))
+    assert len(_stored(store_dir)["crimes"]) == 307
+
+
+def test_repeated_keys_are_kept(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    df = pd.read_csv(export_path, dtype=str)
+    _write(pd.concat([df, df.iloc[:3]]), export_path)
+    assert ingest.ingest_export(export_path, store_dir).inserted == 303
+
+    # One more repeat of the same row, and one repeat dropped again
+    _write(pd.concat([df, df.iloc[:2], df.iloc[:1]]), export_path)
+    report = ingest.ingest_export(export_path, store_dir)
+    assert (report.inserted, report.reclassified, report.removed) == (0, 1, 1)
+    assert len(_stored(store_dir)["crimes"]) == 303
+    _assert_same_rows(store_dir, _rebuild(export_path, data_dirs))
+
+
+def test_unparsable_dates_are_skipped_not_reinserted(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    df = pd.read_csv(export_path, dtype=str)
+    df.loc[0:2, "OccurredFromDate"] = "not a date"
+    _write(df, export_path)
+
+    first = ingest.ingest_export(export_path, store_dir)
+    assert (first.inserted, first.skipped) == (297, 3)
+    second = ingest.ingest_export(export_path, store_dir)
+    assert (second.inserted, second.unchanged, second.skipped) == (0, 297, 3)
+
+    # Fixing a date brings the row in
+    df.loc[0, "OccurredFromDate"] = df.loc[5, "OccurredFromDate"]
+    _write(df, export_path)
+    third = ingest.ingest_export(export_path, store_dir)
+    assert (third.inserted, third.skipped) == (1, 2)
+    assert len(_stored(store_dir)["crimes"]) == 298
+
+
+def test_empty_store_is_diffed(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    ingest.ingest_export(export_path, store_dir)
+    tables = _stored(store_dir)
+    columnar.write_store(store_dir, {name: df.iloc[:0] for name, df in tables.items()})
+
+    report = ingest.ingest_export(export_path, store_dir)
+    assert not report.full_rebuild
+    assert report.inserted == 300
+
+
+def test_only_if_new_skips_an_ingested_export(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    ingest.ingest_export(export_path, store_dir)
+    assert ingest.is_ingested(export_path, store_dir)
+    assert ingest.ingest_export(export_path, store_dir, only_if_new=True) is None
+
+
+def test_store_keeps_the_previous_version(export_path, data_dirs):
+    store_dir = data_dirs / "store"
+    versions = []
+    for _ in range(3):
+        ingest.ingest_export(export_path, store_dir, full=True)
+        versions.append(columnar.version_dir(store_dir).name)
+    on_disk = sorted(name for name in os.listdir(store_dir) if name.startswith(columnar.VERSION_PREFIX))
+    assert on_disk == versions[1:]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib import config
+from lib.data_loader import CrimeDataLoader
+
+
+@pytest.fixture
+def loaders(export_path, monkeypatch):
+    """(loader restored from a snapshot, loader built cold from the export)."""
+    monkeypatch.setattr(config, "USE_COLUMNAR_STORE", False)
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", True)
+    monkeypatch.setattr(config, "WRITE_STARTUP_SNAPSHOT", True)
+    CrimeDataLoader().load_latest_data()
+    assert config.STARTUP_SNAPSHOT_PATH.exists()
+
+    restored = CrimeDataLoader()
+
+    def no_build(df):
+        raise AssertionError("snapshot was not used")
+    monkeypatch.setattr(restored, "_build_prepared", no_build)
+    restored.load_latest_data()
+
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", False)
+    cold = CrimeDataLoader()
+    cold.load_latest_data()
+    return restored, cold
+
+
+def test_snapshot_frame_matches_cold_build(loaders):
+    restored, cold = loaders
+    # The snapshot stores text columns dictionary-encoded, so compare values
+    pd.testing.assert_frame_equal(restored.df.astype(object), cold.df.astype(object))
+
+
+def test_snapshot_queries_match_cold_build(loaders):
+    restored, cold = loaders
+    for address in config.LOCATIONS:
+        assert restored.get_crime_summary(address) == cold.get_crime_summary(address)
+        assert restored.get_period_comparison(address, "2022-03-01", "2022-08-31") == \
+            cold.get_period_comparison(address, "2022-03-01", "2022-08-31")
+        pd.testing.assert_frame_equal(restored.get_quarterly_time_series_data(address),
+                                      cold.get_quarterly_time_series_data(address))
+    pd.testing.assert_frame_equal(restored.get_forecasts(), cold.get_forecasts())
+    restored_quarters, cold_quarters = restored._data.quarter_matrix(), cold._data.quarter_matrix()
+    assert np.array_equal(restored_quarters[1], cold_quarters[1])
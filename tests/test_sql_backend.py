@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from lib import config
+from lib.data_loader import CrimeDataLoader, load_severity_dict, map_severity
+from lib.sql_backend import SQLiteCrimeDataLoader
+from conftest import ADDRESSES
+
+
+@pytest.fixture
+def loaders(export_path, monkeypatch):
+    monkeypatch.setattr(config, "USE_COLUMNAR_STORE", False)
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", False)
+    pandas_loader, sqlite_loader = CrimeDataLoader(), SQLiteCrimeDataLoader()
+    pandas_loader.load_latest_data()
+    sqlite_loader.load_latest_data()
+    yield pandas_loader, sqlite_loader
+    sqlite_loader.close()
+
+
+def _severities(df):
+    rows = df[["IncidentNumber", "NIBRS_Offense", "severity"]].astype(str)
+    return sorted(map(tuple, rows.to_numpy()))
+
+
+def test_backends_map_severity_by_code_alike(loaders):
+    pandas_loader, sqlite_loader = loaders
+    for address in ADDRESSES:
+        assert _severities(pandas_loader.filter_by_address(address)) == \
+            _severities(sqlite_loader.filter_by_address(address))
+    # The synthetic codes do not match their descriptions, so the code mapping is what agrees
+    by_description = map_severity(pandas_loader.df["NIBRS_Offense"], load_severity_dict())
+    assert (pandas_loader.df["severity"] != by_description).any()
+
+
+def test_close_leaves_other_threads_connections_open(loaders):
+    _, sqlite_loader = loaders
+    opened, closed = threading.Event(), threading.Event()
+    results = {}
+
+    def worker():
+        results["before"] = sqlite_loader._connection()
+        opened.set()
+        closed.wait(5)
+        results["still_open"] = results["before"].execute("SELECT 1").fetchone() == (1,)
+        results["after"] = sqlite_loader._connection()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait(5)
+    own = sqlite_loader._connection()
+    sqlite_loader.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        own.execute("SELECT 1")
+    closed.set()
+    thread.join(5)
+
+    # The worker's connection survived close() and is swapped on its next query
+    assert results["still_open"]
+    assert results["after"] is not results["before"]
+    with pytest.raises(sqlite3.ProgrammingError):
+        results["before"].execute("SELECT 1")
+    assert len(sqlite_loader.filter_by_address(ADDRESSES[0])) > 0
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from lib import config
+from lib.data_loader import CrimeDataLoader
+from lib.summaries import read_location_summary, write_location_summaries
+
+
+def test_summary_matches_default_dashboard_range(export_path, monkeypatch):
+    monkeypatch.setattr(config, "USE_COLUMNAR_STORE", False)
+    monkeypatch.setattr(config, "USE_STARTUP_SNAPSHOT", False)
+    loader = CrimeDataLoader()
+    loader.load_latest_data()
+    write_location_summaries(loader)
+
+    for address in config.LOCATIONS:
+        rows = loader.filter_by_address(address)
+        if len(rows) == 0:
+            continue
+        summary = read_location_summary(address)
+        # Rows on the last day count too, whatever their time
+        assert summary["total_crimes"] == len(rows)
+        assert summary["total_high"] == int((rows["severity"] == "High").sum())
+        assert pd.Timestamp(summary["max_date"]) == rows["OccurredFromDate"].max()